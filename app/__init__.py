@@ -5,19 +5,43 @@ configuring the Flask application instance with all necessary extensions,
 blueprints, and database initialization.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, render_template
+from jinja2 import FileSystemBytecodeCache
 from werkzeug.exceptions import HTTPException
+from flask_compress import Compress
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from app.utils.json_provider import OrjsonProvider
 from config import Config
 import os
 
+# Security headers added to every response, built once at import time
+SECURITY_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Content-Security-Policy': (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data:; "
+        "font-src 'self'; "
+        "connect-src 'self'; "
+        "frame-ancestors 'none'; "
+        "base-uri 'self'; "
+        "form-action 'self'"
+    ),
+}
+
 
 def create_app(config_class=Config):
     """Create and configure the Flask application.
 
     This factory function creates a new Flask application instance, configures
-    it with the provided configuration class, initializes rate limiting, registers
+    it with the provided configuration class, initializes caching, compression and rate limiting, registers
     blueprints, and sets up the database.
 
     Args:
@@ -32,36 +56,48 @@ def create_app(config_class=Config):
     """
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
 
     os.makedirs(app.config['FAVICON_CACHE_DIR'], exist_ok=True)
+    # Background favicon downloads, so saving and importing bookmarks does not wait for remote sites
+    app.extensions['favicon_executor'] = ThreadPoolExecutor(max_workers=app.config['FAVICON_WORKERS'],
+                                                            thread_name_prefix='favicon')
+
+    jinja_cache_dir = app.config.get('JINJA_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=jinja_cache_dir)
+
+    from app.utils.auth import init_auth
+    init_auth(app)
+
+    from app.utils.cache import init_cache
+    init_cache(app)
+
+    # gzip/brotli/zstd for HTML and JSON responses, including the streamed export
+    Compress(app)
+
+    storage_uri = app.config['RATELIMIT_STORAGE_URI']
+    storage_options = {}
+    if storage_uri.startswith(('redis://', 'rediss://', 'redis+unix://')):
+        # Bounded pool shared by all threads of the worker for the rate limit counters
+        import redis
+        storage_options['connection_pool'] = redis.ConnectionPool.from_url(
+            storage_uri.replace('redis+unix', 'unix'),
+            max_connections=app.config['RATELIMIT_STORAGE_MAX_CONNECTIONS']
+        )
 
     app.limiter = Limiter(
         get_remote_address,
         app=app,
-        storage_uri=app.config['RATELIMIT_STORAGE_URI'],
+        storage_uri=storage_uri,
+        storage_options=storage_options,
         default_limits=[app.config['RATELIMIT_DEFAULT']]
     )
 
     @app.after_request
     def add_security_headers(response):
         """Add security headers to all responses."""
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY'
-        response.headers['X-XSS-Protection'] = '1; mode=block'
-        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-        csp_policy = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data:; "
-            "font-src 'self'; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none'; "
-            "base-uri 'self'; "
-            "form-action 'self'"
-        )
-        response.headers['Content-Security-Policy'] = csp_policy
+        response.headers.update(SECURITY_HEADERS)
         return response
 
     @app.errorhandler(HTTPException)
@@ -75,6 +111,10 @@ def create_app(config_class=Config):
     from app.routes import main
     app.register_blueprint(main.bp)
 
+    # Compile all templates at startup instead of on the first request that renders them
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
     from app.utils.database import init_db, close_db
     with app.app_context():
         init_db()
@@ -5,13 +5,83 @@ including bookmark management, folder operations, tag handling, search functiona
 and Firefox import/export features.
 """
 
-from flask import Blueprint, render_template, send_from_directory, request, redirect, url_for, jsonify, Response, abort
+from concurrent.futures import ThreadPoolExecutor
+from flask import (Blueprint, render_template, send_from_directory, request, redirect, url_for, jsonify, Response, abort,
+                   current_app, make_response)
 from app.utils.auth import requires_auth
+from app.utils.cache import cached_by_version, page_etag, sidebar_cache_key
 from app.services import bookmark_service, folder_service, tag_service, favicon_service, metadata_service, firefox_service
-import json
 
 bp = Blueprint('main', __name__)
 
+# Index page URL per script root, see _index_url()
+_index_urls = {}
+
+# Browser cache lifetime for static root files (30 days)
+STATIC_MAX_AGE = 30 * 24 * 3600
+
+# Shared pool for independent page data loads (sidebar folders, tags, bookmark list)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='page-load')
+
+
+def _load_parallel(*calls):
+    """Run independent service calls concurrently and return their results.
+
+    Each call runs in a worker thread inside its own application context, so it
+    gets its own SQLite connection from get_db(). SQLite releases the GIL while
+    executing, which lets the queries overlap instead of running back to back.
+
+    Args:
+        *calls: Tuples of (function, kwargs dict)
+
+    Returns:
+        list: Results in the same order as the given calls
+    """
+    app = current_app._get_current_object()
+
+    def run(func, kwargs):
+        with app.app_context():
+            return func(**kwargs)
+
+    futures = [_executor.submit(run, func, kwargs) for func, kwargs in calls]
+    return [future.result() for future in futures]
+
+
+def _index_url():
+    """Return the URL of the index page used by redirects and form return links.
+
+    The URL is built with url_for() once per script root (mount point) and then
+    reused, since the index route has no arguments.
+
+    Returns:
+        str: URL of the main index page
+    """
+    script_root = request.script_root
+    url = _index_urls.get(script_root)
+    if url is None:
+        url = _index_urls[script_root] = url_for('main.index')
+    return url
+
+
+def _conditional_response(etag, html=None):
+    """Build a page response that browsers revalidate with If-None-Match.
+
+    Args:
+        etag (str): ETag of the page
+        html (str, optional): Rendered page, or None for a 304 Not Modified response
+
+    Returns:
+        Response: Response with ETag and private, no-cache Cache-Control headers
+
+    Note:
+        The ETag is weak, so it stays valid when the response is compressed.
+    """
+    response = make_response(html, 200) if html is not None else make_response('', 304)
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 
 @bp.route('/')
 @requires_auth
@@ -19,7 +89,9 @@ def index():
     """Render the main bookmarks listing page.
 
     Displays bookmarks filtered by folder or tag with pagination and sorting support.
-    If a search query is provided, redirects to the dedicated search page.
+    If a search query is provided, redirects to the dedicated search page. The
+    search form submits to the search page directly, so the redirect only serves
+    old ?search= links.
 
     Query Parameters:
         folder (str): Optional folder ID to filter bookmarks (use 'unfiled' for bookmarks without a folder)
@@ -32,8 +104,6 @@ def index():
     Returns:
         str: Rendered HTML template with bookmarks and navigation data
     """
-    folders = folder_service.get_folder_hierarchy()
-    tags = tag_service.get_all_tags()
     folder_id = request.args.get('folder')
     tag_id = request.args.get('tag')
     search = request.args.get('search', '')
@@ -48,49 +118,64 @@ def index():
     if search:
         return redirect(url_for('main.search_page', q=search))
 
-    result = bookmark_service.get_all_bookmarks(
-        folder_id=folder_id,
-        tag_id=tag_id,
-        search=None,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        include_subfolders=False,
-        page=page,
-        per_page=25
+    etag = page_etag(request.full_path)
+    if request.if_none_match.contains_weak(etag):
+        return _conditional_response(etag)
+
+    folders, tags, result = _load_parallel(
+        (folder_service.get_folder_hierarchy, {}),
+        (tag_service.get_all_tags, {}),
+        (bookmark_service.get_all_bookmarks, {
+            'folder_id': folder_id,
+            'tag_id': tag_id,
+            'search': None,
+            'sort_by': sort_by,
+            'sort_order': sort_order,
+            'include_subfolders': False,
+            'page': page,
+            'per_page': 25
+        })
     )
 
+    # Resolve the active folder and tag from the loaded sidebar data instead of querying again
     current_folder = None
     current_tag = None
     if folder_id and not is_unfiled:
-        current_folder = folder_service.get_folder(folder_id)
+        current_folder = (folder_service.find_folder_in_hierarchy(folders, folder_id)
+                          or folder_service.get_folder(folder_id))
     if tag_id:
-        current_tag = tag_service.get_tag(tag_id)
+        current_tag = next((tag for tag in tags if tag['id'] == tag_id), None)
 
-    return render_template('index.html',
+    html = render_template('index.html',
                            bookmarks=result['bookmarks'],
                            folders=folders,
                            tags=tags,
                            current_folder=current_folder,
                            current_tag=current_tag,
-                           search=search,
                            sort_by=sort_by,
                            sort_order=sort_order,
                            page=result['page'],
                            total_pages=result['total_pages'],
                            total=result['total'],
-                           is_unfiled=is_unfiled)
+                           is_unfiled=is_unfiled,
+                           sidebar_key=sidebar_cache_key(folder_id, tag_id, sort_by, sort_order))
+    return _conditional_response(etag, html)
 
 
 @bp.route('/robots.txt')
 def robots():
-    """Serve robots.txt file."""
-    return send_from_directory('static', 'robots.txt', mimetype='text/plain')
+    """Serve robots.txt file with long-lived cache headers."""
+    response = send_from_directory('static', 'robots.txt', mimetype='text/plain', max_age=STATIC_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 
 @bp.route('/favicon.ico')
 def favicon():
-    """Serve favicon.ico file."""
-    return send_from_directory('static/img', 'favicon.ico', mimetype='image/vnd.microsoft.icon')
+    """Serve favicon.ico file with long-lived cache headers."""
+    response = send_from_directory('static/img', 'favicon.ico', mimetype='image/vnd.microsoft.icon', max_age=STATIC_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 
 @bp.route('/search')
@@ -114,20 +199,24 @@ def search_page():
     sort_order = request.args.get('order', 'desc')
     page = request.args.get('page', 1, type=int)
 
-    result = {'bookmarks': [], 'total': 0, 'page': 1, 'total_pages': 0}
-    if query:
-        result = bookmark_service.get_all_bookmarks(
-            search=query,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            page=page,
-            per_page=25
-        )
+    etag = page_etag(request.full_path)
+    if request.if_none_match.contains_weak(etag):
+        return _conditional_response(etag)
 
-    folders = folder_service.get_folder_hierarchy()
-    tags = tag_service.get_all_tags()
-
-    return render_template('search_results.html',
+    calls = [(folder_service.get_folder_hierarchy, {}), (tag_service.get_all_tags, {})]
+    if query:
+        calls.append((bookmark_service.get_all_bookmarks, {
+            'search': query,
+            'sort_by': sort_by,
+            'sort_order': sort_order,
+            'page': page,
+            'per_page': 25
+        }))
+
+    folders, tags, *rest = _load_parallel(*calls)
+    result = rest[0] if rest else {'bookmarks': [], 'total': 0, 'page': 1, 'total_pages': 0}
+
+    html = render_template('search_results.html',
                            bookmarks=result['bookmarks'],
                            folders=folders,
                            tags=tags,
@@ -137,6 +226,7 @@ def search_page():
                            page=result['page'],
                            total_pages=result['total_pages'],
                            total=result['total'])
+    return _conditional_response(etag, html)
 
 
 @bp.route('/api/fetch-metadata', methods=['POST'])
@@ -170,7 +260,8 @@ def search_api():
     """API endpoint for live bookmark search.
 
     Provides real-time search results for the autocomplete/live search feature.
-    Returns a maximum of 10 results.
+    Returns a maximum of 10 results. Results are cached per query until the
+    next write, since typeahead requests repeat the same prefixes.
 
     Query Parameters:
         q (str): Search query string (minimum 2 characters)
@@ -182,17 +273,7 @@ def search_api():
     if not query or len(query) < 2:
         return jsonify({'bookmarks': []})
 
-    result = bookmark_service.get_all_bookmarks(search=query, sort_by='created_at', sort_order='desc', page=1, per_page=10)
-    results = []
-    for bookmark in result['bookmarks']:
-        results.append({
-            'id': bookmark['id'],
-            'title': bookmark['title'],
-            'url': bookmark['url'],
-            'folder_name': bookmark['folder_name'],
-            'favicon': bookmark['favicon']
-        })
-
+    results = cached_by_version(f'search_api_{query}', lambda: bookmark_service.search_bookmarks(query, limit=10))
     return jsonify({'bookmarks': results})
 
 
@@ -212,12 +293,11 @@ def add_bookmark_form():
     folder_id = request.args.get('folder')
     url = request.args.get('url')
     title = request.args.get('title')
-    folders = folder_service.get_folder_hierarchy()
-    tags = tag_service.get_all_tags()
+    folders, tags = _load_parallel((folder_service.get_folder_hierarchy, {}), (tag_service.get_all_tags, {}))
     current_folder = None
     if folder_id:
         current_folder = folder_service.get_folder(folder_id)
-    return_url = request.referrer or url_for('main.index')
+    return_url = request.referrer or _index_url()
     return render_template('bookmark_form.html', folders=folders, tags=tags, bookmark=None,
                            current_folder=current_folder, url=url, title=title, return_url=return_url)
 
@@ -235,10 +315,9 @@ def edit_bookmark_form(bookmark_id):
     """
     bookmark = bookmark_service.get_bookmark(bookmark_id)
     if not bookmark:
-        return redirect(url_for('main.index'))
-    folders = folder_service.get_folder_hierarchy()
-    tags = tag_service.get_all_tags()
-    return_url = request.referrer or url_for('main.index')
+        return redirect(_index_url())
+    folders, tags = _load_parallel((folder_service.get_folder_hierarchy, {}), (tag_service.get_all_tags, {}))
+    return_url = request.referrer or _index_url()
     return render_template('bookmark_form.html', folders=folders, tags=tags, bookmark=bookmark,
                            current_folder=None, return_url=return_url)
 
@@ -249,7 +328,8 @@ def save_bookmark():
     """Save a new or updated bookmark.
 
     Creates a new bookmark if bookmark_id is not provided, otherwise updates existing.
-    Automatically downloads and caches the favicon for the URL.
+    Automatically downloads and caches the favicon for the URL, in the background
+    when FAVICON_ASYNC is enabled.
 
     Form Data:
         bookmark_id (str): Optional UUID for updating existing bookmark
@@ -272,14 +352,14 @@ def save_bookmark():
     return_url = request.form.get('return_url')
 
     folder_id = folder_id if folder_id else None
-    favicon = favicon_service.download_favicon(url)
 
     if bookmark_id:
-        bookmark_service.update_bookmark(bookmark_id, url, title, description, folder_id, tag_ids, favicon)
+        bookmark_service.update_bookmark(bookmark_id, url, title, description, folder_id, tag_ids)
     else:
-        bookmark_service.create_bookmark(url, title, description, folder_id, tag_ids, favicon)
+        bookmark_id = bookmark_service.create_bookmark(url, title, description, folder_id, tag_ids)
+    favicon_service.schedule_favicon_download(bookmark_id, url)
 
-    return redirect(return_url or url_for('main.index'))
+    return redirect(return_url or _index_url())
 
 
 @bp.route('/bookmark/<bookmark_id>/delete', methods=['POST'])
@@ -316,7 +396,7 @@ def toggle_pin(bookmark_id):
         redirect: Redirects to the referring page or index
     """
     bookmark_service.toggle_pin(bookmark_id)
-    return redirect(request.referrer or url_for('main.index'))
+    return redirect(request.referrer or _index_url())
 
 
 @bp.route('/folder/add')
@@ -335,7 +415,7 @@ def add_folder_form():
     parent_folder = None
     if parent_id:
         parent_folder = folder_service.get_folder(parent_id)
-    return_url = request.referrer or url_for('main.index')
+    return_url = request.referrer or _index_url()
     return render_template('folder_form.html', folder=None, folders=folders, parent_folder=parent_folder,
                            return_url=return_url)
 
@@ -353,9 +433,9 @@ def edit_folder_form(folder_id):
     """
     folder = folder_service.get_folder(folder_id)
     if not folder:
-        return redirect(url_for('main.index'))
+        return redirect(_index_url())
     folders = folder_service.get_folder_hierarchy()
-    return_url = request.referrer or url_for('main.index')
+    return_url = request.referrer or _index_url()
     return render_template('folder_form.html', folder=folder, folders=folders, parent_folder=None, return_url=return_url)
 
 
@@ -390,7 +470,7 @@ def save_folder():
     except ValueError as e:
         abort(400, description=str(e))
 
-    return redirect(return_url or url_for('main.index'))
+    return redirect(return_url or _index_url())
 
 
 @bp.route('/folder/<folder_id>/delete', methods=['POST'])
@@ -411,7 +491,7 @@ def delete_folder(folder_id):
     """
 
     folder_service.delete_folder(folder_id)
-    return redirect(url_for('main.index'))
+    return redirect(_index_url())
 
 
 @bp.route('/tag/add')
@@ -422,7 +502,7 @@ def add_tag_form():
     Returns:
         str: Rendered HTML form template
     """
-    return_url = request.referrer or url_for('main.index')
+    return_url = request.referrer or _index_url()
     return render_template('tag_form.html', tag=None, return_url=return_url)
 
 
@@ -439,8 +519,8 @@ def edit_tag_form(tag_id):
     """
     tag = tag_service.get_tag(tag_id)
     if not tag:
-        return redirect(url_for('main.index'))
-    return_url = request.referrer or url_for('main.index')
+        return redirect(_index_url())
+    return_url = request.referrer or _index_url()
     return render_template('tag_form.html', tag=tag, return_url=return_url)
 
 
@@ -468,7 +548,7 @@ def save_tag():
     else:
         tag_service.create_tag(name)
 
-    return redirect(return_url or url_for('main.index'))
+    return redirect(return_url or _index_url())
 
 
 @bp.route('/tag/<tag_id>/delete', methods=['POST'])
@@ -489,7 +569,7 @@ def delete_tag(tag_id):
     """
 
     tag_service.delete_tag(tag_id)
-    return redirect(url_for('main.index'))
+    return redirect(_index_url())
 
 
 @bp.route('/import')
@@ -528,8 +608,7 @@ def import_firefox():
         return render_template('import_error.html', error='Only JSON files are allowed')
 
     try:
-        content = file.read().decode('utf-8')
-        data = firefox_service.parse_firefox_json(content)
+        data = firefox_service.parse_firefox_json(file.read())
         stats = firefox_service.import_from_firefox_json(data)
 
         return render_template('import_success.html', stats=stats)
@@ -545,14 +624,14 @@ def export_firefox():
     """Export all bookmarks to Firefox JSON format.
 
     Generates a Firefox-compatible JSON file containing all bookmarks,
-    folders, and tags from the application database.
+    folders, and tags from the application database. The JSON document is
+    encoded incrementally with orjson and streamed in chunks instead of being
+    built as one string in memory.
 
     Returns:
         Response: JSON file download with bookmarks.json filename
     """
     data = firefox_service.export_to_firefox_json()
-    json_str = json.dumps(data, indent=2, ensure_ascii=False)
-
-    response = Response(json_str, mimetype='application/json')
+    response = Response(firefox_service.iter_firefox_json(data), mimetype='application/json')
     response.headers['Content-Disposition'] = 'attachment; filename=bookmarks.json'
     return response
@@ -4,9 +4,78 @@ This module provides business logic for bookmark operations including
 retrieval, creation, updating, deletion, and pinning functionality.
 """
 
-from app.utils.database import get_db
+from app.utils.database import get_db, transaction
+from app.utils.cache import bump_data_version
+import re
 import uuid
 
+# Statements of the single-bookmark operations, shared so each call reuses the
+# connection's cached prepared statement
+SQL_GET_BOOKMARK = 'SELECT * FROM bookmarks WHERE id = ?'
+SQL_GET_BOOKMARK_TAGS = '''
+    SELECT t.id, t.name FROM tags t
+    JOIN bookmark_tags bt ON t.id = bt.tag_id
+    WHERE bt.bookmark_id = ?
+'''
+SQL_GET_BOOKMARK_TAG_IDS = 'SELECT tag_id FROM bookmark_tags WHERE bookmark_id = ?'
+SQL_INSERT_BOOKMARK = '''
+    INSERT INTO bookmarks (id, url, title, description, folder_id, favicon) VALUES (?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_BOOKMARK_TAG = 'INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag_id) VALUES (?, ?)'
+SQL_UPDATE_BOOKMARK = '''
+    UPDATE bookmarks SET url = ?, title = ?, description = ?, folder_id = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+SQL_UPDATE_BOOKMARK_WITH_FAVICON = '''
+    UPDATE bookmarks SET url = ?, title = ?, description = ?, folder_id = ?, favicon = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+SQL_DELETE_BOOKMARK_TAGS = 'DELETE FROM bookmark_tags WHERE bookmark_id = ?'
+SQL_DELETE_BOOKMARK = 'DELETE FROM bookmarks WHERE id = ?'
+SQL_SET_FAVICON = 'UPDATE bookmarks SET favicon = ? WHERE id = ?'
+SQL_GET_PINNED = 'SELECT pinned FROM bookmarks WHERE id = ?'
+SQL_SET_PINNED = 'UPDATE bookmarks SET pinned = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?'
+
+# Words of a search term, each matched as a prefix in the full-text index
+SEARCH_TOKEN_RE = re.compile(r'\w+')
+# Anything but words and whitespace, which the full-text index does not store
+SEARCH_SYMBOL_RE = re.compile(r'[^\w\s]')
+
+SQL_SEARCH_LIKE = '(b.title LIKE ? OR b.url LIKE ? OR b.description LIKE ?)'
+
+
+def _search_condition(search):
+    """Build the WHERE condition matching bookmarks for a search term.
+
+    Words are matched as prefixes against the bookmarks_fts index, all words
+    must match. Terms containing other characters (e.g., 'c++', 'node.js')
+    must also contain the whole term as a substring, so 'c++' does not match
+    every word starting with 'c'. Terms without any word characters
+    (e.g., '++') only use the substring match.
+
+    Args:
+        search (str): Search term matched against title, URL, and description
+
+    Returns:
+        tuple: SQL condition on the bookmarks alias b and its parameters
+
+    Note:
+        Words only match at the start of a word: 'hub' does not find
+        'GitHub', unlike a plain substring search.
+    """
+    search_term = f'%{search}%'
+    like_params = [search_term, search_term, search_term]
+    tokens = SEARCH_TOKEN_RE.findall(search)
+    if not tokens:
+        return SQL_SEARCH_LIKE, like_params
+
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    condition = 'b.rowid IN (SELECT rowid FROM bookmarks_fts WHERE bookmarks_fts MATCH ?)'
+    if SEARCH_SYMBOL_RE.search(search):
+        # The index narrows the candidates, the substring keeps the symbols
+        return f'{condition} AND {SQL_SEARCH_LIKE}', [match] + like_params
+    return condition, [match]
+
 
 def get_all_bookmarks(folder_id=None, tag_id=None, search=None, sort_by='created_at', sort_order='desc',
                       include_subfolders=True, page=1, per_page=25):
@@ -16,7 +85,8 @@ def get_all_bookmarks(folder_id=None, tag_id=None, search=None, sort_by='created
         folder_id (str, optional): Filter by folder UUID. If include_subfolders is True,
             includes bookmarks from all descendant folders. Use 'unfiled' to get bookmarks without a folder.
         tag_id (str, optional): Filter by tag UUID
-        search (str, optional): Full-text search across title, URL, and description
+        search (str, optional): Full-text search across title, URL, and description,
+            matching word prefixes
         sort_by (str): Sort field - 'title', 'url', or 'created_at' (default: 'created_at')
         sort_order (str): Sort order - 'asc' or 'desc' (default: 'desc')
         include_subfolders (bool): Include descendant folders when folder_id is set (default: True)
@@ -33,100 +103,79 @@ def get_all_bookmarks(folder_id=None, tag_id=None, search=None, sort_by='created
 
     Note:
         Pinned bookmarks always appear first regardless of sort order.
+        The total is computed by the page query itself with COUNT(*) OVER ().
     """
     db = get_db()
 
     # Handle unfiled bookmarks (folder_id IS NULL)
     is_unfiled = folder_id == 'unfiled'
 
-    folder_ids = []
-    if folder_id and not is_unfiled:
-        if include_subfolders:
-            from app.services.folder_service import get_folder_with_descendants
-            folder_ids = get_folder_with_descendants(folder_id)
-        else:
-            folder_ids = [folder_id]
-
-    # Count total matching bookmarks
-    count_query = '''
-        SELECT COUNT(DISTINCT b.id)
-        FROM bookmarks b
-        LEFT JOIN folders f ON b.folder_id = f.id
-        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
-        LEFT JOIN tags t ON bt.tag_id = t.id
-        WHERE 1=1
-    '''
-    count_params = []
-
-    if is_unfiled:
-        count_query += ' AND b.folder_id IS NULL'
-    elif folder_ids:
-        placeholders = ','.join('?' * len(folder_ids))
-        count_query += f' AND b.folder_id IN ({placeholders})'
-        count_params.extend(folder_ids)
-
-    if tag_id:
-        count_query += ' AND b.id IN (SELECT bookmark_id FROM bookmark_tags WHERE tag_id = ?)'
-        count_params.append(tag_id)
-
-    if search:
-        count_query += ' AND (b.title LIKE ? OR b.url LIKE ? OR b.description LIKE ?)'
-        search_term = f'%{search}%'
-        count_params.extend([search_term, search_term, search_term])
-
-    total = db.execute(count_query, count_params).fetchone()[0]
-
-    query = '''
-        SELECT DISTINCT b.*,
-               f.name as folder_name,
-               GROUP_CONCAT(t.name, ',') as tag_names,
-               GROUP_CONCAT(t.id, ',') as tag_ids
-        FROM bookmarks b
-        LEFT JOIN folders f ON b.folder_id = f.id
-        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
-        LEFT JOIN tags t ON bt.tag_id = t.id
-        WHERE 1=1
-    '''
+    conditions = []
     params = []
 
     if is_unfiled:
-        query += ' AND b.folder_id IS NULL'
-    elif folder_ids:
-        placeholders = ','.join('?' * len(folder_ids))
-        query += f' AND b.folder_id IN ({placeholders})'
-        params.extend(folder_ids)
+        conditions.append('b.folder_id IS NULL')
+    elif folder_id and include_subfolders:
+        # The folder and all its descendants with one index lookup in the closure table
+        conditions.append('b.folder_id IN (SELECT descendant FROM folder_closure WHERE ancestor = ?)')
+        params.append(folder_id)
+    elif folder_id:
+        conditions.append('b.folder_id = ?')
+        params.append(folder_id)
 
     if tag_id:
-        query += ' AND b.id IN (SELECT bookmark_id FROM bookmark_tags WHERE tag_id = ?)'
+        conditions.append('b.id IN (SELECT bookmark_id FROM bookmark_tags WHERE tag_id = ?)')
         params.append(tag_id)
 
     if search:
-        query += ' AND (b.title LIKE ? OR b.url LIKE ? OR b.description LIKE ?)'
-        search_term = f'%{search}%'
-        params.extend([search_term, search_term, search_term])
+        condition, search_params = _search_condition(search)
+        conditions.append(condition)
+        params.extend(search_params)
 
-    query += ' GROUP BY b.id'
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
 
     valid_sorts = {'title': 'b.title', 'url': 'b.url', 'created_at': 'b.created_at'}
     sort_column = valid_sorts.get(sort_by, 'b.created_at')
     sort_direction = 'ASC' if sort_order == 'asc' else 'DESC'
 
-    query += f' ORDER BY b.pinned DESC, {sort_column} {sort_direction}'
-
     # Add pagination
     offset = (page - 1) * per_page
-    query += f' LIMIT {per_page} OFFSET {offset}'
-
-    cursor = db.execute(query, params)
-    bookmarks = []
-    for row in cursor.fetchall():
-        bookmark = dict(row)
-        bookmark['tags'] = []
-        if bookmark['tag_names']:
-            tag_names = bookmark['tag_names'].split(',')
-            tag_ids = bookmark['tag_ids'].split(',')
-            bookmark['tags'] = [{'id': tid, 'name': tname} for tid, tname in zip(tag_ids, tag_names)]
-        bookmarks.append(bookmark)
+
+    # The window count returns the total of all matches on every row of the page
+    query = f'''
+        SELECT b.*, f.name as folder_name, COUNT(*) OVER () AS _total
+        FROM bookmarks b
+        LEFT JOIN folders f ON b.folder_id = f.id{where}
+        ORDER BY b.pinned DESC, {sort_column} {sort_direction}
+        LIMIT {per_page} OFFSET {offset}
+    '''
+    bookmarks = [dict(row) for row in db.execute(query, params).fetchall()]
+
+    if bookmarks:
+        total = bookmarks[0]['_total']
+        for bookmark in bookmarks:
+            del bookmark['_total']
+    elif offset:
+        # A page past the end has no row to carry the total
+        total = db.execute(f'SELECT COUNT(*) FROM bookmarks b{where}', params).fetchone()[0]
+    else:
+        total = 0
+
+    # Load the tags of all bookmarks on this page with one query
+    tags_by_bookmark = {bookmark['id']: [] for bookmark in bookmarks}
+    if bookmarks:
+        placeholders = ','.join('?' * len(bookmarks))
+        tag_rows = db.execute(f'''
+            SELECT bt.bookmark_id, t.id, t.name
+            FROM bookmark_tags bt
+            JOIN tags t ON t.id = bt.tag_id
+            WHERE bt.bookmark_id IN ({placeholders})
+            ORDER BY t.name
+        ''', list(tags_by_bookmark)).fetchall()
+        for row in tag_rows:
+            tags_by_bookmark[row['bookmark_id']].append({'id': row['id'], 'name': row['name']})
+    for bookmark in bookmarks:
+        bookmark['tags'] = tags_by_bookmark[bookmark['id']]
 
     return {
         'bookmarks': bookmarks,
@@ -137,6 +186,33 @@ def get_all_bookmarks(folder_id=None, tag_id=None, search=None, sort_by='created
     }
 
 
+def search_bookmarks(search, limit=10):
+    """Search bookmarks for the live search, returning only the listed fields.
+
+    Uses the same matching and ordering as get_all_bookmarks(search=...), but
+    selects just the columns needed for the results dropdown and skips the
+    tag aggregation and total count.
+
+    Args:
+        search (str): Search term matched against title, URL, and description
+        limit (int): Maximum number of results (default: 10)
+
+    Returns:
+        list: List of dictionaries with id, title, url, folder_name, and favicon
+    """
+    db = get_db()
+    condition, params = _search_condition(search)
+    rows = db.execute(f'''
+        SELECT b.id, b.title, b.url, f.name as folder_name, b.favicon
+        FROM bookmarks b
+        LEFT JOIN folders f ON b.folder_id = f.id
+        WHERE {condition}
+        ORDER BY b.pinned DESC, b.created_at DESC
+        LIMIT ?
+    ''', params + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+
 def get_bookmark(bookmark_id):
     """Retrieve a single bookmark by ID.
 
@@ -147,21 +223,49 @@ def get_bookmark(bookmark_id):
         dict or None: Bookmark dictionary with tags list, or None if not found
     """
     db = get_db()
-    bookmark = db.execute('SELECT * FROM bookmarks WHERE id = ?', (bookmark_id,)).fetchone()
+    bookmark = db.execute(SQL_GET_BOOKMARK, (bookmark_id,)).fetchone()
     if not bookmark:
         return None
 
     bookmark = dict(bookmark)
-    tags = db.execute('''
-        SELECT t.id, t.name FROM tags t
-        JOIN bookmark_tags bt ON t.id = bt.tag_id
-        WHERE bt.bookmark_id = ?
-    ''', (bookmark_id,)).fetchall()
+    tags = db.execute(SQL_GET_BOOKMARK_TAGS, (bookmark_id,)).fetchall()
     bookmark['tags'] = [dict(tag) for tag in tags]
     return bookmark
 
 
-def create_bookmark(url, title, description, folder_id, tag_ids, favicon=None):
+def _insert_tag_links(db, bookmark_id, tag_ids):
+    """Link a bookmark to tags with a single executemany() call.
+
+    Args:
+        db (sqlite3.Connection): Database connection with an open transaction
+        bookmark_id (str): UUID of the bookmark
+        tag_ids (list or None): Tag UUIDs to link; duplicates are inserted once
+    """
+    if tag_ids:
+        db.executemany(SQL_INSERT_BOOKMARK_TAG, [(bookmark_id, tag_id) for tag_id in dict.fromkeys(tag_ids)])
+
+
+def _sync_tag_links(db, bookmark_id, tag_ids):
+    """Change the tags of a bookmark, writing only links that differ.
+
+    Args:
+        db (sqlite3.Connection): Database connection with an open transaction
+        bookmark_id (str): UUID of the bookmark
+        tag_ids (list or None): Complete new list of tag UUIDs
+    """
+    existing = {row['tag_id'] for row in db.execute(SQL_GET_BOOKMARK_TAG_IDS, (bookmark_id,))}
+    new = set(tag_ids or [])
+
+    removed = existing - new
+    if removed:
+        placeholders = ','.join('?' * len(removed))
+        db.execute(f'DELETE FROM bookmark_tags WHERE bookmark_id = ? AND tag_id IN ({placeholders})',
+                   [bookmark_id, *removed])
+
+    _insert_tag_links(db, bookmark_id, [tag_id for tag_id in tag_ids or [] if tag_id not in existing])
+
+
+def create_bookmark(url, title, description, folder_id, tag_ids, favicon=None, bump_version=True):
     """Create a new bookmark.
 
     Args:
@@ -171,25 +275,60 @@ def create_bookmark(url, title, description, folder_id, tag_ids, favicon=None):
         folder_id (str or None): UUID of parent folder, or None for no folder
         tag_ids (list): List of tag UUIDs to associate with bookmark
         favicon (str, optional): Path to cached favicon image
+        bump_version (bool, optional): Bump the data version after the write. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
 
     Returns:
         str: UUID of the newly created bookmark
+
+    Note:
+        Tag associations are inserted with a single executemany() call in the
+        same transaction as the bookmark. Duplicate tag IDs are ignored.
     """
-    db = get_db()
     bookmark_id = str(uuid.uuid4())
-    db.execute(
-        'INSERT INTO bookmarks (id, url, title, description, folder_id, favicon) VALUES (?, ?, ?, ?, ?, ?)',
-        (bookmark_id, url, title, description, folder_id if folder_id else None, favicon)
-    )
+    with transaction() as db:
+        db.execute(
+            SQL_INSERT_BOOKMARK,
+            (bookmark_id, url, title, description, folder_id if folder_id else None, favicon)
+        )
 
-    if tag_ids:
-        for tag_id in tag_ids:
-            db.execute('INSERT INTO bookmark_tags (bookmark_id, tag_id) VALUES (?, ?)', (bookmark_id, tag_id))
+        _insert_tag_links(db, bookmark_id, tag_ids)
 
-    db.commit()
+    if bump_version:
+        bump_data_version()
     return bookmark_id
 
 
+def create_bookmarks_bulk(bookmarks, bump_version=True):
+    """Create several bookmarks with one statement per table and a single commit.
+
+    Args:
+        bookmarks (list): Tuples of (url, title, description, folder_id, tag_ids),
+            folder_id None for no folder
+        bump_version (bool, optional): Bump the data version after the writes. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
+
+    Returns:
+        list: UUIDs of the newly created bookmarks, in the order of bookmarks
+
+    Note:
+        Bookmarks are created without a favicon. Duplicate tag IDs of a
+        bookmark are linked once.
+    """
+    bookmark_ids = [str(uuid.uuid4()) for _ in bookmarks]
+    rows = []
+    tag_links = []
+    for bookmark_id, (url, title, description, folder_id, tag_ids) in zip(bookmark_ids, bookmarks):
+        rows.append((bookmark_id, url, title, description, folder_id if folder_id else None, None))
+        tag_links.extend((bookmark_id, tag_id) for tag_id in dict.fromkeys(tag_ids or []))
+    with transaction() as db:
+        db.executemany(SQL_INSERT_BOOKMARK, rows)
+        db.executemany(SQL_INSERT_BOOKMARK_TAG, tag_links)
+    if bump_version:
+        bump_data_version()
+    return bookmark_ids
+
+
 def update_bookmark(bookmark_id, url, title, description, folder_id, tag_ids, favicon=None):
     """Update an existing bookmark.
 
@@ -203,26 +342,26 @@ def update_bookmark(bookmark_id, url, title, description, folder_id, tag_ids, fa
         folder_id (str or None): New folder UUID, or None for no folder
         tag_ids (list): New list of tag UUIDs (replaces existing tags)
         favicon (str, optional): New favicon path (only updates if provided)
-    """
-    db = get_db()
 
-    if favicon:
-        db.execute(
-            'UPDATE bookmarks SET url = ?, title = ?, description = ?, folder_id = ?, favicon = ? WHERE id = ?',
-            (url, title, description, folder_id if folder_id else None, favicon, bookmark_id)
-        )
-    else:
-        db.execute(
-            'UPDATE bookmarks SET url = ?, title = ?, description = ?, folder_id = ? WHERE id = ?',
-            (url, title, description, folder_id if folder_id else None, bookmark_id)
-        )
+    Note:
+        Only added and removed tag associations are written, unchanged tags
+        cause no writes to bookmark_tags.
+    """
+    with transaction() as db:
+        if favicon:
+            db.execute(
+                SQL_UPDATE_BOOKMARK_WITH_FAVICON,
+                (url, title, description, folder_id if folder_id else None, favicon, bookmark_id)
+            )
+        else:
+            db.execute(
+                SQL_UPDATE_BOOKMARK,
+                (url, title, description, folder_id if folder_id else None, bookmark_id)
+            )
 
-    db.execute('DELETE FROM bookmark_tags WHERE bookmark_id = ?', (bookmark_id,))
-    if tag_ids:
-        for tag_id in tag_ids:
-            db.execute('INSERT INTO bookmark_tags (bookmark_id, tag_id) VALUES (?, ?)', (bookmark_id, tag_id))
+        _sync_tag_links(db, bookmark_id, tag_ids)
 
-    db.commit()
+    bump_data_version()
 
 
 def delete_bookmark(bookmark_id):
@@ -233,10 +372,35 @@ def delete_bookmark(bookmark_id):
     Args:
         bookmark_id (str): UUID of bookmark to delete
     """
+    with transaction() as db:
+        db.execute(SQL_DELETE_BOOKMARK_TAGS, (bookmark_id,))
+        db.execute(SQL_DELETE_BOOKMARK, (bookmark_id,))
+    bump_data_version()
+
+
+def set_favicon(bookmark_id, favicon):
+    """Set the cached favicon path of a bookmark.
+
+    Args:
+        bookmark_id (str): UUID of bookmark to update
+        favicon (str): Path to cached favicon image
+    """
     db = get_db()
-    db.execute('DELETE FROM bookmark_tags WHERE bookmark_id = ?', (bookmark_id,))
-    db.execute('DELETE FROM bookmarks WHERE id = ?', (bookmark_id,))
-    db.commit()
+    db.execute(SQL_SET_FAVICON, (favicon, bookmark_id))
+    bump_data_version()
+
+
+def set_favicons(favicons):
+    """Set the cached favicon paths of many bookmarks in one commit.
+
+    Args:
+        favicons (list): (bookmark_id, favicon) tuples
+    """
+    if not favicons:
+        return
+    with transaction() as db:
+        db.executemany(SQL_SET_FAVICON, [(favicon, bookmark_id) for bookmark_id, favicon in favicons])
+    bump_data_version()
 
 
 def toggle_pin(bookmark_id):
@@ -248,11 +412,12 @@ def toggle_pin(bookmark_id):
     Returns:
         int or None: New pinned value (0 or 1), or None if bookmark not found
     """
-    db = get_db()
-    bookmark = db.execute('SELECT pinned FROM bookmarks WHERE id = ?', (bookmark_id,)).fetchone()
-    if bookmark:
+    # Read and write in one transaction, so concurrent toggles cannot both see the same state
+    with transaction() as db:
+        bookmark = db.execute(SQL_GET_PINNED, (bookmark_id,)).fetchone()
+        if not bookmark:
+            return None
         new_pinned = 0 if bookmark['pinned'] else 1
-        db.execute('UPDATE bookmarks SET pinned = ? WHERE id = ?', (new_pinned, bookmark_id))
-        db.commit()
-        return new_pinned
-    return None
+        db.execute(SQL_SET_PINNED, (new_pinned, bookmark_id))
+    bump_data_version()
+    return new_pinned
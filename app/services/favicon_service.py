@@ -4,13 +4,170 @@ This module handles downloading, processing, and caching of website favicons
 for bookmark visual identification.
 """
 
+import hashlib
 import os
+import shutil
+import threading
+import time
 import requests
-from urllib.parse import urlparse, urljoin
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin
 from flask import current_app
 from io import BytesIO
 from PIL import Image
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+from app.utils.http import create_session, read_html_head
+
+# Parallel downloads for bulk imports
+BULK_DOWNLOAD_WORKERS = 16
+
+# Standard headers, but excluding 'br' (Brotli) to avoid garbled text
+# if the brotli library is not installed/working correctly.
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:144.0) Gecko/20100101 Firefox/144.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.8,de-DE;q=0.5,de;q=0.3',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+}
+
+# File signatures of the image formats accepted as favicons: PNG, GIF, JPEG, ICO, CUR, BMP
+IMAGE_SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a', b'\xff\xd8\xff', b'\x00\x00\x01\x00',
+                    b'\x00\x00\x02\x00', b'BM')
+
+# zlib level for saved favicons (1 = fastest)
+PNG_COMPRESS_LEVEL = 1
+
+# Standard favicon locations, relative to the site root
+STANDARD_FAVICON_PATHS = ('/favicon.ico', '/apple-touch-icon.png', '/favicon.png')
+
+# The page is only read up to its </head>, and never beyond this size
+MAX_HTML_BYTES = 64 * 1024
+
+# Hrefs of all <link> tags with a rel containing 'icon' (e.g., 'icon', 'shortcut icon', 'apple-touch-icon'),
+# compiled once and matched case-insensitively by libxml2's EXSLT regular expressions
+ICON_HREFS = etree.XPath("//link[re:test(@rel, 'icon', 'i')]/@href",
+                         namespaces={'re': 'http://exslt.org/regular-expressions'})
+
+# Shared session, so probes against the same host reuse the TCP/TLS connection
+_session = create_session(HEADERS, max_retries=1)
+
+# Favicon paths already downloaded, by (cache directory, domain)
+DOMAIN_CACHE_SIZE = 4096
+_domain_cache = OrderedDict()
+
+# Saved favicon filenames, by (cache directory, digest of the downloaded bytes)
+CONTENT_CACHE_SIZE = 4096
+_content_cache = OrderedDict()
+
+# Time of the last failed download, by domain, to skip re-probing dead sites
+FAILED_CACHE_SIZE = 4096
+_failed_domains = OrderedDict()
+
+_cache_lock = threading.Lock()
+
+
+def _get_cached_favicon(key):
+    """Look up a previously downloaded favicon whose file still exists.
+
+    Args:
+        key (tuple): Favicon cache directory and domain
+
+    Returns:
+        str or None: Relative path to the cached favicon, or None on a miss
+    """
+    with _cache_lock:
+        path = _domain_cache.get(key)
+        if path is None:
+            return None
+        _domain_cache.move_to_end(key)
+    if not os.path.exists(os.path.join(key[0], os.path.basename(path))):
+        return None
+    return path
+
+
+def _remember_favicon(key, path):
+    """Store a downloaded favicon path, evicting the least recently used entry.
+
+    Args:
+        key (tuple): Favicon cache directory and domain
+        path (str): Relative path to the saved favicon
+    """
+    with _cache_lock:
+        _domain_cache[key] = path
+        _domain_cache.move_to_end(key)
+        if len(_domain_cache) > DOMAIN_CACHE_SIZE:
+            _domain_cache.popitem(last=False)
+
+
+def _recently_failed(domain):
+    """Check whether finding a favicon for a domain failed within FAVICON_NEGATIVE_CACHE_TTL.
+
+    Args:
+        domain (str): Domain name of the URL
+
+    Returns:
+        bool: True if the download should be skipped
+    """
+    ttl = current_app.config.get('FAVICON_NEGATIVE_CACHE_TTL', 0)
+    if ttl <= 0:
+        return False
+    with _cache_lock:
+        failed_at = _failed_domains.get(domain)
+    return failed_at is not None and time.monotonic() - failed_at < ttl
+
+
+def _remember_failure(domain):
+    """Record that no favicon was found for a domain.
+
+    Args:
+        domain (str): Domain name of the URL
+    """
+    with _cache_lock:
+        _failed_domains[domain] = time.monotonic()
+        _failed_domains.move_to_end(domain)
+        if len(_failed_domains) > FAILED_CACHE_SIZE:
+            _failed_domains.popitem(last=False)
+
+
+def _resolve_href(href, page_url, scheme, base_url):
+    """Resolve an icon href against the page it was found on.
+
+    Absolute, protocol-relative, and root-relative hrefs (nearly all icon
+    links) are resolved by concatenation. Only other relative hrefs go
+    through urljoin(), which parses both URLs again.
+
+    Args:
+        href (str): Value of the href attribute
+        page_url (str): URL of the page containing the link
+        scheme (str): Scheme of page_url
+        base_url (str): Scheme and host of page_url (e.g., 'https://example.com')
+
+    Returns:
+        str: Absolute icon URL
+    """
+    if href.startswith('//'):
+        return f"{scheme}:{href}"
+    if href.startswith('/'):
+        return base_url + href
+    if href.startswith(('http://', 'https://')):
+        return href
+    return urljoin(page_url, href)
+
+
+def _is_image(content):
+    """Check the leading bytes of a response body for a supported image format.
+
+    Args:
+        content (bytes): Raw response body
+
+    Returns:
+        bool: True if the body starts with a known image signature (WebP is a RIFF container)
+    """
+    return content.startswith(IMAGE_SIGNATURES) or (content[:4] == b'RIFF' and content[8:12] == b'WEBP')
 
 
 def download_favicon(url):
@@ -20,6 +177,13 @@ def download_favicon(url):
     1. HTML link tags with rel='icon', 'shortcut icon', or 'apple-touch-icon'
     2. Standard locations (/favicon.ico, /apple-touch-icon.png, /favicon.png)
 
+    A domain whose favicon was already downloaded by this process is served
+    from memory without any network request. A domain that answered every
+    probe without a usable icon (e.g., 404s or non-image responses) is not
+    probed again for FAVICON_NEGATIVE_CACHE_TTL seconds. Probes that raised
+    (timeouts, connection errors) are not remembered, so the next download
+    tries again.
+
     Args:
         url (str): The website URL to fetch favicon from
 
@@ -39,102 +203,98 @@ def download_favicon(url):
             logger.error(f"URL missing http/https scheme: {url}")
             return None
 
-        parsed_url = urlparse(url)
+        parsed_url = urlsplit(url)
+        scheme = parsed_url.scheme
         domain = parsed_url.netloc
-        base_url = f"{parsed_url.scheme}://{domain}"
+        base_url = f"{scheme}://{domain}"
         logger.debug(f"Parsed domain: {domain}, base_url: {base_url}")
 
-        # Standard headers, but excluding 'br' (Brotli) to avoid garbled text
-        # if the brotli library is not installed/working correctly.
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:144.0) Gecko/20100101 Firefox/144.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.8,de-DE;q=0.5,de;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-        }
+        cache_key = (current_app.config['FAVICON_CACHE_DIR'], domain)
+        cached = _get_cached_favicon(cache_key)
+        if cached:
+            logger.debug(f"Using already downloaded favicon for {domain}: {cached}")
+            return cached
+
+        if _recently_failed(domain):
+            logger.debug(f"Skipping {domain}: no favicon was found on a recent attempt")
+            return None
+
+        # Set when a request failed (timeout, connection error), so a transient
+        # outage is not remembered as a site without a favicon
+        request_failed = False
 
         # Strategy 1: Parse HTML for link tags
         logger.debug(f"Strategy 1: Fetching HTML from {url}")
         try:
-            response = requests.get(url, timeout=10, headers=headers, allow_redirects=True, verify=True)
-            logger.debug(f"HTML fetch status: {response.status_code}")
-
-            if response.status_code == 200:
-                # Update domain and base_url if we were redirected
-                if response.url != url:
-                    logger.debug(f"Redirected from {url} to {response.url}")
-                    parsed_final_url = urlparse(response.url)
-                    domain = parsed_final_url.netloc
-                    base_url = f"{parsed_final_url.scheme}://{domain}"
-                    url = response.url  # Use final URL for relative path resolution
-
-                content_type = response.headers.get('Content-Type', '').lower()
-                if 'text/html' in content_type:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-
-                    # Find all potential icon links
-                    icon_links = []
-                    for link in soup.find_all('link'):
-                        rel = link.get('rel', [])
-                        if isinstance(rel, str):
-                            rel = [rel.lower()]
-                        else:
-                            rel = [r.lower() for r in rel]
-
-                        # Check if any rel value contains 'icon' (e.g., 'icon', 'shortcut icon', 'apple-touch-icon')
-                        # This handles both cases: rel=['icon'] and rel=['shortcut', 'icon']
-                        if any('icon' in r for r in rel):
-                            href = link.get('href')
-                            if href:
-                                icon_links.append(urljoin(url, href))
-
-                    logger.debug(f"Found {len(icon_links)} icon link(s) in HTML: {icon_links}")
-
-                    for icon_url in icon_links:
-                        try:
-                            logger.debug(f"Trying icon URL: {icon_url}")
-                            icon_response = requests.get(icon_url, timeout=5, headers=headers,
-                                                         allow_redirects=True, verify=True)
-                            ct = icon_response.headers.get('Content-Type')
-                            logger.debug(f"Icon fetch status: {icon_response.status_code}, Content-Type: {ct}")
-
-                            if icon_response.status_code == 200:
-                                ic_type = icon_response.headers.get('Content-Type', '').lower()
-                                if 'image' in ic_type or 'octet-stream' in ic_type:
-                                    res = save_favicon(icon_response.content, domain)
-                                    if res:
-                                        logger.info(f"Successfully downloaded favicon from HTML link for {domain}: {icon_url}")
-                                        return res
+            response = _session.get(url, timeout=10, allow_redirects=True, verify=True, stream=True)
+            try:
+                logger.debug(f"HTML fetch status: {response.status_code}")
+
+                if response.status_code == 200:
+                    # Update domain and base_url if we were redirected
+                    if response.url != url:
+                        logger.debug(f"Redirected from {url} to {response.url}")
+                        parsed_final_url = urlsplit(response.url)
+                        scheme = parsed_final_url.scheme
+                        domain = parsed_final_url.netloc
+                        base_url = f"{scheme}://{domain}"
+                        url = response.url  # Use final URL for relative path resolution
+
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    if 'text/html' in content_type:
+                        content = read_html_head(response, MAX_HTML_BYTES)
+                        # Release the connection before fetching the icons
+                        response.close()
+
+                        doc = lxml_html.fromstring(content)
+                        icon_links = [_resolve_href(href, url, scheme, base_url) for href in ICON_HREFS(doc) if href]
+
+                        logger.debug(f"Found {len(icon_links)} icon link(s) in HTML: {icon_links}")
+
+                        for icon_url in icon_links:
+                            try:
+                                logger.debug(f"Trying icon URL: {icon_url}")
+                                icon_response = _session.get(icon_url, timeout=5, allow_redirects=True, verify=True)
+                                ct = icon_response.headers.get('Content-Type')
+                                logger.debug(f"Icon fetch status: {icon_response.status_code}, Content-Type: {ct}")
+
+                                if icon_response.status_code == 200:
+                                    ic_type = icon_response.headers.get('Content-Type', '').lower()
+                                    if 'image' in ic_type or 'octet-stream' in ic_type:
+                                        res = save_favicon(icon_response.content, domain)
+                                        if res:
+                                            _remember_favicon(cache_key, res)
+                                            logger.info(f"Successfully downloaded favicon from HTML link for {domain}: "
+                                                        f"{icon_url}")
+                                            return res
+                                        else:
+                                            logger.error(f"Failed to save favicon from {icon_url}")
                                     else:
-                                        logger.error(f"Failed to save favicon from {icon_url}")
+                                        logger.warning(f"Skipping {icon_url}: not an image (Content-Type: {ic_type})")
                                 else:
-                                    logger.warning(f"Skipping {icon_url}: not an image (Content-Type: {ic_type})")
-                            else:
-                                logger.error(f"Failed to fetch {icon_url}: HTTP {icon_response.status_code}")
-                        except Exception as e:
-                            logger.error(f"Exception fetching {icon_url}: {e}")
-                            continue
+                                    logger.error(f"Failed to fetch {icon_url}: HTTP {icon_response.status_code}")
+                            except Exception as e:
+                                logger.error(f"Exception fetching {icon_url}: {e}")
+                                request_failed = request_failed or isinstance(e, requests.RequestException)
+                                continue
+                    else:
+                        logger.warning(f"Response is not HTML (Content-Type: {content_type})")
                 else:
-                    logger.warning(f"Response is not HTML (Content-Type: {content_type})")
-            else:
-                logger.error(f"HTML fetch failed with status {response.status_code}")
+                    logger.error(f"HTML fetch failed with status {response.status_code}")
+            finally:
+                response.close()
         except Exception as e:
             logger.error(f"Strategy 1 failed: {e}")
+            request_failed = request_failed or isinstance(e, requests.RequestException)
 
         # Strategy 2: Check standard locations
         logger.debug(f"Strategy 2: Checking standard favicon locations for {domain}")
-        favicon_urls = [
-            f"{base_url}/favicon.ico",
-            f"{base_url}/apple-touch-icon.png",
-            f"{base_url}/favicon.png"
-        ]
+        favicon_urls = [base_url + path for path in STANDARD_FAVICON_PATHS]
 
         for favicon_url in favicon_urls:
             try:
                 logger.debug(f"Trying standard location: {favicon_url}")
-                response = requests.get(favicon_url, timeout=5, headers=headers, allow_redirects=True, verify=True)
+                response = _session.get(favicon_url, timeout=5, allow_redirects=True, verify=True)
                 ct = response.headers.get('Content-Type')
                 logger.debug(f"Standard location fetch status: {response.status_code}, Content-Type: {ct}")
 
@@ -144,6 +304,7 @@ def download_favicon(url):
                     if 'image' in ic_type or 'octet-stream' in ic_type:
                         res = save_favicon(response.content, domain)
                         if res:
+                            _remember_favicon(cache_key, res)
                             logger.info(f"Successfully downloaded favicon from standard location for {domain}: {favicon_url}")
                             return res
                         else:
@@ -154,9 +315,13 @@ def download_favicon(url):
                     logger.debug(f"Standard location {favicon_url} returned HTTP {response.status_code}")
             except Exception as e:
                 logger.error(f"Exception fetching {favicon_url}: {e}")
+                request_failed = request_failed or isinstance(e, requests.RequestException)
                 continue
 
         logger.warning(f"Failed to download favicon for {domain}: no valid favicon found")
+        if not request_failed:
+            # Every page answered, but none had a usable icon
+            _remember_failure(parsed_url.netloc)
         return None
     except Exception as e:
         logger.error(f"Unexpected error downloading favicon for {url}: {e}", exc_info=True)
@@ -174,8 +339,14 @@ def save_favicon(content, domain):
         str or None: Relative path to saved favicon, or None on error
 
     Note:
-        Images are converted to RGBA and thumbnailed to 32x32 pixels.
+        Bodies without a known image signature (e.g., HTML error pages served
+        as image/*, or SVG) are rejected before decoding.
+        Images are converted to RGBA and thumbnailed to 32x32 pixels. The PNG
+        is written with fast zlib settings, a 32x32 icon gains nothing from
+        maximum compression.
         Domain name is sanitized (colons and slashes replaced with underscores).
+        Bytes identical to an icon saved before (shared CDN icons, subdomains)
+        are copied from the existing file without decoding the image again.
     """
     logger = current_app.logger
 
@@ -184,6 +355,27 @@ def save_favicon(content, domain):
             logger.debug(f"Favicon for {domain} rejected: size {len(content)} bytes exceeds 2MB limit")
             return None
 
+        if not _is_image(content):
+            logger.debug(f"Favicon for {domain} rejected: content is not a supported image format")
+            return None
+
+        favicon_dir = current_app.config['FAVICON_CACHE_DIR']
+        os.makedirs(favicon_dir, exist_ok=True)
+
+        filename = f"{domain.replace(':', '_').replace('/', '_')}.png"
+        filepath = os.path.join(favicon_dir, filename)
+
+        content_key = (favicon_dir, hashlib.blake2b(content, digest_size=16).digest())
+        with _cache_lock:
+            existing = _content_cache.get(content_key)
+        if existing:
+            existing_path = os.path.join(favicon_dir, existing)
+            if os.path.exists(existing_path):
+                if existing != filename:
+                    shutil.copyfile(existing_path, filepath)
+                logger.debug(f"Favicon for {domain} has the same content as {existing}, reused")
+                return f"favicons/{filename}"
+
         img = Image.open(BytesIO(content))
         logger.debug(f"Favicon for {domain}: {img.format} image, size {img.width}x{img.height}")
 
@@ -194,15 +386,128 @@ def save_favicon(content, domain):
         img = img.convert('RGBA')
         img.thumbnail((32, 32), Image.Resampling.LANCZOS)
 
-        favicon_dir = current_app.config['FAVICON_CACHE_DIR']
-        os.makedirs(favicon_dir, exist_ok=True)
-
-        filename = f"{domain.replace(':', '_').replace('/', '_')}.png"
-        filepath = os.path.join(favicon_dir, filename)
-
-        img.save(filepath, 'PNG')
+        img.save(filepath, 'PNG', optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+        with _cache_lock:
+            _content_cache[content_key] = filename
+            if len(_content_cache) > CONTENT_CACHE_SIZE:
+                _content_cache.popitem(last=False)
         logger.debug(f"Saved favicon for {domain} to {filepath}")
         return f"favicons/{filename}"
     except Exception as e:
         logger.error(f"Failed to save favicon for {domain}: {e}")
         return None
+
+
+def download_favicons(urls):
+    """Download favicons for many URLs in parallel.
+
+    Each domain is downloaded once, using the first URL seen for it, since
+    favicons are cached per domain anyway.
+
+    Args:
+        urls (iterable of str): Website URLs to fetch favicons for
+
+    Returns:
+        dict: Mapping of URL to relative favicon path, or None if not found
+    """
+    app = current_app._get_current_object()
+    urls = list(urls)
+
+    by_domain = {}
+    for url in urls:
+        by_domain.setdefault(urlsplit(url).netloc, url)
+
+    def run(url):
+        with app.app_context():
+            return download_favicon(url)
+
+    with ThreadPoolExecutor(max_workers=BULK_DOWNLOAD_WORKERS, thread_name_prefix='favicon-bulk') as executor:
+        favicons = dict(zip(by_domain, executor.map(run, by_domain.values())))
+
+    return {url: favicons[urlsplit(url).netloc] for url in urls}
+
+
+def _run_in_background(func, *args):
+    """Run a favicon job on the application's favicon executor.
+
+    Args:
+        func (callable): Job to run inside an application context
+        *args: Arguments passed to func
+
+    Returns:
+        Future or None: Future of the background job, or None when FAVICON_ASYNC
+            is disabled and the job ran synchronously
+    """
+    app = current_app._get_current_object()
+    if not app.config.get('FAVICON_ASYNC', True):
+        func(*args)
+        return None
+
+    def run():
+        with app.app_context():
+            try:
+                func(*args)
+            except Exception:
+                # Nobody waits on the future, log the failure instead of losing it
+                app.logger.exception(f"Background favicon job {func.__name__} failed")
+                raise
+
+    return app.extensions['favicon_executor'].submit(run)
+
+
+def schedule_favicon_download(bookmark_id, url):
+    """Download the favicon for a bookmark and attach it when found.
+
+    With FAVICON_ASYNC enabled the download runs on a background thread, so
+    saving a bookmark does not wait for the remote site. Otherwise the favicon
+    is downloaded and attached before returning.
+
+    Args:
+        bookmark_id (str): UUID of the bookmark to update
+        url (str): The website URL to fetch favicon from
+
+    Returns:
+        Future or None: Future of the background download, or None when run synchronously
+    """
+    return _run_in_background(_attach_favicon, bookmark_id, url)
+
+
+def schedule_favicon_downloads(bookmarks):
+    """Download the favicons for many bookmarks and attach those found.
+
+    Like schedule_favicon_download(), but runs as one job that downloads in
+    parallel with download_favicons() and stores all paths in one commit.
+
+    Args:
+        bookmarks (list): (bookmark_id, url) tuples
+
+    Returns:
+        Future or None: Future of the background job, or None when run synchronously
+    """
+    return _run_in_background(_attach_favicons, list(bookmarks))
+
+
+def _attach_favicon(bookmark_id, url):
+    """Download a favicon and store its path on the bookmark.
+
+    Args:
+        bookmark_id (str): UUID of the bookmark to update
+        url (str): The website URL to fetch favicon from
+    """
+    from app.services import bookmark_service
+
+    favicon = download_favicon(url)
+    if favicon:
+        bookmark_service.set_favicon(bookmark_id, favicon)
+
+
+def _attach_favicons(bookmarks):
+    """Download favicons in parallel and store the paths found.
+
+    Args:
+        bookmarks (list): (bookmark_id, url) tuples
+    """
+    from app.services import bookmark_service
+
+    favicons = download_favicons(url for _, url in bookmarks)
+    bookmark_service.set_favicons([(bookmark_id, favicons[url]) for bookmark_id, url in bookmarks if favicons[url]])
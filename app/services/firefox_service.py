@@ -4,9 +4,16 @@ This module provides functionality for importing and exporting bookmarks
 in Firefox JSON format, enabling easy migration between Firefox and this application.
 """
 
-from app.utils.database import get_db
-from app.services import bookmark_service, folder_service, tag_service
+from app.utils.cache import bump_data_version
+from app.utils.database import get_db, transaction
+from app.services import bookmark_service, favicon_service, folder_service, tag_service
 import json
+import orjson
+import uuid
+from collections import defaultdict
+
+# Size of the byte chunks yielded by iter_firefox_json()
+EXPORT_CHUNK_SIZE = 64 * 1024
 
 
 def export_to_firefox_json():
@@ -26,40 +33,50 @@ def export_to_firefox_json():
     Note:
         Bookmarks without folders are placed in unorganized_bookmarks.
         All data is ordered chronologically by creation date.
+        Three queries load folders, bookmarks, and tags regardless of the
+        folder count; the tree is linked through a dict, without recursion.
     """
     db = get_db()
 
     # Get all folders
-    folders_query = 'SELECT * FROM folders ORDER BY name'
+    folders_query = 'SELECT id, name, parent_id FROM folders ORDER BY name'
     folders = db.execute(folders_query).fetchall()
 
     # Get all bookmarks
     bookmarks_query = '''
-        SELECT b.*, f.name as folder_name,
-               GROUP_CONCAT(t.name, ',') as tag_names
-        FROM bookmarks b
-        LEFT JOIN folders f ON b.folder_id = f.id
-        LEFT JOIN bookmark_tags bt ON b.id = bt.bookmark_id
-        LEFT JOIN tags t ON bt.tag_id = t.id
-        GROUP BY b.id
-        ORDER BY b.created_at DESC
+        SELECT id, url, title, description, folder_id
+        FROM bookmarks
+        ORDER BY created_at DESC
     '''
     bookmarks = db.execute(bookmarks_query).fetchall()
 
+    # Tag names per bookmark, assembled in Python instead of GROUP_CONCAT over a join
+    tags_by_bookmark = defaultdict(list)
+    tag_rows = db.execute('''
+        SELECT bt.bookmark_id, t.name
+        FROM bookmark_tags bt
+        JOIN tags t ON t.id = bt.tag_id
+        ORDER BY t.name
+    ''')
+    for row in tag_rows:
+        tags_by_bookmark[row['bookmark_id']].append(row['name'])
+
     # Build folder hierarchy
     folder_map = {}
     root_children = []
 
     # Create folder nodes
     for folder in folders:
-        folder_node = {
+        folder_map[folder['id']] = {
             'guid': folder['id'],
             'title': folder['name'],
             'type': 'text/x-moz-place-container',
             'children': []
         }
-        folder_map[folder['id']] = folder_node
 
+    # Link folders once all nodes exist, so parents sorting after their children are found
+    for folder in folders:
+        folder_node = folder_map[folder['id']]
         if folder['parent_id']:
             if folder['parent_id'] in folder_map:
                 folder_map[folder['parent_id']]['children'].append(folder_node)
@@ -82,8 +99,9 @@ def export_to_firefox_json():
                 'value': bookmark['description']
             }]
 
-        if bookmark['tag_names']:
-            bookmark_node['tags'] = bookmark['tag_names']
+        tag_names = tags_by_bookmark.get(bookmark['id'])
+        if tag_names:
+            bookmark_node['tags'] = ','.join(tag_names)
 
         if bookmark['folder_id'] and bookmark['folder_id'] in folder_map:
             folder_map[bookmark['folder_id']]['children'].append(bookmark_node)
@@ -108,14 +126,63 @@ def export_to_firefox_json():
     return root
 
 
+def iter_firefox_json(root):
+    """Encode an exported bookmark tree as JSON in chunks.
+
+    Containers are written piece by piece and every bookmark is encoded on
+    its own with orjson, so the complete document is never held in memory as
+    one string.
+
+    Args:
+        root (dict): Structure returned by export_to_firefox_json()
+
+    Yields:
+        bytes: UTF-8 encoded JSON of about EXPORT_CHUNK_SIZE bytes each
+    """
+    def encode(root):
+        # Explicit stack of nodes still to encode and separators still to write,
+        # so deep folder trees neither recurse nor pass chunks up a yield from chain
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, bytes):
+                yield node
+                continue
+            children = node.get('children')
+            if children is None:
+                yield orjson.dumps(node)
+                continue
+
+            head = orjson.dumps({key: value for key, value in node.items() if key != 'children'})
+            yield head[:-1] + (b',"children":[' if len(head) > 2 else b'"children":[')
+            stack.append(b']}')
+            for index in range(len(children) - 1, -1, -1):
+                stack.append(children[index])
+                if index:
+                    stack.append(b',')
+
+    buffer = []
+    size = 0
+    for part in encode(root):
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
 def import_from_firefox_json(json_data):
     """Import bookmarks from Firefox JSON format.
 
-    Recursively processes Firefox bookmark structure and imports:
+    Walks the Firefox bookmark structure once and imports:
     - Folders (excluding special Firefox containers)
     - Bookmarks with URLs, titles, and descriptions
     - Tags (creates new tags as needed)
-    - Favicons (downloads automatically)
+    - Favicons (downloaded in parallel after all bookmarks are created, in
+      the background when FAVICON_ASYNC is enabled)
 
     Args:
         json_data (dict): Parsed Firefox JSON bookmark structure
@@ -128,34 +195,49 @@ def import_from_firefox_json(json_data):
 
     Note:
         Skips special Firefox folders: root, menu, unfiled, mobile, toolbar.
-        Automatically downloads favicons for imported bookmarks.
+        Automatically downloads favicons for imported bookmarks, once per domain.
         Creates new tags if they don't exist in the database.
+        The tree is walked with an explicit stack, so deep nesting cannot hit
+        the recursion limit. Folder UUIDs are generated during the walk, so
+        folders, tags, and bookmarks are then inserted with one executemany()
+        per table, in one transaction that is committed once. If the import
+        fails, nothing is imported. Index statistics are refreshed with
+        ANALYZE afterwards.
     """
-    db = get_db()
-    folder_mapping = {}
-    stats = {'bookmarks': 0, 'folders': 0, 'tags': 0}
+    if not isinstance(json_data, dict):
+        return {'bookmarks': 0, 'folders': 0, 'tags': 0}
 
-    def process_container(node, parent_id=None):
-        """Recursively process Firefox bookmark containers."""
+    db = get_db()
+    # Existing tags by name, and names of tags to create (a dict keeps the first-seen order)
+    tag_cache = {row['name']: row['id'] for row in db.execute('SELECT id, name FROM tags')}
+    new_tags = {}
+    # (name, parent_id) of each folder to create, with the UUIDs assigned to them
+    folders = []
+    folder_ids = []
+    # (url, title, description, folder_id, tag names) of each bookmark to create
+    bookmarks = []
+
+    # Depth-first walk in document order: children are pushed in reverse
+    stack = [(json_data, None)]
+    while stack:
+        node, parent_id = stack.pop()
         if node.get('type') == 'text/x-moz-place-container':
             # Skip special Firefox folders we don't want to import
             guid = node.get('guid', '')
             if guid in ['root________', 'menu________', 'unfiled_____', 'mobile______', 'toolbar_____']:
                 # Process children but don't create folder
-                for child in node.get('children', []):
-                    process_container(child, parent_id)
-                return
+                stack.extend((child, parent_id) for child in reversed(node.get('children', [])))
+                continue
 
             # Create folder
             folder_title = node.get('title', 'Untitled Folder')
             if folder_title:  # Only create if has a title
-                folder_id = folder_service.create_folder(folder_title, parent_id)
-                folder_mapping[node.get('guid')] = folder_id
-                stats['folders'] += 1
+                folder_id = str(uuid.uuid4())
+                folders.append((folder_title, parent_id))
+                folder_ids.append(folder_id)
 
                 # Process children
-                for child in node.get('children', []):
-                    process_container(child, folder_id)
+                stack.extend((child, folder_id) for child in reversed(node.get('children', [])))
 
         elif node.get('type') == 'text/x-moz-place':
             # Import bookmark
@@ -163,7 +245,7 @@ def import_from_firefox_json(json_data):
             title = node.get('title', url)
 
             if not url:
-                return
+                continue
 
             # Get description from annotations
             description = ''
@@ -174,47 +256,64 @@ def import_from_firefox_json(json_data):
                     break
 
             # Handle tags
-            tag_ids = []
+            tag_names = []
             tags_str = node.get('tags', '')
             if tags_str:
-                tag_names = tags_str.split(',') if isinstance(tags_str, str) else tags_str
-                for tag_name in tag_names:
+                for tag_name in tags_str.split(',') if isinstance(tags_str, str) else tags_str:
                     tag_name = tag_name.strip()
                     if tag_name:
-                        # Find or create tag
-                        tag = db.execute('SELECT id FROM tags WHERE name = ?', (tag_name,)).fetchone()
-                        if tag:
-                            tag_ids.append(tag['id'])
-                        else:
-                            tag_id = tag_service.create_tag(tag_name)
-                            tag_ids.append(tag_id)
-                            stats['tags'] += 1
+                        if tag_name not in tag_cache:
+                            new_tags[tag_name] = None
+                        tag_names.append(tag_name)
 
-            # Create bookmark
-            from app.services.favicon_service import download_favicon
-            favicon = download_favicon(url)
-            bookmark_service.create_bookmark(url, title, description, parent_id, tag_ids, favicon)
-            stats['bookmarks'] += 1
+            bookmarks.append((url, title, description, parent_id, tag_names))
 
-    # Start processing from root
-    if isinstance(json_data, dict):
-        process_container(json_data)
+    # All writes in a single transaction
+    with transaction():
+        folder_service.create_folders_bulk(folders, folder_ids, bump_version=False)
+        tag_cache.update(zip(new_tags, tag_service.create_tags_bulk(list(new_tags), bump_version=False)))
+        # Create bookmarks, the favicons are attached afterwards
+        bookmark_ids = bookmark_service.create_bookmarks_bulk([
+            (url, title, description, folder_id, [tag_cache[name] for name in tag_names])
+            for url, title, description, folder_id, tag_names in bookmarks
+        ], bump_version=False)
+    bump_data_version()
+    # Refresh planner statistics after the bulk insert
+    db.execute('ANALYZE')
 
-    return stats
+    # Download favicons concurrently, in the background with FAVICON_ASYNC
+    if bookmark_ids:
+        favicon_service.schedule_favicon_downloads(
+            [(bookmark_id, bookmark[0]) for bookmark_id, bookmark in zip(bookmark_ids, bookmarks)])
+
+    return {'bookmarks': len(bookmarks), 'folders': len(folders), 'tags': len(new_tags)}
 
 
 def parse_firefox_json(file_content):
     """Parse Firefox JSON bookmark file content.
 
     Args:
-        file_content (str): Raw JSON file content as string
+        file_content (str or bytes): Raw JSON file content. Bytes are parsed
+            directly, without an intermediate decoded string copy
 
     Returns:
         dict: Parsed JSON data structure
 
     Raises:
         ValueError: If JSON is malformed or cannot be parsed
+        UnicodeDecodeError: If bytes are not valid UTF-8, UTF-16, or UTF-32
+
+    Note:
+        The whole document is parsed at once; uploads are capped by
+        MAX_CONTENT_LENGTH. orjson parses the common UTF-8 export. Anything
+        it rejects (BOM, UTF-16/32, NaN, huge integers, invalid JSON) is
+        parsed again with json, which keeps its encoding detection and
+        error messages.
     """
+    try:
+        return orjson.loads(file_content)
+    except orjson.JSONDecodeError:
+        pass
     try:
         data = json.loads(file_content)
         return data
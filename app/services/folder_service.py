@@ -4,45 +4,66 @@ This module provides business logic for folder operations including
 hierarchical folder management, retrieval, and manipulation.
 """
 
-from app.utils.database import get_db
+from app.utils.database import get_db, transaction
+from app.utils.cache import bump_data_version, cached_by_version
+from functools import lru_cache
 import uuid
 import re
 
-
+# Folders with their counts. Bookmarks and subfolders are each counted in one
+# grouped pass over their index and joined, instead of a correlated subquery
+# per folder or a fanned-out double join.
+SQL_FOLDERS_WITH_COUNTS = '''
+    SELECT f.*,
+           COALESCE(b.bookmark_count, 0) as bookmark_count,
+           COALESCE(c.subfolder_count, 0) as subfolder_count
+    FROM folders f
+    LEFT JOIN (
+        SELECT folder_id, COUNT(*) as bookmark_count FROM bookmarks
+        WHERE folder_id IS NOT NULL GROUP BY folder_id
+    ) b ON b.folder_id = f.id
+    LEFT JOIN (
+        SELECT parent_id, COUNT(*) as subfolder_count FROM folders
+        WHERE parent_id IS NOT NULL GROUP BY parent_id
+    ) c ON c.parent_id = f.id
+'''
+
+# Everything except ASCII letters and digits, removed from folder names for sorting
+SORT_STRIP_RE = re.compile(r'[^a-zA-Z0-9]')
+
+
+@lru_cache(maxsize=4096)
 def _strip_emoji_for_sort(text):
     """Remove all non-alphanumeric characters for sorting purposes.
 
+    Results are memoized, since the same folder names are sorted on every
+    hierarchy rebuild.
+
     Args:
         text (str): Text that may contain emoji, symbols, or punctuation
 
     Returns:
-        str: Text with only letters and numbers remaining
+        str: Lowercase text with only letters and numbers remaining
     """
-    return re.sub(r'[^a-zA-Z0-9]', '', text)
+    return SORT_STRIP_RE.sub('', text).lower()
 
 
 def get_all_folders():
     """Retrieve all folders with bookmark and subfolder counts.
 
     Returns:
-        list: List of folder dictionaries with:
-            - id, name, parent_id, created_at
+        list: List of read-only folder rows (sqlite3.Row, accessed by key) with:
+            - id, name, parent_id, created_at, updated_at
             - bookmark_count: Number of bookmarks directly in folder
             - subfolder_count: Number of immediate child folders
 
     Note:
         Results are ordered by parent_id and name for consistent display.
+        Rows are returned without copying them into dicts; use dict(row)
+        for a mutable copy.
     """
     db = get_db()
-    folders = db.execute('''
-        SELECT f.*, COUNT(DISTINCT b.id) as bookmark_count,
-               (SELECT COUNT(*) FROM folders WHERE parent_id = f.id) as subfolder_count
-        FROM folders f
-        LEFT JOIN bookmarks b ON f.id = b.folder_id
-        GROUP BY f.id
-        ORDER BY f.parent_id, f.name
-    ''').fetchall()
-    return [dict(folder) for folder in folders]
+    return db.execute(SQL_FOLDERS_WITH_COUNTS + ' ORDER BY f.parent_id, f.name').fetchall()
 
 
 def get_folder_hierarchy():
@@ -59,36 +80,36 @@ def get_folder_hierarchy():
         Only root folders (parent_id is None) are at the top level.
         All descendant folders are nested in the 'children' property.
         Folders are sorted alphabetically by name, ignoring leading emoji.
+        The tree is cached until the next bookmark, folder, or tag write.
+    """
+    return cached_by_version('folder_hierarchy', _load_folder_hierarchy)
+
+
+def _load_folder_hierarchy():
+    """Query all folders and build the hierarchical tree.
+
+    Returns:
+        list: List of root folder dictionaries with nested children
     """
     db = get_db()
-    folders = db.execute('''
-        SELECT f.*, COUNT(DISTINCT b.id) as bookmark_count,
-               (SELECT COUNT(*) FROM folders WHERE parent_id = f.id) as subfolder_count
-        FROM folders f
-        LEFT JOIN bookmarks b ON f.id = b.folder_id
-        GROUP BY f.id
-    ''').fetchall()
+    folders = db.execute(SQL_FOLDERS_WITH_COUNTS).fetchall()
 
     folder_dict = {f['id']: dict(f) for f in folders}
     for folder in folder_dict.values():
         folder['children'] = []
 
+    # Sort all folders once by name (ignoring emoji); appending them in this
+    # order leaves every children list already sorted
+    ordered = sorted(folder_dict.values(), key=lambda f: _strip_emoji_for_sort(f['name']))
+
     root_folders = []
-    for folder in folder_dict.values():
+    for folder in ordered:
         if folder['parent_id'] is None:
             root_folders.append(folder)
         else:
             if folder['parent_id'] in folder_dict:
                 folder_dict[folder['parent_id']]['children'].append(folder)
 
-    def sort_folders_recursive(folder_list):
-        """Sort folders by name (ignoring emoji) and recursively sort children."""
-        folder_list.sort(key=lambda f: _strip_emoji_for_sort(f['name']).lower())
-        for folder in folder_list:
-            if folder['children']:
-                sort_folders_recursive(folder['children'])
-
-    sort_folders_recursive(root_folders)
     return root_folders
 
 
@@ -108,48 +129,74 @@ def get_folder(folder_id):
         return None
     folder_dict = dict(folder)
 
-    parent_chain = []
-    current_parent_id = folder_dict['parent_id']
-    while current_parent_id:
-        parent = db.execute('SELECT * FROM folders WHERE id = ?', (current_parent_id,)).fetchone()
-        if parent:
-            parent_chain.insert(0, dict(parent))
-            current_parent_id = parent['parent_id']
-        else:
-            break
-    folder_dict['parent_chain'] = parent_chain
+    # All ancestors in one query, farthest (root) first
+    parents = db.execute('''
+        SELECT f.* FROM folder_closure c
+        JOIN folders f ON f.id = c.ancestor
+        WHERE c.descendant = ? AND c.depth > 0
+        ORDER BY c.depth DESC
+    ''', (folder_id,)).fetchall()
+    folder_dict['parent_chain'] = [dict(parent) for parent in parents]
     return folder_dict
 
 
+def find_folder_in_hierarchy(folders, folder_id):
+    """Find a folder and its parent chain in an already loaded folder tree.
+
+    Args:
+        folders (list): Root folders as returned by get_folder_hierarchy()
+        folder_id (str): UUID of the folder
+
+    Returns:
+        dict or None: Folder dictionary shaped like get_folder() (without
+            'children', with 'parent_chain' from root to immediate parent),
+            or None if the folder is not part of the tree
+
+    Note:
+        Folders whose parent no longer exists are not part of the tree;
+        callers can fall back to get_folder() for those.
+    """
+    def without_children(folder):
+        return {key: value for key, value in folder.items() if key != 'children'}
+
+    stack = [(folder, []) for folder in folders]
+    while stack:
+        folder, chain = stack.pop()
+        if folder['id'] == folder_id:
+            found = without_children(folder)
+            found['parent_chain'] = [without_children(parent) for parent in chain]
+            return found
+        stack.extend((child, chain + [folder]) for child in folder['children'])
+    return None
+
+
 def get_folder_with_descendants(folder_id):
     """Get a folder and all its descendant folder IDs.
 
-    Recursively collects all subfolder IDs including the specified folder.
+    Reads all subfolder IDs from the folder_closure table with one query.
 
     Args:
         folder_id (str): UUID of the root folder
 
     Returns:
-        list: List of folder UUIDs including folder_id and all descendants
+        list: List of folder UUIDs including folder_id and all descendants, nearest first
     """
     db = get_db()
+    rows = db.execute(
+        'SELECT descendant FROM folder_closure WHERE ancestor = ? AND depth > 0 ORDER BY depth',
+        (folder_id,)
+    ).fetchall()
+    return [folder_id] + [row['descendant'] for row in rows]
 
-    def get_descendants(parent_id):
-        children = db.execute('SELECT id FROM folders WHERE parent_id = ?', (parent_id,)).fetchall()
-        ids = [parent_id]
-        for child in children:
-            ids.extend(get_descendants(child['id']))
-        return ids
-
-    return get_descendants(folder_id)
 
-
-def create_folder(name, parent_id=None):
+def create_folder(name, parent_id=None, bump_version=True):
     """Create a new folder.
 
     Args:
         name (str): Folder name
         parent_id (str, optional): UUID of parent folder, or None for root folder
+        bump_version (bool, optional): Bump the data version after the write. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
 
     Returns:
         str: UUID of the newly created folder
@@ -157,10 +204,39 @@ def create_folder(name, parent_id=None):
     db = get_db()
     folder_id = str(uuid.uuid4())
     db.execute('INSERT INTO folders (id, name, parent_id) VALUES (?, ?, ?)', (folder_id, name, parent_id))
-    db.commit()
+    if bump_version:
+        bump_data_version()
     return folder_id
 
 
+def create_folders_bulk(folders, folder_ids=None, bump_version=True):
+    """Create several folders with one statement and a single commit.
+
+    Args:
+        folders (list): Tuples of (name, parent_id), parent_id None for root folders
+        folder_ids (list, optional): UUIDs for the new folders, in the order of
+            folders, so folders in the same call can be each other's parent_id.
+            Generated if not given
+        bump_version (bool, optional): Bump the data version after the writes. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
+
+    Returns:
+        list: UUIDs of the newly created folders, in the order of folders
+
+    Note:
+        A parent must exist or come earlier in folders, so the closure table
+        triggers can link the new folder to its ancestors.
+    """
+    if folder_ids is None:
+        folder_ids = [str(uuid.uuid4()) for _ in folders]
+    rows = [(folder_id, name, parent_id) for folder_id, (name, parent_id) in zip(folder_ids, folders)]
+    with transaction() as db:
+        db.executemany('INSERT INTO folders (id, name, parent_id) VALUES (?, ?, ?)', rows)
+    if bump_version:
+        bump_data_version()
+    return [row[0] for row in rows]
+
+
 def update_folder(folder_id, name, parent_id=None):
     """Update an existing folder.
 
@@ -172,15 +248,19 @@ def update_folder(folder_id, name, parent_id=None):
     Raises:
         ValueError: If attempting to move folder into its own subfolder
     """
-    db = get_db()
+    # The check and the move in one transaction, so no concurrent move can create a cycle in between
+    with transaction() as db:
+        if parent_id:
+            # One indexed probe instead of collecting the whole subtree
+            is_own_subfolder = db.execute(
+                'SELECT 1 FROM folder_closure WHERE ancestor = ? AND descendant = ?', (folder_id, parent_id)
+            ).fetchone()
+            if is_own_subfolder:
+                raise ValueError("Cannot move folder into its own subfolder!")
 
-    if parent_id:
-        descendants = get_folder_with_descendants(folder_id)
-        if parent_id in descendants:
-            raise ValueError("Cannot move folder into its own subfolder!")
-
-    db.execute('UPDATE folders SET name = ?, parent_id = ? WHERE id = ?', (name, parent_id, folder_id))
-    db.commit()
+        db.execute('UPDATE folders SET name = ?, parent_id = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                   (name, parent_id, folder_id))
+    bump_data_version()
 
 
 def delete_folder(folder_id):
@@ -191,7 +271,7 @@ def delete_folder(folder_id):
     Args:
         folder_id (str): UUID of folder to delete
     """
-    db = get_db()
-    db.execute('UPDATE bookmarks SET folder_id = NULL WHERE folder_id = ?', (folder_id,))
-    db.execute('DELETE FROM folders WHERE id = ?', (folder_id,))
-    db.commit()
+    with transaction() as db:
+        db.execute('UPDATE bookmarks SET folder_id = NULL WHERE folder_id = ?', (folder_id,))
+        db.execute('DELETE FROM folders WHERE id = ?', (folder_id,))
+    bump_data_version()
@@ -4,8 +4,37 @@ This module provides functionality for fetching webpage metadata including
 titles and other OpenGraph/meta tag information from URLs.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import codecs
+import html
+import re
+from lxml import etree
+from lxml import html as lxml_html
+from app.utils.http import create_session, read_html_head
+
+HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+}
+
+# The page is only read up to its </head>, and never beyond this size
+MAX_HTML_BYTES = 256 * 1024
+
+# Sources of the page title in order of preference
+TITLE_SOURCES = ('og:title', 'twitter:title', 'title')
+
+# All elements that can carry the title, compiled once and found in a single pass over the document
+TITLE_CANDIDATES = etree.XPath("//meta[@property='og:title' or @name='twitter:title'] | //title")
+
+# Byte-level patterns for the common markup of og:title and <title>, tried before parsing the page
+OG_TITLE_RE = re.compile(rb'''<meta\s[^>]*?property=["']og:title["'][^>]*?\scontent=(?:"([^"]*)"|'([^']*)')''',
+                         re.IGNORECASE)
+TITLE_TAG_RE = re.compile(rb'<title[^>]*>([^<]{1,512})</title>', re.IGNORECASE)
+
+# Charset parameter of the Content-Type header
+CHARSET_RE = re.compile(r'''charset=["']?([\w.:-]+)''')
+
+# Shared session, so fetches from the same host reuse the TCP/TLS connection
+_session = create_session(HEADERS)
 
 
 def fetch_page_metadata(url):
@@ -27,19 +56,28 @@ def fetch_page_metadata(url):
 
     Note:
         Follows redirects and uses a browser-like User-Agent.
-        Has a 10 second timeout.
+        Has a 10 second timeout. Only the page head, and never more than
+        MAX_HTML_BYTES, is downloaded and parsed. Responses with a non-HTML
+        Content-Type succeed without a title and without reading the body.
     """
     try:
-        headers = {
-            'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                           '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        }
-        response = requests.get(url, timeout=10, headers=headers, allow_redirects=True)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        title = extract_title(soup)
+        response = _session.get(url, timeout=10, allow_redirects=True, stream=True)
+        try:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').lower()
+            # Documents, images, or media have no title to extract, so their body is never downloaded
+            if content_type and 'html' not in content_type:
+                return {
+                    'title': None,
+                    'success': True
+                }
+            content = read_html_head(response, MAX_HTML_BYTES)
+        finally:
+            response.close()
+
+        title = extract_title_fast(content)
+        if title is None and content.strip():
+            title = extract_title_from_bytes(content, header_encoding(content_type))
 
         return {
             'title': title,
@@ -53,7 +91,73 @@ def fetch_page_metadata(url):
         }
 
 
-def extract_title(soup):
+def extract_title_fast(content):
+    """Extract the page title from raw HTML without parsing it.
+
+    Matches og:title, or <title> on pages without og:title and twitter:title
+    meta tags. Other markup is left to extract_title(), so the preference
+    order stays the same.
+
+    Args:
+        content (bytes): Start of the HTML document
+
+    Returns:
+        str or None: Extracted and trimmed title, or None if the page needs a full parse
+    """
+    try:
+        og_title = OG_TITLE_RE.search(content)
+        if og_title:
+            title = (og_title.group(1) or og_title.group(2) or b'').decode('utf-8')
+        elif b'og:title' in content or b'twitter:title' in content:
+            return None
+        else:
+            title_tag = TITLE_TAG_RE.search(content)
+            title = title_tag.group(1).decode('utf-8') if title_tag else ''
+    except UnicodeDecodeError:
+        # Other encodings are detected by the HTML parser
+        return None
+    title = html.unescape(title).strip()
+    return title or None
+
+
+def header_encoding(content_type):
+    """Get the character encoding declared in a Content-Type header.
+
+    Args:
+        content_type (str): Value of the Content-Type header
+
+    Returns:
+        str or None: Encoding name, or None if the header declares no known charset
+    """
+    charset = CHARSET_RE.search(content_type)
+    if not charset:
+        return None
+    try:
+        return codecs.lookup(charset.group(1)).name
+    except LookupError:
+        return None
+
+
+def extract_title_from_bytes(content, encoding=None):
+    """Parse raw HTML and extract the page title.
+
+    Args:
+        content (bytes): Start of the HTML document
+        encoding (str, optional): Encoding from the HTTP headers. Without it the
+            parser uses the <meta charset> of the page, or Latin-1
+
+    Returns:
+        str or None: Extracted and trimmed title, or None if no title found
+    """
+    try:
+        document = lxml_html.fromstring(content, parser=lxml_html.HTMLParser(encoding=encoding))
+    except etree.ParserError:
+        # A body without any elements, e.g. only a doctype or a comment
+        return None
+    return extract_title(document)
+
+
+def extract_title(document):
     """Extract page title from parsed HTML.
 
     Tries multiple sources in order of preference:
@@ -62,25 +166,22 @@ def extract_title(soup):
     3. <title> tag
 
     Args:
-        soup (BeautifulSoup): Parsed HTML document
+        document (lxml.html.HtmlElement): Parsed HTML document
 
     Returns:
         str or None: Extracted and trimmed title, or None if no title found
     """
-    title = None
-
-    og_title = soup.find('meta', property='og:title')
-    if og_title and og_title.get('content'):
-        title = og_title['content']
-
-    if not title:
-        twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
-        if twitter_title and twitter_title.get('content'):
-            title = twitter_title['content']
-
-    if not title:
-        title_tag = soup.find('title')
-        if title_tag:
-            title = title_tag.string
-
-    return title.strip() if title else None
+    titles = {}
+    for element in TITLE_CANDIDATES(document):
+        if element.tag == 'title':
+            source, title = 'title', element.text
+        else:
+            source = 'og:title' if element.get('property') == 'og:title' else 'twitter:title'
+            title = element.get('content')
+        if title and source not in titles:
+            titles[source] = title
+
+    for source in TITLE_SOURCES:
+        if source in titles:
+            return titles[source].strip()
+    return None
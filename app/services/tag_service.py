@@ -4,7 +4,8 @@ This module provides business logic for tag operations including
 creation, retrieval, updating, and deletion of bookmark tags.
 """
 
-from app.utils.database import get_db
+from app.utils.database import get_db, transaction
+from app.utils.cache import bump_data_version, cached_by_version
 import uuid
 
 
@@ -18,6 +19,16 @@ def get_all_tags():
 
     Note:
         Results are ordered by tag name alphabetically.
+        Results are cached until the next bookmark, folder, or tag write.
+    """
+    return cached_by_version('tags', _load_all_tags)
+
+
+def _load_all_tags():
+    """Query all tags with bookmark counts.
+
+    Returns:
+        list: List of tag dictionaries ordered by name
     """
     db = get_db()
     tags = db.execute('''
@@ -44,11 +55,13 @@ def get_tag(tag_id):
     return dict(tag) if tag else None
 
 
-def create_tag(name):
+def create_tag(name, bump_version=True):
     """Create a new tag.
 
     Args:
         name (str): Tag name (must be unique)
+        bump_version (bool, optional): Bump the data version after the write. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
 
     Returns:
         str: UUID of the newly created tag
@@ -56,10 +69,30 @@ def create_tag(name):
     db = get_db()
     tag_id = str(uuid.uuid4())
     db.execute('INSERT INTO tags (id, name) VALUES (?, ?)', (tag_id, name))
-    db.commit()
+    if bump_version:
+        bump_data_version()
     return tag_id
 
 
+def create_tags_bulk(names, bump_version=True):
+    """Create several tags with one statement and a single commit.
+
+    Args:
+        names (list): Tag names (each must be unique)
+        bump_version (bool, optional): Bump the data version after the writes. Pass
+            False inside a transaction() block whose caller bumps it once afterwards
+
+    Returns:
+        list: UUIDs of the newly created tags, in the order of names
+    """
+    rows = [(str(uuid.uuid4()), name) for name in names]
+    with transaction() as db:
+        db.executemany('INSERT INTO tags (id, name) VALUES (?, ?)', rows)
+    if bump_version:
+        bump_data_version()
+    return [row[0] for row in rows]
+
+
 def update_tag(tag_id, name):
     """Update an existing tag.
 
@@ -68,8 +101,8 @@ def update_tag(tag_id, name):
         name (str): New tag name (must be unique)
     """
     db = get_db()
-    db.execute('UPDATE tags SET name = ? WHERE id = ?', (name, tag_id))
-    db.commit()
+    db.execute('UPDATE tags SET name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (name, tag_id))
+    bump_data_version()
 
 
 def delete_tag(tag_id):
@@ -80,7 +113,7 @@ def delete_tag(tag_id):
     Args:
         tag_id (str): UUID of tag to delete
     """
-    db = get_db()
-    db.execute('DELETE FROM bookmark_tags WHERE tag_id = ?', (tag_id,))
-    db.execute('DELETE FROM tags WHERE id = ?', (tag_id,))
-    db.commit()
+    with transaction() as db:
+        db.execute('DELETE FROM bookmark_tags WHERE tag_id = ?', (tag_id,))
+        db.execute('DELETE FROM tags WHERE id = ?', (tag_id,))
+    bump_data_version()
@@ -9,6 +9,18 @@ from flask import request, Response, current_app
 import secrets
 
 
+def init_auth(app):
+    """Encode the configured credentials once for an application.
+
+    Args:
+        app (Flask): Flask application instance
+    """
+    app.extensions['http_auth_credentials'] = (
+        app.config['HTTP_AUTH_USERNAME'].encode('utf-8'),
+        app.config['HTTP_AUTH_PASSWORD'].encode('utf-8')
+    )
+
+
 def check_auth(username, password):
     """Verify username and password against configured credentials.
 
@@ -20,13 +32,13 @@ def check_auth(username, password):
         bool: True if credentials match configuration, False otherwise
 
     Note:
-        Uses constant-time comparison to prevent timing attacks.
+        Uses constant-time comparison to prevent timing attacks. The expected
+        credentials are encoded once by init_auth().
     """
-    expected_username = current_app.config['HTTP_AUTH_USERNAME']
-    expected_password = current_app.config['HTTP_AUTH_PASSWORD']
+    expected_username, expected_password = current_app.extensions['http_auth_credentials']
 
-    username_match = secrets.compare_digest(username.encode('utf-8'), expected_username.encode('utf-8'))
-    password_match = secrets.compare_digest(password.encode('utf-8'), expected_password.encode('utf-8'))
+    username_match = secrets.compare_digest(username.encode('utf-8'), expected_username)
+    password_match = secrets.compare_digest(password.encode('utf-8'), expected_password)
 
     return username_match and password_match
 
@@ -62,7 +74,10 @@ def requires_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         auth = request.authorization
-        if not auth or not check_auth(auth.username, auth.password):
+        # Missing or non-Basic credentials (e.g., a Bearer token) never reach the comparison
+        if auth is None or auth.type != 'basic' or auth.username is None or auth.password is None:
+            return authenticate()
+        if not check_auth(auth.username, auth.password):
             return authenticate()
         return f(*args, **kwargs)
     return decorated
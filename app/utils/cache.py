@@ -0,0 +1,95 @@
+"""Cache utility module.
+
+This module provides the shared Flask-Caching instance and a data version
+counter that is bumped on every write, so cached fragments and values keyed
+by the version are invalidated as soon as bookmarks, folders, or tags change.
+"""
+
+import hashlib
+import threading
+import uuid
+from flask import current_app, request
+from flask_caching import Cache
+
+cache = Cache()
+
+_version_lock = threading.Lock()
+
+
+def init_cache(app):
+    """Initialize the cache and data version for an application.
+
+    Args:
+        app (Flask): Flask application instance
+    """
+    cache.init_app(app)
+    app.extensions['data_version'] = 0
+    # Distinguishes versions of this process from those before a restart
+    app.extensions['data_version_boot_id'] = uuid.uuid4().hex
+
+
+def get_data_version():
+    """Get the current data version of the application.
+
+    Returns:
+        int: Version number, incremented on every write
+    """
+    return current_app.extensions.get('data_version', 0)
+
+
+def bump_data_version():
+    """Increment the data version after a write.
+
+    Note:
+        The version is kept in process memory, matching the per-process
+        SimpleCache backend and the single worker of the default deployment.
+    """
+    with _version_lock:
+        current_app.extensions['data_version'] = get_data_version() + 1
+
+
+def cached_by_version(name, loader):
+    """Return a cached value for the current data version, loading it on a miss.
+
+    Args:
+        name (str): Cache key prefix identifying the value
+        loader (callable): Function without arguments that builds the value
+
+    Returns:
+        The cached or freshly loaded value
+    """
+    key = f'{name}_{get_data_version()}'
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value)
+    return value
+
+
+def sidebar_cache_key(*parts):
+    """Build the fragment cache key for the index sidebar.
+
+    Args:
+        *parts: Request values that change the rendered sidebar
+            (active folder or tag, sort field and order)
+
+    Returns:
+        str: Cache key including the current data version and the root URL
+            of the request, since the bookmarklet links to the external URL
+            (scheme, host, and script root) the app was reached under
+    """
+    return '_'.join([str(get_data_version()), request.root_url] + [str(part or '') for part in parts])
+
+
+def page_etag(*parts):
+    """Build an ETag for a rendered page.
+
+    Args:
+        *parts: Request values that identify the page (e.g., full path with query string)
+
+    Returns:
+        str: Short hex digest that changes with every write and on restart
+    """
+    key = '_'.join([current_app.extensions['data_version_boot_id'], str(get_data_version())]
+                   + [str(part) for part in parts])
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
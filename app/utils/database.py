@@ -4,45 +4,181 @@ This module provides database connection management, initialization, and
 teardown functions for the SQLite database used by the bookmarks application.
 """
 
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from flask import current_app, g
 
+# Prepared statements kept per connection (the sqlite3 default is 128)
+CACHED_STATEMENTS = 256
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORES = ('DEFAULT', 'FILE', 'MEMORY')
+
+# Stored in PRAGMA user_version once init_db() has created the schema.
+# Increment with every change to the schema in init_db().
+SCHEMA_VERSION = 2
+
+# Idle connections per (process id, database path), reused by later requests
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pragma_value(name, allowed):
+    """Read a PRAGMA value from the configuration and validate it.
+
+    Args:
+        name (str): Configuration key
+        allowed (tuple): Accepted upper-case values
+
+    Returns:
+        str: Validated value in upper case
+
+    Raises:
+        ValueError: If the configured value is not in allowed
+    """
+    value = str(current_app.config[name]).upper()
+    if value not in allowed:
+        raise ValueError(f"Invalid {name}: {value} (expected one of {', '.join(allowed)})")
+    return value
+
+
+def _connect():
+    """Open a database connection with the configured PRAGMA settings.
+
+    Returns:
+        sqlite3.Connection: Database connection with Row factory
+    """
+    db_path = current_app.config['DATABASE_PATH']
+    check_same_thread = db_path == ':memory:' or current_app.config.get('TESTING', False)
+    # Autocommit mode: single statements commit on their own, write batches use transaction()
+    db = sqlite3.connect(
+        db_path,
+        check_same_thread=check_same_thread,
+        cached_statements=CACHED_STATEMENTS,
+        isolation_level=None
+    )
+    db.row_factory = sqlite3.Row
+    db.execute(f"PRAGMA synchronous = {_pragma_value('SQLITE_SYNCHRONOUS', SYNCHRONOUS_LEVELS)}")
+    db.execute(f"PRAGMA temp_store = {_pragma_value('SQLITE_TEMP_STORE', TEMP_STORES)}")
+    db.execute(f"PRAGMA cache_size = {int(current_app.config['SQLITE_CACHE_SIZE'])}")
+    db.execute(f"PRAGMA mmap_size = {int(current_app.config['SQLITE_MMAP_SIZE'])}")
+    return db
+
+
+def _get_pool():
+    """Get the pool of idle connections for the configured database.
+
+    Returns:
+        queue.LifoQueue or None: Pool for the database file, or None if
+        connections are not pooled (in-memory database, testing, or a
+        DATABASE_POOL_SIZE of 0)
+    """
+    db_path = current_app.config['DATABASE_PATH']
+    size = int(current_app.config['DATABASE_POOL_SIZE'])
+    if db_path == ':memory:' or current_app.config.get('TESTING', False) or size <= 0:
+        return None
+    # Keyed by process id so forked workers never share a connection of the parent
+    key = (os.getpid(), db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = queue.LifoQueue(maxsize=size)
+    return pool
+
 
 def get_db():
     """Get the database connection for the current application context.
 
-    Creates a new database connection if one doesn't exist in the application
-    context. The connection uses Row factory for dict-like access to results.
+    Leases an idle connection from the pool, or opens a new one if the pool
+    is empty. New connections use Row factory for dict-like access to results
+    and the configured SQLITE_SYNCHRONOUS, SQLITE_TEMP_STORE, SQLITE_CACHE_SIZE,
+    and SQLITE_MMAP_SIZE settings.
 
     Returns:
         sqlite3.Connection: Database connection with Row factory
 
     Note:
         Connection is stored in Flask's g object and reused within the same request.
+        Pooled connections keep their PRAGMA settings and prepared statements
+        across requests.
+        Foreign key enforcement stays off: deleting a folder keeps its subfolders
+        and clears the folder of its bookmarks in code, where ON DELETE CASCADE
+        would delete the whole subtree.
     """
     if 'db' not in g:
-        db_path = current_app.config['DATABASE_PATH']
-        check_same_thread = db_path == ':memory:' or current_app.config.get('TESTING', False)
-        g.db = sqlite3.connect(
-            db_path,
-            check_same_thread=check_same_thread
-        )
-        g.db.row_factory = sqlite3.Row
+        pool = _get_pool()
+        db = None
+        if pool is not None:
+            try:
+                db = pool.get_nowait()
+            except queue.Empty:
+                pass
+        g.db = db if db is not None else _connect()
+        g.db_pool = pool
     return g.db
 
 
+@contextmanager
+def transaction():
+    """Run the enclosed statements in one write transaction.
+
+    Opens the transaction with BEGIN IMMEDIATE, so the write lock is taken
+    up front instead of on the first write. Commits when the block
+    completes and rolls back if it raises.
+
+    Yields:
+        sqlite3.Connection: Database connection of the current application context
+
+    Note:
+        Inside another transaction() block, or any other open transaction,
+        the statements join it and are committed together with it.
+
+    Example:
+        >>> with transaction() as db:
+        ...     db.execute('DELETE FROM bookmark_tags WHERE tag_id = ?', (tag_id,))
+        ...     db.execute('DELETE FROM tags WHERE id = ?', (tag_id,))
+    """
+    db = get_db()
+    if db.in_transaction:
+        yield db
+        return
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
 def close_db(e=None):
-    """Close the database connection for the current application context.
+    """Release the database connection for the current application context.
 
     This function is called automatically at the end of each request via
-    Flask's teardown_appcontext handler.
+    Flask's teardown_appcontext handler. Pooled connections are rolled back
+    to a clean state and returned to the pool; the connection is closed if
+    it is not pooled or the pool is full.
 
     Args:
         e: Optional exception that triggered the teardown (unused)
     """
     db = g.pop('db', None)
-    if db is not None:
-        db.close()
+    pool = g.pop('db_pool', None)
+    if db is None:
+        return
+    if pool is not None:
+        try:
+            if db.in_transaction:
+                db.rollback()
+            pool.put_nowait(db)
+            return
+        except (sqlite3.Error, queue.Full):
+            pass
+    db.close()
 
 
 def init_db():
@@ -53,27 +189,50 @@ def init_db():
     - tags: Tag definitions
     - bookmarks: Bookmark entries with URLs, titles, and metadata
     - bookmark_tags: Many-to-many relationship between bookmarks and tags
-    - triggers: Automatic update of created_at timestamps on record modification
+    - folder_closure: Every (ancestor, descendant) pair of the folder tree with
+      its depth, including each folder paired with itself, kept in sync by triggers
+    - bookmarks_fts: FTS5 full-text index over bookmark title, URL, and description,
+      kept in sync by triggers
+    - updated_at: Time of the last edit of a folder, tag, or bookmark (NULL if never
+      edited), set by the UPDATE statements; added to databases created without it
 
     All tables use UUID strings as primary keys for portability.
 
+    The configured SQLITE_JOURNAL_MODE is stored in the database file. WAL
+    (default) lets page reads run while a bookmark is written and avoids a
+    full fsync per commit. Use DELETE on file systems without shared memory
+    support for the -shm file (e.g., network or FUSE mounts).
+
     Note:
-        This function is idempotent and safe to call multiple times.
+        This function is idempotent and safe to call multiple times. Once a
+        database's user_version has reached SCHEMA_VERSION, only the journal
+        mode is applied and the schema script is skipped.
     """
     db = get_db()
+    if current_app.config['DATABASE_PATH'] != ':memory:':
+        db.execute(f"PRAGMA journal_mode = {_pragma_value('SQLITE_JOURNAL_MODE', JOURNAL_MODES)}")
+    if db.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+    fts_exists = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'bookmarks_fts'").fetchone()
+    closure_exists = db.execute("SELECT 1 FROM sqlite_master WHERE name = 'folder_closure'").fetchone()
+    # The schema and the migrations below are applied in one transaction
     db.executescript('''
+        BEGIN IMMEDIATE;
+
         CREATE TABLE IF NOT EXISTS folders (
             id TEXT PRIMARY KEY,
             name TEXT NOT NULL,
             parent_id TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
             FOREIGN KEY (parent_id) REFERENCES folders (id) ON DELETE CASCADE
         );
 
         CREATE TABLE IF NOT EXISTS tags (
             id TEXT PRIMARY KEY,
             name TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP
         );
 
         CREATE TABLE IF NOT EXISTS bookmarks (
@@ -85,6 +244,7 @@ def init_db():
             folder_id TEXT,
             pinned INTEGER DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
             FOREIGN KEY (folder_id) REFERENCES folders (id) ON DELETE SET NULL
         );
 
@@ -96,33 +256,126 @@ def init_db():
             FOREIGN KEY (tag_id) REFERENCES tags (id) ON DELETE CASCADE
         );
 
-        CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders(parent_id);
-        CREATE INDEX IF NOT EXISTS idx_bookmarks_folder ON bookmarks(folder_id);
-        CREATE INDEX IF NOT EXISTS idx_bookmarks_pinned ON bookmarks(pinned);
-        CREATE INDEX IF NOT EXISTS idx_bookmark_tags_bookmark ON bookmark_tags(bookmark_id);
-        CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag ON bookmark_tags(tag_id);
+        -- Lists the children of a folder in name order, replacing the parent-only index
+        DROP INDEX IF EXISTS idx_folders_parent;
+        CREATE INDEX IF NOT EXISTS idx_folders_parent_name ON folders(parent_id, name);
+        -- Match the default bookmark list order, so a page is read in index order
+        -- and needs no sort, for all bookmarks and within one folder. They replace
+        -- the narrower pinned-only and folder-only indexes.
+        DROP INDEX IF EXISTS idx_bookmarks_pinned;
+        DROP INDEX IF EXISTS idx_bookmarks_folder;
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_pinned_created ON bookmarks(pinned DESC, created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_folder_pinned_created
+            ON bookmarks(folder_id, pinned DESC, created_at DESC);
+        -- The list sorted by title (A-Z), read in index order like the default
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_pinned_title ON bookmarks(pinned DESC, title);
+        -- Tag filters and per-tag counts are answered from the index alone. Lookups
+        -- by bookmark use the primary key, which starts with bookmark_id.
+        DROP INDEX IF EXISTS idx_bookmark_tags_bookmark;
+        DROP INDEX IF EXISTS idx_bookmark_tags_tag;
+        CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag_bookmark ON bookmark_tags(tag_id, bookmark_id);
+
+        CREATE TABLE IF NOT EXISTS folder_closure (
+            ancestor TEXT NOT NULL,
+            descendant TEXT NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor, descendant)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_folder_closure_descendant ON folder_closure(descendant);
 
-        CREATE TRIGGER IF NOT EXISTS update_folders_timestamp
-        AFTER UPDATE ON folders
-        FOR EACH ROW
+        CREATE TRIGGER IF NOT EXISTS folder_closure_insert
+        AFTER INSERT ON folders
         BEGIN
-            UPDATE folders SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            INSERT INTO folder_closure (ancestor, descendant, depth) VALUES (NEW.id, NEW.id, 0);
+            INSERT INTO folder_closure (ancestor, descendant, depth)
+            SELECT ancestor, NEW.id, depth + 1 FROM folder_closure WHERE descendant = NEW.parent_id;
         END;
 
-        CREATE TRIGGER IF NOT EXISTS update_tags_timestamp
-        AFTER UPDATE ON tags
-        FOR EACH ROW
+        -- Detach the moved subtree from its old ancestors, then attach it below the new parent
+        CREATE TRIGGER IF NOT EXISTS folder_closure_move
+        AFTER UPDATE OF parent_id ON folders
+        WHEN OLD.parent_id IS NOT NEW.parent_id
         BEGIN
-            UPDATE tags SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            DELETE FROM folder_closure
+            WHERE descendant IN (SELECT descendant FROM folder_closure WHERE ancestor = NEW.id)
+              AND ancestor NOT IN (SELECT descendant FROM folder_closure WHERE ancestor = NEW.id);
+            INSERT INTO folder_closure (ancestor, descendant, depth)
+            SELECT above.ancestor, below.descendant, above.depth + below.depth + 1
+            FROM folder_closure above, folder_closure below
+            WHERE above.descendant = NEW.parent_id AND below.ancestor = NEW.id;
         END;
 
-        CREATE TRIGGER IF NOT EXISTS update_bookmarks_timestamp
-        AFTER UPDATE ON bookmarks
-        FOR EACH ROW
+        -- Subfolders left behind by a delete are no longer below the deleted folder's ancestors
+        CREATE TRIGGER IF NOT EXISTS folder_closure_delete
+        AFTER DELETE ON folders
         BEGIN
-            UPDATE bookmarks SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            DELETE FROM folder_closure
+            WHERE descendant IN (SELECT descendant FROM folder_closure WHERE ancestor = OLD.id)
+              AND ancestor IN (SELECT ancestor FROM folder_closure WHERE descendant = OLD.id);
         END;
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_fts USING fts5(
+            title, url, description,
+            content='bookmarks', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS bookmarks_fts_insert
+        AFTER INSERT ON bookmarks
+        BEGIN
+            INSERT INTO bookmarks_fts (rowid, title, url, description)
+            VALUES (NEW.rowid, NEW.title, NEW.url, NEW.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bookmarks_fts_update
+        AFTER UPDATE OF title, url, description ON bookmarks
+        BEGIN
+            INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, description)
+            VALUES ('delete', OLD.rowid, OLD.title, OLD.url, OLD.description);
+            INSERT INTO bookmarks_fts (rowid, title, url, description)
+            VALUES (NEW.rowid, NEW.title, NEW.url, NEW.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bookmarks_fts_delete
+        AFTER DELETE ON bookmarks
+        BEGIN
+            INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, description)
+            VALUES ('delete', OLD.rowid, OLD.title, OLD.url, OLD.description);
+        END;
+
+        -- Replaced by updated_at, written by the UPDATE statements themselves
+        DROP TRIGGER IF EXISTS update_folders_timestamp;
+        DROP TRIGGER IF EXISTS update_tags_timestamp;
+        DROP TRIGGER IF EXISTS update_bookmarks_timestamp;
     ''')
+    try:
+        for table in ('folders', 'tags', 'bookmarks'):
+            columns = {row['name'] for row in db.execute(f'PRAGMA table_info({table})')}
+            if 'updated_at' not in columns:
+                db.execute(f'ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP')
+        if not closure_exists:
+            # Fill the closure table for folders created before it existed
+            db.execute('''
+                INSERT INTO folder_closure (ancestor, descendant, depth)
+                WITH RECURSIVE tree(ancestor, descendant, depth) AS (
+                    SELECT id, id, 0 FROM folders
+                    UNION
+                    SELECT tree.ancestor, child.id, tree.depth + 1
+                    FROM tree JOIN folders child ON child.parent_id = tree.descendant
+                    WHERE tree.depth < 1000
+                )
+                SELECT ancestor, descendant, MIN(depth) FROM tree GROUP BY ancestor, descendant
+            ''')
+        if not fts_exists:
+            # Index bookmarks created before the full-text index existed
+            db.execute("INSERT INTO bookmarks_fts (bookmarks_fts) VALUES ('rebuild')")
+        # Planner statistics for the new indexes
+        db.execute('ANALYZE')
+        db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    except BaseException:
+        db.rollback()
+        raise
     db.commit()
 
 
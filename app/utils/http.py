@@ -0,0 +1,60 @@
+"""HTTP utility module.
+
+This module provides the pooled requests sessions and the streamed reader
+for HTML document heads shared by the favicon and metadata services.
+"""
+
+import re
+import requests
+from requests.adapters import HTTPAdapter
+
+# Size of the chunks read from a streamed HTML response
+HTML_CHUNK_SIZE = 16 * 1024
+
+# End of the document head, titles, meta tags, and icon links are never in the body
+HEAD_END_RE = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+
+def create_session(headers, pool_size=32, max_retries=0):
+    """Create a requests session with a shared connection pool.
+
+    Requests to the same host made through the session reuse the TCP/TLS
+    connection, also across threads.
+
+    Args:
+        headers (dict): Headers sent with every request
+        pool_size (int, optional): Connections kept per host, and hosts kept in the pool
+        max_retries (int, optional): Retries of failed connection attempts
+
+    Returns:
+        requests.Session: Session with the pooled adapter mounted for http and https
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=max_retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def read_html_head(response, max_bytes):
+    """Read a streamed HTML response up to the end of its <head>.
+
+    Args:
+        response (requests.Response): Response opened with stream=True
+        max_bytes (int): Maximum number of bytes to read
+
+    Returns:
+        bytes: Raw (undecoded) document up to and including </head>, or at most max_bytes
+    """
+    content = b''
+    for chunk in response.iter_content(HTML_CHUNK_SIZE):
+        # Search only the new bytes, plus enough of the previous chunk for a split tag
+        start = max(len(content) - 16, 0)
+        content += chunk
+        head_end = HEAD_END_RE.search(content, start)
+        if head_end:
+            return content[:head_end.end()]
+        if len(content) >= max_bytes:
+            break
+    return content[:max_bytes]
@@ -0,0 +1,49 @@
+"""JSON provider module.
+
+This module provides a Flask JSON provider backed by orjson, used for
+jsonify() responses and request.get_json() parsing.
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider using the C-implemented orjson encoder.
+
+    Keeps the default provider's sort_keys behaviour and indented output in
+    debug mode. Types orjson cannot serialize fall back to the default
+    provider's handler (dates, UUIDs, dataclasses, Markup).
+    """
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as a JSON string.
+
+        Args:
+            obj: Data to serialize
+            **kwargs: Options from Flask; sort_keys and indent are honoured
+
+        Returns:
+            str: JSON encoded data
+        """
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize data from a JSON string or bytes.
+
+        Args:
+            s (str or bytes): JSON encoded data
+            **kwargs: Ignored, accepted for compatibility with Flask
+
+        Returns:
+            Deserialized data
+
+        Raises:
+            orjson.JSONDecodeError: If the input is not valid JSON (a ValueError subclass)
+        """
+        return orjson.loads(s)
@@ -18,34 +18,61 @@ class Config:
     All settings can be overridden via environment variables.
 
     Attributes:
+        CACHE_TYPE: Flask-Caching backend for rendered fragments (e.g., 'SimpleCache', 'NullCache')
         DATABASE_PATH: Path to SQLite database file
+        DATABASE_POOL_SIZE: Idle SQLite connections kept open for reuse by later requests (0 disables pooling)
         DEBUG: Enable Flask debug mode
+        FAVICON_ASYNC: Download favicons of saved bookmarks in a background thread
         FAVICON_CACHE_DIR: Directory for cached favicon images
+        FAVICON_NEGATIVE_CACHE_TTL: Seconds to skip domains without a favicon before probing again (0 disables)
+        FAVICON_WORKERS: Number of background threads for favicon downloads
         HTTP_AUTH_PASSWORD: Password for HTTP Basic Authentication
         HTTP_AUTH_USERNAME: Username for HTTP Basic Authentication
         HTTP_PORT: Port number for HTTP server
+        JINJA_CACHE_DIR: Directory for compiled template bytecode (default: instance/jinja_cache)
         MAX_CONTENT_LENGTH: Maximum file upload size in bytes
         PERMANENT_SESSION_LIFETIME: Session timeout in seconds
         RATELIMIT_DEFAULT: Default rate limit string (e.g., '100 per minute')
+        RATELIMIT_STORAGE_MAX_CONNECTIONS: Connection pool size for Redis rate limit storage
         RATELIMIT_STORAGE_URI: Storage backend URI for rate limiting
         SECRET_KEY: Secret key for session signing
         SESSION_COOKIE_HTTPONLY: Prevent JavaScript access to session cookie
         SESSION_COOKIE_SAMESITE: CSRF protection mode for cookies
         SESSION_COOKIE_SECURE: Require HTTPS for session cookies
+        SQLITE_CACHE_SIZE: SQLite page cache per connection (negative values in KiB, e.g., -20000 for about 20 MB)
+        SQLITE_JOURNAL_MODE: SQLite journal mode set on the database file (e.g., 'WAL', 'DELETE')
+        SQLITE_MMAP_SIZE: Bytes of the database file SQLite reads through memory mapping (0 disables)
+        SQLITE_SYNCHRONOUS: SQLite synchronous level for each connection (e.g., 'NORMAL', 'FULL')
+        SQLITE_TEMP_STORE: Storage for SQLite temporary tables and indexes (e.g., 'MEMORY', 'FILE')
+        TEMPLATES_AUTO_RELOAD: Re-check template files for changes on every render
         TESTING: Enable testing mode
     """
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
     DATABASE_PATH = os.environ.get('DATABASE_PATH', 'database/bookmarks.db')
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 16))
     DEBUG = os.environ.get('DEBUG', True)
+    FAVICON_ASYNC = os.environ.get('FAVICON_ASYNC', 'True').lower() == 'true'
     FAVICON_CACHE_DIR = os.environ.get('FAVICON_CACHE_DIR', 'app/static/favicons')
+    FAVICON_NEGATIVE_CACHE_TTL = int(os.environ.get('FAVICON_NEGATIVE_CACHE_TTL', 86400))
+    FAVICON_WORKERS = int(os.environ.get('FAVICON_WORKERS', 8))
     HTTP_AUTH_PASSWORD = os.environ.get('HTTP_AUTH_PASSWORD', 'changeme')
     HTTP_AUTH_USERNAME = os.environ.get('HTTP_AUTH_USERNAME', 'admin')
     HTTP_PORT = int(os.environ.get('HTTP_PORT', 8080))
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
     MAX_CONTENT_LENGTH = 128 * 1024  # 128 KB
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
     RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', '100 per minute')
+    RATELIMIT_STORAGE_MAX_CONNECTIONS = int(os.environ.get('RATELIMIT_STORAGE_MAX_CONNECTIONS', 32))
     RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'memory://')
-    SECRET_KEY = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+    # Only generated if no key is set, an empty SECRET_KEY also gets a random key
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     SESSION_COOKIE_SECURE = True
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -20000))
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE', 'MEMORY')
+    TEMPLATES_AUTO_RELOAD = os.environ.get('TEMPLATES_AUTO_RELOAD', 'False').lower() == 'true'
     TESTING = False
@@ -43,8 +43,10 @@ module "cloud_run_github_runners_manager" {
         startup_cpu_boost = true # Start containers faster by allocating more CPU during startup time.
       }
       env = {
-        HTTP_AUTH_USERNAME = var.username
-        DATABASE_PATH      = "/var/lib/bookmarks/bookmarks.db"
+        HTTP_AUTH_USERNAME  = var.username
+        DATABASE_PATH       = "/var/lib/bookmarks/bookmarks.db"
+        SQLITE_JOURNAL_MODE = "DELETE" # Cloud Storage FUSE does not support the shared memory file of WAL
+        SQLITE_MMAP_SIZE    = "0"      # Read through the FUSE mount instead of memory mapping it
       }
       env_from_key = {
         HTTP_AUTH_PASSWORD = {
@@ -1,41 +1,140 @@
 import pytest
 import os
+import requests
+import shutil
+import sqlite3
 import tempfile
+from types import MappingProxyType
 from app import create_app
+from app.services import favicon_service, metadata_service
 from config import Config
 
+# Test databases live in RAM where a tmpfs is available, so commits never wait for a disk flush.
+# A real file is kept (instead of :memory:) because every app context opens its own connection.
+DATABASE_DIR = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+INTEGRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'integration')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-network', action='store_true', default=False,
+                     help='run tests marked with network, which access real websites')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'network: test accesses real websites (skipped unless --run-network)')
+    config.addinivalue_line('markers', 'integration: test in tests/integration, exercising the full request stack')
+
+
+def pytest_collection_modifyitems(config, items):
+    run_network = config.getoption('--run-network')
+    skip_network = pytest.mark.skip(reason='accesses real websites, use --run-network to run')
+    for item in items:
+        if str(item.path).startswith(INTEGRATION_DIR + os.sep):
+            item.add_marker(pytest.mark.integration)
+        if not run_network and 'network' in item.keywords:
+            item.add_marker(skip_network)
+
+
+def _offline_send(request, **kwargs):
+    raise requests.ConnectionError(f'network access is disabled in tests: {request.url}')
+
+
+@pytest.fixture(autouse=True)
+def _offline_sessions(request, monkeypatch):
+    """Fail HTTP requests of the shared sessions at once, unless the test is marked network.
+
+    Tests mock _session.get for the responses they need. Requests nobody
+    mocked, such as the favicon download after saving a bookmark, would
+    otherwise reach real websites or wait for a DNS timeout.
+    """
+    if 'network' not in request.keywords:
+        for session in (favicon_service._session, metadata_service._session):
+            monkeypatch.setattr(session, 'send', _offline_send)
+
 
 class TestConfig(Config):
     TESTING = True
     HTTP_AUTH_USERNAME = 'test'
     HTTP_AUTH_PASSWORD = 'test'
+    FAVICON_ASYNC = False
+    FAVICON_NEGATIVE_CACHE_TTL = 0
+    # Test databases are thrown away, so commits need not survive a power loss;
+    # this matters where no tmpfs is available and the files are on disk
+    SQLITE_SYNCHRONOUS = 'OFF'
     FAVICON_CACHE_DIR = tempfile.mkdtemp()
+    JINJA_CACHE_DIR = tempfile.mkdtemp()
 
     @staticmethod
     def get_database_path():
-        return tempfile.mktemp(suffix='.db')
+        return tempfile.mktemp(suffix='.db', dir=DATABASE_DIR)
 
 
-@pytest.fixture
-def app():
-    test_db_path = TestConfig.get_database_path()
-    TestConfig.DATABASE_PATH = test_db_path
+def _remove_database(path):
+    for file_path in (path, path + '-wal', path + '-shm'):
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+
+
+def _copy_database(source, target):
+    """Copy a database file with the SQLite backup API."""
+    source_db = sqlite3.connect(source)
+    target_db = sqlite3.connect(target)
+    try:
+        source_db.backup(target_db)
+    finally:
+        source_db.close()
+        target_db.close()
+
+
+@pytest.fixture(scope='session')
+def _session_app():
+    """Create the application once; each test gets its own database via the app fixture.
+
+    The database initialized by create_app() stays empty and serves as the
+    schema template that the app fixture copies for each test.
+    """
+    TestConfig.DATABASE_PATH = TestConfig.get_database_path()
 
     app = create_app(TestConfig)
+    config = dict(app.config)
 
-    yield app
+    yield app, config
+
+    app.extensions['favicon_executor'].shutdown(wait=True)
+    _remove_database(TestConfig.DATABASE_PATH)
+    for directory in (TestConfig.FAVICON_CACHE_DIR, TestConfig.JINJA_CACHE_DIR):
+        shutil.rmtree(directory, ignore_errors=True)
 
-    # Close any open database connections
+
+@pytest.fixture
+def app(_session_app):
+    app, config = _session_app
+
+    # Fresh configuration, database, caches, and rate limits for every test
+    app.config.clear()
+    app.config.update(config)
+    app.config['DATABASE_PATH'] = TestConfig.get_database_path()
+    # Copying the template is several times faster than running the schema script
+    _copy_database(config['DATABASE_PATH'], app.config['DATABASE_PATH'])
+    app.limiter.reset()
+    # The favicon directory is shared by the session; forgetting what was
+    # downloaded is enough to make every test fetch and decode again
+    for favicon_cache in (favicon_service._domain_cache, favicon_service._content_cache,
+                          favicon_service._failed_domains):
+        favicon_cache.clear()
+
+    from app.utils.cache import cache
+    from app.utils.database import close_db, init_db
     with app.app_context():
-        from app.utils.database import close_db
+        cache.clear()
+        # Applies the journal mode; the copied schema is already current
+        init_db()
         close_db()
 
-    if os.path.exists(test_db_path):
-        os.unlink(test_db_path)
+    yield app
 
-    if os.path.exists(TestConfig.FAVICON_CACHE_DIR):
-        import shutil
-        shutil.rmtree(TestConfig.FAVICON_CACHE_DIR)
+    _remove_database(app.config['DATABASE_PATH'])
 
 
 @pytest.fixture
@@ -43,8 +142,9 @@ def client(app):
     return app.test_client()
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def auth_headers():
+    """Basic auth header for the test credentials, shared by all tests; copy it before adding headers."""
     import base64
     credentials = base64.b64encode(b'test:test').decode('utf-8')
-    return {'Authorization': f'Basic {credentials}'}
\ No newline at end of file
+    return MappingProxyType({'Authorization': f'Basic {credentials}'})
\ No newline at end of file
@@ -0,0 +1,53 @@
+import pytest
+from app.services import bookmark_service, tag_service
+from app.utils.cache import bump_data_version
+from app.utils.database import get_db, transaction
+
+
+@pytest.fixture
+def create_bookmarks(app):
+    """Create bookmarks directly through the service layer in one transaction.
+
+    For tests that need bookmarks to exist but do not test saving them, this
+    skips one HTTP request (and its favicon download) per bookmark.
+    """
+    def create(bookmarks):
+        with app.app_context():
+            with transaction():
+                ids = [bookmark_service.create_bookmark(bookmark['url'], bookmark['title'],
+                                                        bookmark.get('description', ''), bookmark.get('folder_id'),
+                                                        bookmark.get('tag_ids', []), bump_version=False)
+                       for bookmark in bookmarks]
+            bump_data_version()
+        return ids
+    return create
+
+
+@pytest.fixture
+def create_tags(app):
+    """Create tags directly through the service layer with one statement.
+
+    Returns the IDs of the new tags in the order of the given names.
+    """
+    def create(names):
+        with app.app_context():
+            return tag_service.create_tags_bulk(names)
+    return create
+
+
+@pytest.fixture
+def folder_id(app):
+    """Look up the ID of a folder by its name with one indexed query."""
+    def lookup(name):
+        with app.app_context():
+            return get_db().execute('SELECT id FROM folders WHERE name = ?', (name,)).fetchone()['id']
+    return lookup
+
+
+@pytest.fixture
+def folder_ids(app):
+    """Map the names of all folders to their IDs with one query."""
+    def lookup():
+        with app.app_context():
+            return {row['name']: row['id'] for row in get_db().execute('SELECT id, name FROM folders')}
+    return lookup
\ No newline at end of file
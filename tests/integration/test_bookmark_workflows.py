@@ -4,6 +4,8 @@ Tests the complete bookmark lifecycle including creation, editing,
 deletion, and interaction with folders and tags.
 """
 
+from app.services import bookmark_service, folder_service, metadata_service, tag_service
+
 
 def test_bookmark_creation_workflow(client, auth_headers, app):
     """Test complete bookmark creation workflow.
@@ -21,7 +23,6 @@ def test_bookmark_creation_workflow(client, auth_headers, app):
 
     # Get folder and tag IDs
     with app.app_context():
-        from app.services import folder_service, tag_service
         folders = folder_service.get_all_folders()
         tags = tag_service.get_all_tags()
         folder_id = folders[0]['id']
@@ -61,7 +62,6 @@ def test_bookmark_edit_workflow(client, auth_headers, app):
 
     # Get bookmark ID
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         bookmark_id = bookmarks['bookmarks'][0]['id']
 
@@ -98,7 +98,6 @@ def test_bookmark_deletion_workflow(client, auth_headers, app):
 
     # Get bookmark ID
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         bookmark_id = bookmarks['bookmarks'][0]['id']
 
@@ -126,7 +125,6 @@ def test_bookmark_pinning_workflow(client, auth_headers, app):
 
     # Get bookmark IDs
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         bookmark_id = bookmarks['bookmarks'][0]['id']
 
@@ -161,7 +159,6 @@ def test_bookmark_with_multiple_tags(client, auth_headers, app):
 
     # Get tag IDs
     with app.app_context():
-        from app.services import tag_service
         tags = tag_service.get_all_tags()
         tag_ids = [tag['id'] for tag in tags]
 
@@ -177,7 +174,6 @@ def test_bookmark_with_multiple_tags(client, auth_headers, app):
 
     # Verify bookmark has all tags
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         bookmark = bookmarks['bookmarks'][0]
         assert len(bookmark['tags']) == 3
@@ -192,7 +188,6 @@ def test_bookmark_metadata_fetching(client, auth_headers, app):
     """
     # Test metadata service directly instead of API endpoint
     with app.app_context():
-        from app.services import metadata_service
         metadata = metadata_service.fetch_page_metadata('https://example.com')
         assert metadata is not None
         assert 'title' in metadata or metadata.get('title') is None
@@ -3,6 +3,66 @@
 Tests the Firefox JSON bookmark import and export functionality.
 """
 
+import json
+from io import BytesIO
+
+import pytest
+from app.services import folder_service
+
+# Firefox JSON bookmark data, encoded once at import time
+FIREFOX_FLAT_BYTES = json.dumps({
+    "title": "root",
+    "children": [
+        {
+            "title": "Example Site",
+            "uri": "https://example.com",
+            "type": "text/x-moz-place"
+        },
+        {
+            "title": "Test Site",
+            "uri": "https://test.com",
+            "type": "text/x-moz-place"
+        }
+    ]
+}).encode('utf-8')
+
+# Firefox JSON with folders
+FIREFOX_NESTED_BYTES = json.dumps({
+    "title": "root",
+    "children": [
+        {
+            "title": "Work",
+            "type": "text/x-moz-place-container",
+            "children": [
+                {
+                    "title": "Work Site",
+                    "uri": "https://work.com",
+                    "type": "text/x-moz-place"
+                }
+            ]
+        },
+        {
+            "title": "Personal",
+            "type": "text/x-moz-place-container",
+            "children": [
+                {
+                    "title": "Personal Site",
+                    "uri": "https://personal.com",
+                    "type": "text/x-moz-place"
+                }
+            ]
+        }
+    ]
+}).encode('utf-8')
+
+
+def _exported_titles(node):
+    """Collect the titles of all bookmarks in an exported Firefox tree."""
+    titles = [node['title']] if 'uri' in node else []
+    for child in node.get('children', []):
+        titles.extend(_exported_titles(child))
+    return titles
+
 
 def test_firefox_export_workflow(client, auth_headers, app):
     """Test Firefox bookmark export workflow.
@@ -14,7 +74,6 @@ def test_firefox_export_workflow(client, auth_headers, app):
 
     # Get folder ID
     with app.app_context():
-        from app.services import folder_service
         folders = folder_service.get_all_folders()
         folder_id = folders[0]['id']
 
@@ -40,94 +99,28 @@ def test_firefox_export_workflow(client, auth_headers, app):
     response = client.get('/export/firefox', headers=auth_headers)
     assert response.status_code == 200
     assert response.headers['Content-Type'] == 'application/json'
-    assert b'Example Site' in response.data or b'example.com' in response.data
+    # The streamed chunks must join into one valid JSON document
+    assert sorted(_exported_titles(response.get_json())) == ['Example Site', 'Test Site']
 
 
-def test_firefox_import_basic_workflow(client, auth_headers, app):
+@pytest.mark.parametrize('json_data', [FIREFOX_FLAT_BYTES, FIREFOX_NESTED_BYTES], ids=['flat', 'nested'])
+def test_firefox_import_workflow(client, auth_headers, app, json_data):
     """Test Firefox bookmark import workflow.
 
-    Tests that the import functionality exists and handles requests properly.
+    Tests that the import functionality handles flat bookmark lists and
+    folder structures.
     Note: Full import testing depends on Firefox service implementation details.
     """
-    # Firefox JSON bookmark data
-    import json
-    firefox_json = {
-        "title": "root",
-        "children": [
-            {
-                "title": "Example Site",
-                "uri": "https://example.com",
-                "type": "text/x-moz-place"
-            },
-            {
-                "title": "Test Site",
-                "uri": "https://test.com",
-                "type": "text/x-moz-place"
-            }
-        ]
-    }
-
-    # Import bookmarks
-    from io import BytesIO
-    json_data = json.dumps(firefox_json).encode('utf-8')
-    response = client.post('/import/firefox',
-                           data={'file': (BytesIO(json_data), 'bookmarks.json')},
-                           headers=auth_headers,
-                           content_type='multipart/form-data',
-                           follow_redirects=True)
-    # Import endpoint should respond (may be success or error page)
-    assert response.status_code == 200
-
-
-def test_firefox_import_with_folders(client, auth_headers, app):
-    """Test Firefox import with folder structure.
-
-    Tests that the import functionality handles folder structures.
-    Note: Full import testing depends on Firefox service implementation details.
-    """
-    # Firefox JSON with folders
-    import json
-    firefox_json = {
-        "title": "root",
-        "children": [
-            {
-                "title": "Work",
-                "type": "text/x-moz-place-container",
-                "children": [
-                    {
-                        "title": "Work Site",
-                        "uri": "https://work.com",
-                        "type": "text/x-moz-place"
-                    }
-                ]
-            },
-            {
-                "title": "Personal",
-                "type": "text/x-moz-place-container",
-                "children": [
-                    {
-                        "title": "Personal Site",
-                        "uri": "https://personal.com",
-                        "type": "text/x-moz-place"
-                    }
-                ]
-            }
-        ]
-    }
-
     # Import bookmarks
-    from io import BytesIO
-    json_data = json.dumps(firefox_json).encode('utf-8')
     response = client.post('/import/firefox',
                            data={'file': (BytesIO(json_data), 'bookmarks.json')},
                            headers=auth_headers,
-                           content_type='multipart/form-data',
-                           follow_redirects=True)
-    # Import endpoint should respond (may be success or error page)
-    assert response.status_code == 200
+                           content_type='multipart/form-data')
+    # Import endpoint should respond (success page or redirect back to the import page)
+    assert response.status_code in (200, 302)
 
 
-def test_firefox_export_preserves_hierarchy(client, auth_headers, app):
+def test_firefox_export_preserves_hierarchy(client, auth_headers, app, folder_id):
     """Test that Firefox export preserves folder hierarchy.
 
     Tests that nested folders are correctly represented in export.
@@ -136,15 +129,12 @@ def test_firefox_export_preserves_hierarchy(client, auth_headers, app):
     client.post('/folder/save', data={'name': 'Projects'}, headers=auth_headers)
 
     with app.app_context():
-        from app.services import folder_service
         folders = folder_service.get_all_folders()
         parent_id = folders[0]['id']
 
     client.post('/folder/save', data={'name': 'Python', 'parent_id': parent_id}, headers=auth_headers)
 
-    with app.app_context():
-        folders = folder_service.get_all_folders()
-        child_id = [f['id'] for f in folders if f['name'] == 'Python'][0]
+    child_id = folder_id('Python')
 
     # Add bookmark to nested folder
     bookmark_data = {
@@ -157,10 +147,9 @@ def test_firefox_export_preserves_hierarchy(client, auth_headers, app):
     # Export and verify structure
     response = client.get('/export/firefox', headers=auth_headers)
     assert response.status_code == 200
-    content = response.data.decode('utf-8')
 
     # Check that export contains data
-    assert 'Projects' in content or 'Python' in content
+    assert b'Projects' in response.data or b'Python' in response.data
 
 
 def test_firefox_import_page_accessible(client, auth_headers):
@@ -181,3 +170,4 @@ def test_firefox_empty_export(client, auth_headers):
     response = client.get('/export/firefox', headers=auth_headers)
     assert response.status_code == 200
     assert response.headers['Content-Type'] == 'application/json'
+    assert _exported_titles(response.get_json()) == []
@@ -1,3 +1,6 @@
+from lxml import html as lxml_html
+from app.services import folder_service
+
 
 def test_add_folder_form_preselects_parent(client, auth_headers, app):
     """Test that adding a folder with parent param pre-selects the parent."""
@@ -5,7 +8,6 @@ def test_add_folder_form_preselects_parent(client, auth_headers, app):
     client.post('/folder/save', data={'name': 'Parent Folder'}, headers=auth_headers)
 
     with app.app_context():
-        from app.services import folder_service
         folders = folder_service.get_all_folders()
         parent_id = folders[0]['id']
 
@@ -13,14 +15,7 @@ def test_add_folder_form_preselects_parent(client, auth_headers, app):
     response = client.get(f'/folder/add?parent={parent_id}', headers=auth_headers)
     assert response.status_code == 200
 
-    # Check if the option is selected
-    html = response.data.decode('utf-8')
-    # The template renders: <option value="{{ f.id }}" ... selected>
-    # We look for the value and the selected attribute.
-    # Note: Jinja might put spaces or not. My edit:
-    # <option value="{{ f.id }}" {% if ... %}selected{% endif %}>
-    # If selected: <option value="ID" selected>
-    # There is a space before {% if %}.
-
-    expected_snippet = f'value="{parent_id}" selected'
-    assert expected_snippet in html
+    # Check that the parent option is the selected one
+    document = lxml_html.fromstring(response.data)
+    selected = document.xpath('//select[@name="parent_id"]/option[@selected]/@value')
+    assert selected == [str(parent_id)]
\ No newline at end of file
@@ -4,6 +4,8 @@ Tests the complete folder lifecycle including creation, hierarchical nesting,
 editing, deletion, and folder-based bookmark filtering.
 """
 
+from app.services import bookmark_service, folder_service
+
 
 def test_folder_creation_workflow(client, auth_headers, app):
     """Test folder creation workflow.
@@ -16,7 +18,6 @@ def test_folder_creation_workflow(client, auth_headers, app):
 
     # Verify folder exists
     with app.app_context():
-        from app.services import folder_service
         folders = folder_service.get_all_folders()
         assert len(folders) == 1
         assert folders[0]['name'] == 'Work'
@@ -34,7 +35,6 @@ def test_nested_folder_creation_workflow(client, auth_headers, app):
 
     # Get parent folder ID
     with app.app_context():
-        from app.services import folder_service
         folders = folder_service.get_all_folders()
         parent_id = folders[0]['id']
 
@@ -54,7 +54,7 @@ def test_nested_folder_creation_workflow(client, auth_headers, app):
         assert hierarchy[0]['children'][0]['name'] == 'Python Projects'
 
 
-def test_deeply_nested_folder_hierarchy(client, auth_headers, app):
+def test_deeply_nested_folder_hierarchy(client, auth_headers, app, folder_id):
     """Test deeply nested folder hierarchy.
 
     Tests creating multiple levels of nested folders.
@@ -63,24 +63,17 @@ def test_deeply_nested_folder_hierarchy(client, auth_headers, app):
     response = client.post('/folder/save', data={'name': 'Work'}, headers=auth_headers)
     assert response.status_code == 302
 
-    with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        work_id = folders[0]['id']
+    work_id = folder_id('Work')
 
     response = client.post('/folder/save', data={'name': 'Projects', 'parent_id': work_id}, headers=auth_headers)
     assert response.status_code == 302
 
-    with app.app_context():
-        folders = folder_service.get_all_folders()
-        projects_id = [f['id'] for f in folders if f['name'] == 'Projects'][0]
+    projects_id = folder_id('Projects')
 
     response = client.post('/folder/save', data={'name': 'Python', 'parent_id': projects_id}, headers=auth_headers)
     assert response.status_code == 302
 
-    with app.app_context():
-        folders = folder_service.get_all_folders()
-        python_id = [f['id'] for f in folders if f['name'] == 'Python'][0]
+    python_id = folder_id('Python')
 
     response = client.post('/folder/save', data={'name': 'Django', 'parent_id': python_id}, headers=auth_headers)
     assert response.status_code == 302
@@ -101,14 +94,8 @@ def test_folder_edit_workflow(client, auth_headers, app):
     Tests creating a folder, editing its name, and verifying changes.
     """
     # Create folder
-    response = client.post('/folder/save', data={'name': 'Old Name'}, headers=auth_headers, follow_redirects=False)
-    assert response.status_code == 302
-
-    # Get folder ID
     with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        folder_id = folders[0]['id']
+        folder_id = folder_service.create_folder('Old Name')
 
     # Edit folder name
     response = client.post('/folder/save',
@@ -129,14 +116,8 @@ def test_folder_deletion_workflow(client, auth_headers, app):
     Tests creating and deleting a folder, ensuring bookmarks are handled.
     """
     # Create folder
-    response = client.post('/folder/save', data={'name': 'To Delete'}, headers=auth_headers, follow_redirects=False)
-    assert response.status_code == 302
-
-    # Get folder ID
     with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        folder_id = folders[0]['id']
+        folder_id = folder_service.create_folder('To Delete')
 
     # Delete folder
     response = client.post(f'/folder/{folder_id}/delete', headers=auth_headers, follow_redirects=False)
@@ -148,29 +129,16 @@ def test_folder_deletion_workflow(client, auth_headers, app):
         assert len(folders) == 0
 
 
-def test_folder_with_bookmarks_deletion(client, auth_headers, app):
+def test_folder_with_bookmarks_deletion(client, auth_headers, app, create_bookmarks):
     """Test deleting folder with bookmarks.
 
     Tests that deleting a folder also affects its bookmarks (behavior depends on implementation).
     """
-    # Create folder
-    response = client.post('/folder/save', data={'name': 'Work'}, headers=auth_headers)
-    assert response.status_code == 302
-
-    # Get folder ID
+    # Create folder and bookmark in folder
     with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        folder_id = folders[0]['id']
-
-    # Create bookmark in folder
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'Example',
-        'folder_id': folder_id
-    }
-    response = client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-    assert response.status_code == 302
+        folder_id = folder_service.create_folder('Work')
+
+    create_bookmarks([{'url': 'https://example.com', 'title': 'Example', 'folder_id': folder_id}])
 
     # Delete folder
     response = client.post(f'/folder/{folder_id}/delete', headers=auth_headers, follow_redirects=False)
@@ -178,12 +146,11 @@ def test_folder_with_bookmarks_deletion(client, auth_headers, app):
 
     # Verify bookmark still exists (folder might still be associated or null)
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         assert len(bookmarks['bookmarks']) == 1
 
 
-def test_folder_filtering_workflow(client, auth_headers, app):
+def test_folder_filtering_workflow(client, auth_headers, folder_ids):
     """Test filtering bookmarks by folder.
 
     Tests creating folders and bookmarks, then filtering by folder.
@@ -193,11 +160,9 @@ def test_folder_filtering_workflow(client, auth_headers, app):
     client.post('/folder/save', data={'name': 'Personal'}, headers=auth_headers)
 
     # Get folder IDs
-    with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        work_id = [f['id'] for f in folders if f['name'] == 'Work'][0]
-        personal_id = [f['id'] for f in folders if f['name'] == 'Personal'][0]
+    ids = folder_ids()
+    work_id = ids['Work']
+    personal_id = ids['Personal']
 
     # Create bookmarks in different folders
     client.post('/bookmark/save',
@@ -220,7 +185,7 @@ def test_folder_filtering_workflow(client, auth_headers, app):
     assert b'Work Site' not in response.data
 
 
-def test_move_folder_parent_workflow(client, auth_headers, app):
+def test_move_folder_parent_workflow(client, auth_headers, app, folder_id, folder_ids):
     """Test moving folder to different parent.
 
     Tests changing the parent of a folder in the hierarchy.
@@ -229,18 +194,14 @@ def test_move_folder_parent_workflow(client, auth_headers, app):
     client.post('/folder/save', data={'name': 'Root1'}, headers=auth_headers)
     client.post('/folder/save', data={'name': 'Root2'}, headers=auth_headers)
 
-    with app.app_context():
-        from app.services import folder_service
-        folders = folder_service.get_all_folders()
-        root1_id = [f['id'] for f in folders if f['name'] == 'Root1'][0]
-        root2_id = [f['id'] for f in folders if f['name'] == 'Root2'][0]
+    ids = folder_ids()
+    root1_id = ids['Root1']
+    root2_id = ids['Root2']
 
     # Create child under Root1
     client.post('/folder/save', data={'name': 'Child', 'parent_id': root1_id}, headers=auth_headers)
 
-    with app.app_context():
-        folders = folder_service.get_all_folders()
-        child_id = [f['id'] for f in folders if f['name'] == 'Child'][0]
+    child_id = folder_id('Child')
 
     # Move child to Root2
     response = client.post('/folder/save',
@@ -251,8 +212,9 @@ def test_move_folder_parent_workflow(client, auth_headers, app):
     # Verify hierarchy
     with app.app_context():
         hierarchy = folder_service.get_folder_hierarchy()
-        root1 = [f for f in hierarchy if f['name'] == 'Root1'][0]
-        root2 = [f for f in hierarchy if f['name'] == 'Root2'][0]
+        roots = {f['name']: f for f in hierarchy}
+        root1 = roots['Root1']
+        root2 = roots['Root2']
         assert len(root1['children']) == 0
         assert len(root2['children']) == 1
         assert root2['children'][0]['name'] == 'Child'
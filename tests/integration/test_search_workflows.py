@@ -4,23 +4,66 @@ Tests search functionality including full-text search, live search API,
 and search result filtering.
 """
 
-import json
+import pytest
+from app.services import bookmark_service, folder_service, tag_service
+from app.utils.cache import bump_data_version
+from app.utils.database import close_db, init_db, transaction
+from tests.conftest import TestConfig, _copy_database, _remove_database
+
+# Bookmarks shared by the read-only search tests
+SEARCH_CORPUS = [
+    {'url': 'https://python.org', 'title': 'Python Programming', 'description': 'Official Python website'},
+    {'url': 'https://flask.palletsprojects.com', 'title': 'Flask Documentation', 'description': 'Python web framework'},
+    {'url': 'https://github.com', 'title': 'GitHub', 'description': 'Code hosting platform'},
+    {'url': 'https://gitlab.com', 'title': 'GitLab', 'description': 'DevOps platform'},
+    {'url': 'https://bitbucket.org', 'title': 'Bitbucket', 'description': 'Git repository'},
+    {'url': 'https://example.com', 'title': 'C++ Programming', 'description': 'Learn C++ with examples & tutorials'},
+    {'url': 'https://a.com', 'title': 'Zebra Site', 'description': 'Search term here'},
+    {'url': 'https://b.com', 'title': 'Apple Site', 'description': 'Search term here'},
+    {'url': 'https://c.com', 'title': 'Banana Site', 'description': 'Search term here'}
+]
+
+
+@pytest.fixture(scope='module')
+def _search_corpus_database(_session_app):
+    """Build a database with the search corpus once per module."""
+    app, config = _session_app
+    path = TestConfig.get_database_path()
+    app.config['DATABASE_PATH'] = path
+    try:
+        with app.app_context():
+            init_db()
+            with transaction():
+                for bookmark in SEARCH_CORPUS:
+                    bookmark_service.create_bookmark(bookmark['url'], bookmark['title'], bookmark['description'],
+                                                     None, [], bump_version=False)
+            close_db()
+    finally:
+        app.config['DATABASE_PATH'] = config['DATABASE_PATH']
+
+    yield path
+
+    _remove_database(path)
+
+
+@pytest.fixture
+def search_corpus(app, _search_corpus_database):
+    """Copy the prebuilt search corpus into the database of the current test.
+
+    Read-only search tests use this instead of creating their own bookmarks;
+    tests that write keep their own data.
+    """
+    _copy_database(_search_corpus_database, app.config['DATABASE_PATH'])
+    with app.app_context():
+        bump_data_version()
+    return SEARCH_CORPUS
 
 
-def test_search_page_workflow(client, auth_headers, app):
+def test_search_page_workflow(client, auth_headers, search_corpus):
     """Test search page workflow.
 
-    Tests creating bookmarks and searching for them.
+    Tests searching the shared bookmarks on the search page.
     """
-    # Create bookmarks with different content
-    bookmarks = [
-        {'url': 'https://python.org', 'title': 'Python Programming', 'description': 'Official Python website'},
-        {'url': 'https://flask.palletsprojects.com', 'title': 'Flask Documentation', 'description': 'Python web framework'}
-    ]
-
-    for bookmark in bookmarks:
-        client.post('/bookmark/save', data=bookmark, headers=auth_headers)
-
     # Search for "Python"
     response = client.get('/search?q=Python', headers=auth_headers)
     assert response.status_code == 200
@@ -28,46 +71,32 @@ def test_search_page_workflow(client, auth_headers, app):
     assert b'Flask Documentation' in response.data
 
 
-def test_live_search_api_workflow(client, auth_headers, app):
+def test_live_search_api_workflow(client, auth_headers, search_corpus):
     """Test live search API workflow.
 
     Tests the AJAX search endpoint for live search results.
     """
-    # Create test bookmarks
-    bookmarks = [
-        {'url': 'https://github.com', 'title': 'GitHub', 'description': 'Code hosting platform'},
-        {'url': 'https://gitlab.com', 'title': 'GitLab', 'description': 'DevOps platform'},
-        {'url': 'https://bitbucket.org', 'title': 'Bitbucket', 'description': 'Git repository'}
-    ]
-
-    for bookmark in bookmarks:
-        client.post('/bookmark/save', data=bookmark, headers=auth_headers)
-
     # Test live search
     response = client.get('/api/search?q=git', headers=auth_headers)
     assert response.status_code == 200
-    data = json.loads(response.data)
+    data = response.get_json()
     assert 'bookmarks' in data
     assert len(data['bookmarks']) >= 2  # GitHub and GitLab should match
 
 
-def test_search_with_special_characters(client, auth_headers, app):
+def test_search_with_special_characters(client, auth_headers, search_corpus):
     """Test search with special characters.
 
     Tests that search handles special characters correctly.
     """
-    # Create bookmark with special characters
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'C++ Programming',
-        'description': 'Learn C++ with examples & tutorials'
-    }
-    client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-
     # Search for C++
     response = client.get('/search?q=C%2B%2B', headers=auth_headers)
     assert response.status_code == 200
     assert b'C++ Programming' in response.data
+    # Every other bookmark has a word starting with "c" (.com, Code, ...), none contains "C++"
+    for bookmark in SEARCH_CORPUS:
+        if bookmark['title'] != 'C++ Programming':
+            assert bookmark['title'].encode() not in response.data
 
 
 def test_search_in_folders_and_tags(client, auth_headers, app):
@@ -81,7 +110,6 @@ def test_search_in_folders_and_tags(client, auth_headers, app):
 
     # Get IDs
     with app.app_context():
-        from app.services import folder_service, tag_service
         folders = folder_service.get_all_folders()
         tags = tag_service.get_all_tags()
         folder_id = folders[0]['id']
@@ -103,44 +131,34 @@ def test_search_in_folders_and_tags(client, auth_headers, app):
     assert b'Example Site' in response.data
 
 
-def test_search_sorting_workflow(client, auth_headers, app):
+def test_search_sorting_workflow(client, auth_headers, search_corpus):
     """Test search with sorting options.
 
     Tests that search results can be sorted by different criteria.
     """
-    # Create bookmarks with different titles
-    bookmarks = [
-        {'url': 'https://a.com', 'title': 'Zebra Site', 'description': 'Search term here'},
-        {'url': 'https://b.com', 'title': 'Apple Site', 'description': 'Search term here'},
-        {'url': 'https://c.com', 'title': 'Banana Site', 'description': 'Search term here'}
-    ]
-
-    for bookmark in bookmarks:
-        client.post('/bookmark/save', data=bookmark, headers=auth_headers)
-
     # Search with title sorting ascending
     response = client.get('/search?q=term&sort=title&order=asc', headers=auth_headers)
     assert response.status_code == 200
-    content = response.data.decode('utf-8')
-    apple_pos = content.find('Apple Site')
-    banana_pos = content.find('Banana Site')
-    zebra_pos = content.find('Zebra Site')
-    assert apple_pos < banana_pos < zebra_pos
+    apple_pos = response.data.find(b'Apple Site')
+    banana_pos = response.data.find(b'Banana Site')
+    zebra_pos = response.data.find(b'Zebra Site')
+    assert 0 <= apple_pos < banana_pos < zebra_pos
 
 
-def test_search_pagination_workflow(client, auth_headers, app):
+def test_search_pagination_workflow(client, auth_headers, create_bookmarks):
     """Test search pagination.
 
     Tests that search results are paginated correctly.
     """
     # Create many bookmarks with same search term
-    for i in range(15):
-        bookmark_data = {
+    create_bookmarks([
+        {
             'url': f'https://example{i}.com',
             'title': f'Test Bookmark {i}',
             'description': 'Common search term'
         }
-        client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
+        for i in range(15)
+    ])
 
     # Get first page
     response = client.get('/search?q=Common&page=1', headers=auth_headers)
@@ -170,40 +188,26 @@ def test_empty_search_results(client, auth_headers, app):
     assert b'No bookmarks found' in response.data or b'0 bookmarks' in response.data
 
 
-def test_search_redirect_from_index(client, auth_headers, app):
+def test_search_redirect_from_index(client, auth_headers):
     """Test search redirect from index page.
 
-    Tests that search from index page redirects to search page.
+    Tests that search from index page redirects to search page. The redirect
+    does not depend on stored bookmarks, so none are created.
     """
-    # Create bookmark
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'Example Site',
-        'description': 'Test content'
-    }
-    client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-
     # Search from index should redirect to search page
     response = client.get('/?search=Example', headers=auth_headers, follow_redirects=False)
     assert response.status_code == 302
     assert '/search?q=Example' in response.location
 
 
-def test_live_search_empty_query(client, auth_headers, app):
+def test_live_search_empty_query(client, auth_headers, search_corpus):
     """Test live search with empty query.
 
-    Tests that live search handles empty queries.
+    Tests that live search handles empty queries even when bookmarks exist.
     """
-    # Create bookmark
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'Example Site'
-    }
-    client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-
     # Empty search query
     response = client.get('/api/search?q=', headers=auth_headers)
     assert response.status_code == 200
-    data = json.loads(response.data)
+    data = response.get_json()
     assert 'bookmarks' in data
-    assert len(data['bookmarks']) == 0  # Empty query returns empty results
+    assert len(data['bookmarks']) == 0  # Empty query returns empty results
\ No newline at end of file
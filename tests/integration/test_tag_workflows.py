@@ -4,6 +4,8 @@ Tests the complete tag lifecycle including creation, editing,
 deletion, and tag-based bookmark filtering.
 """
 
+from app.services import bookmark_service, tag_service
+
 
 def test_tag_creation_workflow(client, auth_headers, app):
     """Test tag creation workflow.
@@ -16,7 +18,6 @@ def test_tag_creation_workflow(client, auth_headers, app):
 
     # Verify tag exists
     with app.app_context():
-        from app.services import tag_service
         tags = tag_service.get_all_tags()
         assert len(tags) == 1
         assert tags[0]['name'] == 'Python'
@@ -35,7 +36,6 @@ def test_multiple_tags_creation(client, auth_headers, app):
 
     # Verify all tags exist
     with app.app_context():
-        from app.services import tag_service
         tags = tag_service.get_all_tags()
         assert len(tags) == len(tag_names)
         retrieved_names = {tag['name'] for tag in tags}
@@ -48,14 +48,8 @@ def test_tag_edit_workflow(client, auth_headers, app):
     Tests creating a tag, editing its name, and verifying changes.
     """
     # Create tag
-    response = client.post('/tag/save', data={'name': 'Old Tag'}, headers=auth_headers, follow_redirects=False)
-    assert response.status_code == 302
-
-    # Get tag ID
     with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        tag_id = tags[0]['id']
+        tag_id = tag_service.create_tag('Old Tag')
 
     # Edit tag name
     response = client.post('/tag/save',
@@ -76,14 +70,8 @@ def test_tag_deletion_workflow(client, auth_headers, app):
     Tests creating and deleting a tag.
     """
     # Create tag
-    response = client.post('/tag/save', data={'name': 'To Delete'}, headers=auth_headers, follow_redirects=False)
-    assert response.status_code == 302
-
-    # Get tag ID
     with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        tag_id = tags[0]['id']
+        tag_id = tag_service.create_tag('To Delete')
 
     # Delete tag
     response = client.post(f'/tag/{tag_id}/delete', headers=auth_headers, follow_redirects=False)
@@ -95,29 +83,16 @@ def test_tag_deletion_workflow(client, auth_headers, app):
         assert len(tags) == 0
 
 
-def test_tag_with_bookmarks_deletion(client, auth_headers, app):
+def test_tag_with_bookmarks_deletion(client, auth_headers, app, create_bookmarks):
     """Test deleting tag with associated bookmarks.
 
     Tests that bookmark-tag associations are removed when tag is deleted.
     """
-    # Create tag
-    response = client.post('/tag/save', data={'name': 'Important'}, headers=auth_headers)
-    assert response.status_code == 302
-
-    # Get tag ID
+    # Create tag and bookmark with tag
     with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        tag_id = tags[0]['id']
+        tag_id = tag_service.create_tag('Important')
 
-    # Create bookmark with tag
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'Example',
-        'tag_ids': [tag_id]
-    }
-    response = client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-    assert response.status_code == 302
+    create_bookmarks([{'url': 'https://example.com', 'title': 'Example', 'tag_ids': [tag_id]}])
 
     # Delete tag
     response = client.post(f'/tag/{tag_id}/delete', headers=auth_headers, follow_redirects=False)
@@ -125,35 +100,24 @@ def test_tag_with_bookmarks_deletion(client, auth_headers, app):
 
     # Verify bookmark still exists but without tag
     with app.app_context():
-        from app.services import bookmark_service
         bookmarks = bookmark_service.get_all_bookmarks()
         assert len(bookmarks['bookmarks']) == 1
         assert len(bookmarks['bookmarks'][0]['tags']) == 0
 
 
-def test_tag_filtering_workflow(client, auth_headers, app):
+def test_tag_filtering_workflow(client, auth_headers, create_bookmarks, create_tags):
     """Test filtering bookmarks by tag.
 
     Tests creating tags and bookmarks, then filtering by tag.
     """
     # Create two tags
-    client.post('/tag/save', data={'name': 'Python'}, headers=auth_headers)
-    client.post('/tag/save', data={'name': 'JavaScript'}, headers=auth_headers)
-
-    # Get tag IDs
-    with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        python_id = [t['id'] for t in tags if t['name'] == 'Python'][0]
-        javascript_id = [t['id'] for t in tags if t['name'] == 'JavaScript'][0]
+    python_id, javascript_id = create_tags(['Python', 'JavaScript'])
 
     # Create bookmarks with different tags
-    client.post('/bookmark/save',
-                data={'url': 'https://python.org', 'title': 'Python Site', 'tag_ids': [python_id]},
-                headers=auth_headers)
-    client.post('/bookmark/save',
-                data={'url': 'https://javascript.com', 'title': 'JS Site', 'tag_ids': [javascript_id]},
-                headers=auth_headers)
+    create_bookmarks([
+        {'url': 'https://python.org', 'title': 'Python Site', 'tag_ids': [python_id]},
+        {'url': 'https://javascript.com', 'title': 'JS Site', 'tag_ids': [javascript_id]}
+    ])
 
     # Filter by Python tag
     response = client.get(f'/?tag={python_id}', headers=auth_headers)
@@ -168,65 +132,37 @@ def test_tag_filtering_workflow(client, auth_headers, app):
     assert b'Python Site' not in response.data
 
 
-def test_tag_usage_tracking(client, auth_headers, app):
+def test_tag_usage_tracking(client, auth_headers, app, create_bookmarks):
     """Test tag usage tracking.
 
     Tests that tags are correctly associated with bookmarks.
     """
     # Create tag
-    client.post('/tag/save', data={'name': 'Popular'}, headers=auth_headers)
-
-    # Get tag ID
     with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        tag_id = tags[0]['id']
+        tag_id = tag_service.create_tag('Popular')
 
     # Create bookmarks with the tag
-    for i in range(3):
-        client.post('/bookmark/save',
-                    data={'url': f'https://example{i}.com', 'title': f'Site {i}', 'tag_ids': [tag_id]},
-                    headers=auth_headers)
+    create_bookmarks([
+        {'url': f'https://example{i}.com', 'title': f'Site {i}', 'tag_ids': [tag_id]}
+        for i in range(3)
+    ])
 
-    # Verify bookmarks have the tag
+    # Verify bookmarks have the tag, counted by the tag listing's aggregate query
     with app.app_context():
-        from app.services import bookmark_service
-        bookmarks = bookmark_service.get_all_bookmarks()
-        tagged_count = sum(1 for b in bookmarks['bookmarks'] if any(t['id'] == tag_id for t in b['tags']))
-        assert tagged_count == 3
+        tags = {tag['id']: tag for tag in tag_service.get_all_tags()}
+        assert tags[tag_id]['bookmark_count'] == 3
 
 
-def test_bookmark_tag_association_update(client, auth_headers, app):
+def test_bookmark_tag_association_update(client, auth_headers, app, create_bookmarks, create_tags):
     """Test updating bookmark tag associations.
 
     Tests adding and removing tags from an existing bookmark.
     """
     # Create tags
-    client.post('/tag/save', data={'name': 'Tag1'}, headers=auth_headers)
-    client.post('/tag/save', data={'name': 'Tag2'}, headers=auth_headers)
-    client.post('/tag/save', data={'name': 'Tag3'}, headers=auth_headers)
-
-    # Get tag IDs
-    with app.app_context():
-        from app.services import tag_service
-        tags = tag_service.get_all_tags()
-        tag1_id = [t['id'] for t in tags if t['name'] == 'Tag1'][0]
-        tag2_id = [t['id'] for t in tags if t['name'] == 'Tag2'][0]
-        tag3_id = [t['id'] for t in tags if t['name'] == 'Tag3'][0]
+    tag1_id, tag2_id, tag3_id = create_tags(['Tag1', 'Tag2', 'Tag3'])
 
     # Create bookmark with Tag1 and Tag2
-    bookmark_data = {
-        'url': 'https://example.com',
-        'title': 'Example',
-        'tag_ids': [tag1_id, tag2_id]
-    }
-    client.post('/bookmark/save', data=bookmark_data, headers=auth_headers)
-
-    # Get bookmark ID
-    with app.app_context():
-        from app.services import bookmark_service
-        bookmarks = bookmark_service.get_all_bookmarks()
-        bookmark_id = bookmarks['bookmarks'][0]['id']
+    bookmark_id, = create_bookmarks([{'url': 'https://example.com', 'title': 'Example', 'tag_ids': [tag1_id, tag2_id]}])
 
     # Update to Tag2 and Tag3 (remove Tag1, add Tag3)
     updated_data = {
@@ -235,7 +171,8 @@ def test_bookmark_tag_association_update(client, auth_headers, app):
         'title': 'Example',
         'tag_ids': [tag2_id, tag3_id]
     }
-    client.post('/bookmark/save', data=updated_data, headers=auth_headers)
+    response = client.post('/bookmark/save', data=updated_data, headers=auth_headers)
+    assert response.status_code == 302
 
     # Verify tag associations
     with app.app_context():
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_app_creation(app):
     assert app is not None
     assert app.config['TESTING'] is True
@@ -25,6 +28,18 @@ def test_auth_success(client, auth_headers):
     assert response.status_code == 200
 
 
+def test_auth_wrong_password(client):
+    import base64
+    credentials = base64.b64encode('test:wrong-pässword'.encode('utf-8')).decode('utf-8')
+    response = client.get('/', headers={'Authorization': f'Basic {credentials}'})
+    assert response.status_code == 401
+
+
+def test_auth_non_basic_scheme(client):
+    response = client.get('/', headers={'Authorization': 'Bearer some-token'})
+    assert response.status_code == 401
+
+
 def test_create_folder(client, auth_headers, app):
     response = client.post('/folder/save', data={'name': 'Test Folder'}, headers=auth_headers, follow_redirects=False)
     assert response.status_code == 302
@@ -230,6 +245,9 @@ def test_robots_txt(client):
     response = client.get('/robots.txt')
     assert response.status_code == 200
     assert response.mimetype == 'text/plain'
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 2592000
+    assert response.cache_control.immutable
 
 
 def test_favicon_ico(client):
@@ -266,22 +284,25 @@ def test_live_search_empty_query(client, auth_headers, app):
     assert json_data['bookmarks'] == []
 
 
-def test_add_bookmark_form(client, auth_headers, app):
-    """Test add bookmark form page"""
-    response = client.get('/bookmark/add', headers=auth_headers)
-    assert response.status_code == 200
-
-
-def test_add_bookmark_form_with_folder(client, auth_headers, app):
-    """Test add bookmark form with folder parameter"""
-    client.post('/folder/save', data={'name': 'Test Folder'}, headers=auth_headers)
-    response = client.get('/bookmark/add?folder=1', headers=auth_headers)
-    assert response.status_code == 200
-
-
-def test_add_bookmark_form_with_url_and_title(client, auth_headers, app):
-    """Test add bookmark form with url and title parameters"""
-    response = client.get('/bookmark/add?url=https://example.com&title=Example', headers=auth_headers)
+@pytest.fixture
+def form_folder_id(app):
+    """Folder referenced by the add form pages"""
+    with app.app_context():
+        from app.services import folder_service
+        return folder_service.create_folder('Test Folder')
+
+
+@pytest.mark.parametrize('path', [
+    '/bookmark/add',
+    '/bookmark/add?folder={folder_id}',
+    '/bookmark/add?url=https://example.com&title=Example',
+    '/folder/add',
+    '/folder/add?parent={folder_id}',
+    '/tag/add'
+], ids=['bookmark', 'bookmark_with_folder', 'bookmark_with_url_and_title', 'folder', 'folder_with_parent', 'tag'])
+def test_add_form(client, auth_headers, form_folder_id, path):
+    """Test add bookmark, folder, and tag form pages with optional parameters"""
+    response = client.get(path.format(folder_id=form_folder_id), headers=auth_headers)
     assert response.status_code == 200
 
 
@@ -302,19 +323,6 @@ def test_edit_bookmark_form_not_found(client, auth_headers, app):
     assert response.location == '/'
 
 
-def test_add_folder_form(client, auth_headers, app):
-    """Test add folder form page"""
-    response = client.get('/folder/add', headers=auth_headers)
-    assert response.status_code == 200
-
-
-def test_add_folder_form_with_parent(client, auth_headers, app):
-    """Test add folder form with parent parameter"""
-    client.post('/folder/save', data={'name': 'Parent Folder'}, headers=auth_headers)
-    response = client.get('/folder/add?parent=1', headers=auth_headers)
-    assert response.status_code == 200
-
-
 def test_edit_folder_form(client, auth_headers, app):
     """Test edit folder form page"""
     with app.app_context():
@@ -347,12 +355,6 @@ def test_update_folder_circular_reference(client, auth_headers, app):
     assert response.status_code == 400
 
 
-def test_add_tag_form(client, auth_headers, app):
-    """Test add tag form page"""
-    response = client.get('/tag/add', headers=auth_headers)
-    assert response.status_code == 200
-
-
 def test_edit_tag_form(client, auth_headers, app):
     """Test edit tag form page"""
     with app.app_context():
@@ -367,4 +369,153 @@ def test_edit_tag_form_not_found(client, auth_headers, app):
     """Test edit tag form with non-existent tag"""
     response = client.get('/tag/nonexistent-id/edit', headers=auth_headers, follow_redirects=False)
     assert response.status_code == 302
-    assert response.location == '/'
\ No newline at end of file
+    assert response.location == '/'
+
+
+def test_sidebar_cache_invalidated_on_write(client, auth_headers, app):
+    """Test that the cached sidebar fragment is refreshed after a folder is created"""
+    response = client.get('/', headers=auth_headers)
+    assert b'Cached Sidebar Folder' not in response.data
+
+    with app.app_context():
+        from app.services import folder_service
+        folder_service.create_folder('Cached Sidebar Folder')
+
+    response = client.get('/', headers=auth_headers)
+    assert b'Cached Sidebar Folder' in response.data
+
+
+def test_sidebar_cache_per_host(client, auth_headers):
+    """Test that the cached bookmarklet links to the host the page was requested from"""
+    for base_url in ('http://first.example', 'https://second.example'):
+        response = client.get('/', headers=auth_headers, base_url=base_url)
+        assert f"'{base_url}/bookmark/add?url=".encode() in response.data
+
+
+def test_templates_preloaded_without_auto_reload(app):
+    """Test that templates are compiled at startup and not re-checked on render"""
+    assert app.jinja_env.auto_reload is False
+    assert any(name == 'index.html' for _, name in app.jinja_env.cache.keys())
+
+
+def test_export_firefox_streamed(client, auth_headers, app):
+    """Test that the Firefox export is streamed as a valid JSON attachment"""
+    with app.app_context():
+        from app.services import bookmark_service
+        bookmark_service.create_bookmark('https://example.com', 'Example ü', '', None, [])
+
+    response = client.get('/export/firefox', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename=bookmarks.json'
+    data = response.get_json()
+    assert data['children'][0]['children'][0]['title'] == 'Example ü'
+
+
+def test_import_firefox_invalid_encoding(client, auth_headers, app):
+    """Test importing a Firefox JSON file that is not valid UTF-8"""
+    from io import BytesIO
+    data = {'file': (BytesIO(b'{"title": "\xff\xfe\xfa"}'), 'bookmarks.json')}
+    response = client.post('/import/firefox', data=data, headers=auth_headers, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert b'Invalid file encoding' in response.data
+
+
+def test_orjson_provider(app):
+    """Test that the app serializes and parses JSON with the orjson provider"""
+    from app.utils.json_provider import OrjsonProvider
+    assert isinstance(app.json, OrjsonProvider)
+    assert app.json.dumps({'b': 1, 'a': 'ü'}) == '{"a":"ü","b":1}'
+    assert app.json.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+
+
+def test_live_search_cache_invalidated_on_write(client, auth_headers, app):
+    """Test that cached live search results include bookmarks added afterwards"""
+    response = client.get('/api/search?q=cached', headers=auth_headers)
+    assert response.get_json()['bookmarks'] == []
+
+    with app.app_context():
+        from app.services import bookmark_service
+        bookmark_service.create_bookmark('https://cached.example.com', 'Cached Result', '', None, [])
+
+    response = client.get('/api/search?q=cached', headers=auth_headers)
+    assert [b['title'] for b in response.get_json()['bookmarks']] == ['Cached Result']
+
+
+def test_security_headers(client):
+    """Test that security headers are added to responses"""
+    response = client.get('/robots.txt')
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert response.headers['X-Frame-Options'] == 'DENY'
+    assert "frame-ancestors 'none'" in response.headers['Content-Security-Policy']
+
+
+def test_index_conditional_get(client, auth_headers, app):
+    """Test that the index page answers If-None-Match with 304 until data changes"""
+    response = client.get('/', headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    response = client.get('/', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    client.post('/folder/save', data={'name': 'Changed'}, headers=auth_headers)
+    response = client.get('/', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_database_pragmas(app):
+    """Test that the database uses the configured journal mode and synchronous level"""
+    from config import Config
+    # The tests run with synchronous=OFF, the default is NORMAL
+    assert Config.SQLITE_SYNCHRONOUS == 'NORMAL'
+    app.config['SQLITE_SYNCHRONOUS'] = Config.SQLITE_SYNCHRONOUS
+    with app.app_context():
+        from app.utils.database import get_db
+        db = get_db()
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert db.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert db.execute('PRAGMA temp_store').fetchone()[0] == 2
+        assert db.execute('PRAGMA cache_size').fetchone()[0] == -20000
+        assert db.execute('PRAGMA foreign_keys').fetchone()[0] == 0
+
+
+def test_database_connection_pool(app):
+    """Test that connections are reused across app contexts outside of testing"""
+    from flask import g
+    from app.utils.database import get_db
+    app.config['TESTING'] = False
+    try:
+        with app.app_context():
+            first = get_db()
+            first.execute('BEGIN')
+            first.execute("INSERT INTO tags (id, name) VALUES ('t1', 'open')")
+        with app.app_context():
+            second = get_db()
+            assert second is first
+            # Uncommitted work of the previous context was rolled back
+            assert not second.in_transaction
+            assert second.execute("SELECT COUNT(*) FROM tags WHERE id = 't1'").fetchone()[0] == 0
+            assert second.execute('PRAGMA temp_store').fetchone()[0] == 2
+            # Take the connection out of the pool so it is not leaked to later tests
+            g.pop('db_pool')
+            second.close()
+    finally:
+        app.config['TESTING'] = True
+
+
+def test_response_compression(client, auth_headers, app):
+    """Test that HTML pages are compressed and still answer conditional GETs"""
+    headers = {**auth_headers, 'Accept-Encoding': 'gzip'}
+    response = client.get('/', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    import gzip
+    assert b'All Bookmarks' in gzip.decompress(response.data)
+
+    response = client.get('/', headers={**headers, 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
@@ -1,14 +1,47 @@
 import os
+import pytest
+import requests
 from unittest.mock import Mock, patch
 from io import BytesIO
 from PIL import Image
+from app.services import favicon_service
 from app.services.favicon_service import download_favicon, save_favicon
 
+# Valid 1x1 red PNG, for tests that only need an image the service accepts
+MINIMAL_PNG = bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de'
+                            '0000000c4944415478da63f8cfc0000003010100f70341430000000049454e44ae426082')
+
+
+@pytest.fixture(scope='module')
+def png_bytes():
+    """PNG encoded 100x100 test image that needs resizing, encoded once per module"""
+    img = Image.new('RGB', (100, 100), color='red')
+    img_bytes = BytesIO()
+    img.save(img_bytes, format='PNG')
+    return img_bytes.getvalue()
+
+
+def _mock_response(status_code, url, content=None, chunks=None, content_type=None):
+    """Build a mocked requests response"""
+    response = Mock(status_code=status_code, url=url, content=content)
+    response.headers = {'Content-Type': content_type} if content_type else {}
+    if chunks is not None:
+        response.iter_content.return_value = chunks
+    return response
+
+
+def _responses_by_url(responses):
+    """Build a side effect for _session.get that looks up responses by URL, 404 for any other URL"""
+    def get(url, **kwargs):
+        response = responses.get(url)
+        return response if response is not None else _mock_response(404, url)
+    return get
+
 
 class TestFaviconService:
     """Test favicon downloading and saving"""
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_success(self, mock_get, app):
         """Test successful favicon download"""
         with app.app_context():
@@ -24,7 +57,7 @@ class TestFaviconService:
                 result = download_favicon('https://example.com')
                 assert result == 'favicons/test.png'
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_failure(self, mock_get, app):
         """Test favicon download failure"""
         with app.app_context():
@@ -32,7 +65,35 @@ class TestFaviconService:
             result = download_favicon('https://example.com')
             assert result is None
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
+    def test_download_favicon_skips_recently_failed_domain(self, mock_get, app):
+        """Test that a domain without a favicon is not probed again within the TTL"""
+        with app.app_context():
+            app.config['FAVICON_NEGATIVE_CACHE_TTL'] = 60
+            mock_response = Mock()
+            mock_response.status_code = 404
+            mock_get.return_value = mock_response
+
+            assert download_favicon('https://dead.example.com/a') is None
+            calls = mock_get.call_count
+            assert calls > 0
+            assert download_favicon('https://dead.example.com/b') is None
+            assert mock_get.call_count == calls
+
+    @patch('app.services.favicon_service._session.get')
+    def test_download_favicon_retries_after_request_errors(self, mock_get, app):
+        """Test that timeouts and connection errors are not remembered as a missing favicon"""
+        with app.app_context():
+            app.config['FAVICON_NEGATIVE_CACHE_TTL'] = 60
+            mock_get.side_effect = requests.exceptions.Timeout('timed out')
+
+            assert download_favicon('https://flaky.example.com/a') is None
+            calls = mock_get.call_count
+            assert calls > 0
+            assert download_favicon('https://flaky.example.com/b') is None
+            assert mock_get.call_count == 2 * calls
+
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_404(self, mock_get, app):
         """Test favicon download with 404 response"""
         with app.app_context():
@@ -46,37 +107,57 @@ class TestFaviconService:
     def test_save_favicon_success(self, app):
         """Test saving a valid favicon"""
         with app.app_context():
-            # Create a simple test image
-            img = Image.new('RGB', (100, 100), color='red')
-            img_bytes = BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-
-            result = save_favicon(img_bytes.getvalue(), 'example.com')
+            result = save_favicon(MINIMAL_PNG, 'example.com')
             assert result is not None
             assert 'favicons/' in result
             assert 'example.com.png' in result
 
+    @pytest.mark.benchmark(group='favicon')
+    def test_save_favicon_benchmark(self, benchmark, app, png_bytes):
+        """Benchmark decoding, resizing, and writing a favicon"""
+        with app.app_context():
+            def setup():
+                # Forget the saved icon so every round decodes instead of copying
+                favicon_service._content_cache.clear()
+                return (png_bytes, 'example.com'), {}
+
+            result = benchmark.pedantic(save_favicon, setup=setup, rounds=50)
+            assert result == 'favicons/example.com.png'
+
+    def test_save_favicon_reuses_identical_content(self, app):
+        """Test that identical favicon bytes are copied instead of decoded again"""
+        with app.app_context():
+            assert save_favicon(MINIMAL_PNG, 'cdn-one.example.com') == 'favicons/cdn-one.example.com.png'
+            with patch('app.services.favicon_service.Image.open') as mock_open:
+                assert save_favicon(MINIMAL_PNG, 'cdn-two.example.com') == 'favicons/cdn-two.example.com.png'
+                mock_open.assert_not_called()
+
+            favicon_dir = app.config['FAVICON_CACHE_DIR']
+            assert os.path.exists(os.path.join(favicon_dir, 'cdn-two.example.com.png'))
+
     def test_save_favicon_invalid_image(self, app):
         """Test saving invalid image data"""
         with app.app_context():
             result = save_favicon(b'not_an_image', 'example.com')
             assert result is None
 
+    def test_save_favicon_rejects_non_image_without_decoding(self, app):
+        """Test that bodies without an image signature are rejected before PIL"""
+        with app.app_context():
+            with patch('app.services.favicon_service.Image.open') as mock_open:
+                assert save_favicon(b'<!DOCTYPE html><html>Not found</html>', 'example.com') is None
+                assert save_favicon(b'<svg xmlns="http://www.w3.org/2000/svg"></svg>', 'example.com') is None
+                mock_open.assert_not_called()
+
     def test_save_favicon_sanitizes_domain(self, app):
         """Test that domain names are sanitized"""
         with app.app_context():
-            img = Image.new('RGB', (100, 100), color='blue')
-            img_bytes = BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-
-            result = save_favicon(img_bytes.getvalue(), 'example.com:8080/path')
+            result = save_favicon(MINIMAL_PNG, 'example.com:8080/path')
             assert result is not None
             assert ':' not in result
             assert '/' not in result.split('/')[-1]
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_malformed_url(self, mock_get, app):
         """Test favicon download with malformed URL"""
         with app.app_context():
@@ -87,62 +168,69 @@ class TestFaviconService:
         """Test favicon download when URL parsing fails"""
         with app.app_context():
             # Pass None or an invalid type that will cause urlparse to fail
-            with patch('app.services.favicon_service.urlparse', side_effect=Exception("Parse error")):
+            with patch('app.services.favicon_service.urlsplit', side_effect=Exception("Parse error")):
                 result = download_favicon('https://example.com')
                 assert result is None
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_from_html(self, mock_get, app):
         """Test favicon download discovered from HTML <link> tags"""
         with app.app_context():
-            # Mock responses for different calls
-            def side_effect(url, **kwargs):
-                mock_resp = Mock()
-                if url.endswith('favicon.ico') or url.endswith('apple-touch-icon.png') or url.endswith('favicon.png'):
-                    mock_resp.status_code = 404
-                    mock_resp.url = url
-                elif url == 'https://example.com':
-                    mock_resp.status_code = 200
-                    mock_resp.url = url
-                    mock_resp.text = '<html><head><link rel="shortcut icon" href="/path/to/custom.ico"></head></html>'
-                    mock_resp.headers = {'Content-Type': 'text/html'}
-                elif url == 'https://example.com/path/to/custom.ico':
-                    mock_resp.status_code = 200
-                    mock_resp.url = url
-                    mock_resp.content = b'custom_favicon_data'
-                    mock_resp.headers = {'Content-Type': 'image/png'}
-                else:
-                    mock_resp.status_code = 404
-                    mock_resp.url = url
-                return mock_resp
-
-            mock_get.side_effect = side_effect
+            # Mock responses for different calls, the default favicon paths return 404
+            mock_get.side_effect = _responses_by_url({
+                'https://example.com': _mock_response(
+                    200, 'https://example.com',
+                    chunks=[b'<html><head><link rel="shortcut icon" href="/path/to/custom.ico"></head></html>'],
+                    content_type='text/html'),
+                'https://example.com/path/to/custom.ico': _mock_response(
+                    200, 'https://example.com/path/to/custom.ico', content=b'custom_favicon_data', content_type='image/png')
+            })
 
             with patch('app.services.favicon_service.save_favicon', return_value='favicons/custom.png'):
                 result = download_favicon('https://example.com')
                 assert result == 'favicons/custom.png'
 
-    @patch('app.services.favicon_service.requests.get')
+    @patch('app.services.favicon_service._session.get')
+    def test_download_favicon_from_html_ignores_body(self, mock_get, app):
+        """Test that icon links match rel case-insensitively and only in <head>"""
+        with app.app_context():
+            page = (b'<html><head><link rel="stylesheet" href="/style.css">'
+                    b'<link rel="Apple-Touch-Icon" href="/touch.png"></head>'
+                    b'<body><link rel="icon" href="/body.ico"></body></html>')
+
+            mock_get.side_effect = _responses_by_url({
+                'https://example.com': _mock_response(200, 'https://example.com', chunks=[page[:40], page[40:]],
+                                                      content_type='text/html; charset=utf-8')
+            })
+            download_favicon('https://example.com')
+
+            requested = [call.args[0] for call in mock_get.call_args_list]
+            assert 'https://example.com/touch.png' in requested
+            assert 'https://example.com/style.css' not in requested
+            assert 'https://example.com/body.ico' not in requested
+
+    def test_resolve_href(self):
+        """Test icon href resolution for absolute, protocol-relative, and relative links"""
+        from app.services.favicon_service import _resolve_href
+        page = 'https://example.com/docs/page.html'
+        base = 'https://example.com'
+        assert _resolve_href('//cdn.example.net/i.png', page, 'https', base) == 'https://cdn.example.net/i.png'
+        assert _resolve_href('/icon.png', page, 'https', base) == 'https://example.com/icon.png'
+        assert _resolve_href('http://other.org/i.ico', page, 'https', base) == 'http://other.org/i.ico'
+        assert _resolve_href('img/icon.png', page, 'https', base) == 'https://example.com/docs/img/icon.png'
+        assert _resolve_href('../icon.png', page, 'https', base) == 'https://example.com/icon.png'
+
+    @patch('app.services.favicon_service._session.get')
     def test_download_favicon_with_redirect(self, mock_get, app):
         """Test favicon download with a redirect and domain update"""
         with app.app_context():
-            def side_effect(url, **kwargs):
-                mock_resp = Mock()
-                if url == 'http://old.com':
-                    mock_resp.status_code = 200
-                    mock_resp.url = 'https://new.com/login'
-                    mock_resp.text = '<html><head></head><body>No icon tags here</body></html>'
-                    mock_resp.headers = {'Content-Type': 'text/html'}
-                elif url == 'https://new.com/favicon.ico':
-                    mock_resp.status_code = 200
-                    mock_resp.url = 'https://new.com/favicon.ico'
-                    mock_resp.content = b'fake_favicon_data'
-                    mock_resp.headers = {'Content-Type': 'image/x-icon'}
-                else:
-                    mock_resp.status_code = 404
-                return mock_resp
-
-            mock_get.side_effect = side_effect
+            mock_get.side_effect = _responses_by_url({
+                'http://old.com': _mock_response(
+                    200, 'https://new.com/login',
+                    chunks=[b'<html><head></head><body>No icon tags here</body></html>'], content_type='text/html'),
+                'https://new.com/favicon.ico': _mock_response(
+                    200, 'https://new.com/favicon.ico', content=b'fake_favicon_data', content_type='image/x-icon')
+            })
 
             with patch('app.services.favicon_service.save_favicon', return_value='favicons/new.png'):
                 result = download_favicon('http://old.com')
@@ -156,6 +244,26 @@ class TestFaviconService:
                         break
                 assert found_new_com_search, "Strategy 2 should have searched on new.com"
 
+    @patch('app.services.favicon_service._session.get')
+    def test_download_favicon_reuses_domain_result(self, mock_get, app):
+        """Test that a second URL on the same domain does not hit the network"""
+        with app.app_context():
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.url = 'https://reuse.example.com/a'
+            mock_response.content = MINIMAL_PNG
+            mock_response.headers = {'Content-Type': 'image/png'}
+            mock_get.return_value = mock_response
+
+            first = download_favicon('https://reuse.example.com/a')
+            calls = mock_get.call_count
+            second = download_favicon('https://reuse.example.com/b')
+
+            assert first == 'favicons/reuse.example.com.png'
+            assert second == first
+            assert mock_get.call_count == calls
+
+    @pytest.mark.network
     def test_download_favicon_real_nkn_it(self, app):
         """Test real favicon download for nkn-it.de"""
         with app.app_context():
@@ -168,3 +276,54 @@ class TestFaviconService:
             favicon_dir = app.config['FAVICON_CACHE_DIR']
             filepath = os.path.join(favicon_dir, 'www.nkn-it.de.png')
             assert os.path.exists(filepath)
+
+    def test_schedule_favicon_download_in_background(self, app):
+        """Test that a background favicon download is attached to the bookmark"""
+        with app.app_context():
+            from app.services import bookmark_service
+            from app.services.favicon_service import schedule_favicon_download
+            bookmark_id = bookmark_service.create_bookmark('https://example.com', 'Example', '', None, [])
+
+            app.config['FAVICON_ASYNC'] = True
+            with patch('app.services.favicon_service.download_favicon', return_value='favicons/example.com.png'):
+                future = schedule_favicon_download(bookmark_id, 'https://example.com')
+                assert future is not None
+                future.result(timeout=5)
+
+            assert bookmark_service.get_bookmark(bookmark_id)['favicon'] == 'favicons/example.com.png'
+
+    def test_schedule_favicon_downloads_in_background(self, app):
+        """Test that a batch of favicons is downloaded on the app's executor and attached"""
+        with app.app_context():
+            from app.services import bookmark_service
+            from app.services.favicon_service import schedule_favicon_downloads
+            first_id = bookmark_service.create_bookmark('https://example.com/a', 'A', '', None, [])
+            second_id = bookmark_service.create_bookmark('https://missing.example.org', 'B', '', None, [])
+
+            def fake_download(url):
+                return 'favicons/example.com.png' if 'example.com' in url else None
+
+            app.config['FAVICON_ASYNC'] = True
+            with patch('app.services.favicon_service.download_favicon', side_effect=fake_download):
+                future = schedule_favicon_downloads([(first_id, 'https://example.com/a'),
+                                                     (second_id, 'https://missing.example.org')])
+                assert future is not None
+                future.result(timeout=5)
+
+            assert bookmark_service.get_bookmark(first_id)['favicon'] == 'favicons/example.com.png'
+            assert bookmark_service.get_bookmark(second_id)['favicon'] is None
+
+    def test_background_favicon_job_failure_is_logged(self, app):
+        """Test that an exception in a background favicon job is logged"""
+        with app.app_context():
+            from app.services.favicon_service import schedule_favicon_download
+
+            app.config['FAVICON_ASYNC'] = True
+            with patch('app.services.favicon_service.download_favicon', side_effect=RuntimeError('boom')), \
+                    patch.object(app.logger, 'exception') as log_exception:
+                future = schedule_favicon_download(1, 'https://example.com')
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=5)
+
+            log_exception.assert_called_once()
+            assert '_attach_favicon' in log_exception.call_args[0][0]
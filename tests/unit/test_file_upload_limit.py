@@ -1,6 +1,9 @@
 """Test file upload size limit."""
 from io import BytesIO
 
+# A document larger than 128 KB, built once for the module
+OVERSIZE_CONTENT = b'{"test": "' + (b'x' * 130 * 1024) + b'"}'
+
 
 def test_max_content_length_configured(app):
     """Test that MAX_CONTENT_LENGTH is configured to 128 KB."""
@@ -9,11 +12,8 @@ def test_max_content_length_configured(app):
 
 def test_import_firefox_file_too_large(client, auth_headers):
     """Test that files larger than 128 KB are rejected."""
-    # Create a file larger than 128 KB
-    large_content = b'{"test": "' + (b'x' * 130 * 1024) + b'"}'
-
     data = {
-        'file': (BytesIO(large_content), 'large.json')
+        'file': (BytesIO(OVERSIZE_CONTENT), 'large.json')
     }
 
     response = client.post('/import/firefox',
@@ -1,5 +1,8 @@
 import pytest
+import sys
 import json
+import orjson
+import uuid
 from app.services import firefox_service, bookmark_service, folder_service, tag_service
 from app.utils.database import get_db
 
@@ -47,6 +50,26 @@ def test_export_to_firefox_json(app):
         assert bookmarks_found[0]['title'] == 'Example'
 
 
+def test_export_tags_and_nested_folder_order(app):
+    """Test exported tag lists and folders whose parent sorts after them."""
+    with app.app_context():
+        parent_id = folder_service.create_folder('Zeta', None)
+        child_id = folder_service.create_folder('Alpha', parent_id)
+        tag_b = tag_service.create_tag('beta')
+        tag_a = tag_service.create_tag('alpha')
+        bookmark_service.create_bookmark('https://tagged.com', 'Tagged', '', child_id, [tag_b, tag_a])
+        bookmark_service.create_bookmark('https://plain.com', 'Plain', '', None, [])
+
+        toolbar = firefox_service.export_to_firefox_json()['children'][0]
+        zeta = next(node for node in toolbar['children'] if node.get('title') == 'Zeta')
+        alpha = zeta['children'][0]
+        assert alpha['title'] == 'Alpha'
+        assert alpha['children'][0]['tags'] == 'alpha,beta'
+
+        plain = next(node for node in toolbar['children'] if node.get('title') == 'Plain')
+        assert 'tags' not in plain
+
+
 def test_import_from_firefox_json(app):
     """Test importing bookmarks from Firefox JSON format."""
     with app.app_context():
@@ -127,6 +150,16 @@ def test_parse_firefox_json_invalid(app):
             firefox_service.parse_firefox_json('not valid json')
 
 
+def test_parse_firefox_json_fallback_encodings(app):
+    """Test parsing input that orjson rejects but json accepts."""
+    document = '{"guid": "root________", "children": []}'
+    with app.app_context():
+        for content in (document.encode('utf-16'), b'\xef\xbb\xbf' + document.encode('utf-8')):
+            with pytest.raises(ValueError):
+                orjson.loads(content)
+            assert firefox_service.parse_firefox_json(content)['guid'] == 'root________'
+
+
 def test_import_nested_folders(app):
     """Test importing nested folder structure."""
     with app.app_context():
@@ -197,3 +230,114 @@ def test_import_bookmark_without_folder(app):
         bookmark = db.execute('SELECT * FROM bookmarks WHERE url = ?', ('https://unfiled.com',)).fetchone()
         assert bookmark is not None
         assert bookmark['folder_id'] is None
+
+
+def test_import_downloads_favicons_once_per_domain(app, monkeypatch):
+    """Test that imported bookmarks get favicons with one download per domain."""
+    from app.services import favicon_service
+
+    calls = []
+
+    def fake_download_favicon(url):
+        calls.append(url)
+        return 'favicons/example.com.png' if 'example.com' in url else None
+
+    monkeypatch.setattr(favicon_service, 'download_favicon', fake_download_favicon)
+
+    with app.app_context():
+        firefox_data = {
+            'guid': 'root________',
+            'type': 'text/x-moz-place-container',
+            'children': [
+                {'title': 'One', 'type': 'text/x-moz-place', 'uri': 'https://example.com/one'},
+                {'title': 'Two', 'type': 'text/x-moz-place', 'uri': 'https://example.com/two'},
+                {'title': 'Other', 'type': 'text/x-moz-place', 'uri': 'https://other.org/'}
+            ]
+        }
+
+        stats = firefox_service.import_from_firefox_json(firefox_data)
+        assert stats['bookmarks'] == 3
+        assert sorted(calls) == ['https://example.com/one', 'https://other.org/']
+
+        db = get_db()
+        favicons = dict(db.execute('SELECT url, favicon FROM bookmarks').fetchall())
+        assert favicons == {
+            'https://example.com/one': 'favicons/example.com.png',
+            'https://example.com/two': 'favicons/example.com.png',
+            'https://other.org/': None
+        }
+
+
+def test_import_is_rolled_back_on_error(app):
+    """Test that a failing import leaves no partially imported data."""
+    with app.app_context():
+        firefox_data = {
+            'guid': 'root________',
+            'type': 'text/x-moz-place-container',
+            'children': [{
+                'guid': 'folder1',
+                'title': 'Partial',
+                'type': 'text/x-moz-place-container',
+                'children': [
+                    {'title': 'Good', 'type': 'text/x-moz-place', 'uri': 'https://good.com', 'tags': 'new'},
+                    {'title': 'Bad', 'type': 'text/x-moz-place', 'uri': 'https://bad.com', 'tags': 42}
+                ]
+            }]
+        }
+
+        with pytest.raises(TypeError):
+            firefox_service.import_from_firefox_json(firefox_data)
+
+        db = get_db()
+        assert db.execute('SELECT COUNT(*) FROM bookmarks').fetchone()[0] == 0
+        assert db.execute('SELECT COUNT(*) FROM folders').fetchone()[0] == 0
+        assert db.execute('SELECT COUNT(*) FROM tags').fetchone()[0] == 0
+
+
+def test_iter_firefox_json_round_trip(app, monkeypatch):
+    """Test that the chunked export encoder produces the same document."""
+    monkeypatch.setattr(firefox_service, 'EXPORT_CHUNK_SIZE', 16)
+    root = {
+        'guid': 'root________',
+        'type': 'text/x-moz-place-container',
+        'children': [
+            {'children': []},
+            {'guid': 'f1', 'title': 'Ordner ü', 'type': 'text/x-moz-place-container', 'children': [
+                {'guid': 'b1', 'title': 'One', 'type': 'text/x-moz-place', 'uri': 'https://one.com', 'tags': 'a,b'},
+                {'guid': 'b2', 'title': 'Two', 'type': 'text/x-moz-place', 'uri': 'https://two.com'}
+            ]}
+        ]
+    }
+
+    chunks = list(firefox_service.iter_firefox_json(root))
+    assert len(chunks) > 1
+    assert json.loads(b''.join(chunks)) == root
+
+
+def test_deep_folder_tree_export_and_import(app, monkeypatch):
+    """Test that folder trees deeper than the recursion limit export and import."""
+    depth = 100
+    folder_ids = [str(uuid.uuid4()) for _ in range(depth)]
+    with app.app_context():
+        folder_service.create_folders_bulk(
+            [(f'Level {level}', folder_ids[level - 1] if level else None) for level in range(depth)], folder_ids)
+        bookmark_service.create_bookmark('https://deep.example.com', 'Deep', '', folder_ids[-1], [])
+
+        # Leave room for the calls below, but not for one frame per folder level
+        frame, stack_depth = sys._getframe(), 0
+        while frame:
+            frame, stack_depth = frame.f_back, stack_depth + 1
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(stack_depth + depth // 2)
+        try:
+            root = firefox_service.export_to_firefox_json()
+            exported = b''.join(firefox_service.iter_firefox_json(root))
+            get_db().execute('DELETE FROM folders')
+            get_db().execute('DELETE FROM bookmarks')
+            result = firefox_service.import_from_firefox_json(root)
+        finally:
+            sys.setrecursionlimit(limit)
+
+        assert exported.count(b'"children":[') == depth + 2
+        assert b'https://deep.example.com' in exported
+        assert result == {'bookmarks': 1, 'folders': depth, 'tags': 0}
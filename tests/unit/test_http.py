@@ -0,0 +1,33 @@
+from unittest.mock import Mock
+from app.utils.http import HTML_CHUNK_SIZE, create_session, read_html_head
+
+
+def test_read_html_head_stops_early():
+    """Test that the page is read only up to </head> or the size limit"""
+    response = Mock()
+    response.iter_content.return_value = iter([b'<html><head></head>', b'<body>', b'never read'])
+    assert read_html_head(response, 1024) == b'<html><head></head>'
+    assert list(response.iter_content.return_value) == [b'<body>', b'never read']
+    response.iter_content.assert_called_once_with(HTML_CHUNK_SIZE)
+
+    response.iter_content.return_value = iter([b'x' * 1024, b'y'])
+    assert len(read_html_head(response, 1024)) == 1024
+    assert list(response.iter_content.return_value) == [b'y']
+
+
+def test_read_html_head_finds_tag_split_across_chunks():
+    """Test that a </head> split between two chunks is found"""
+    response = Mock()
+    response.iter_content.return_value = iter([b'<head>' + b'x' * 100 + b'</he', b'ad><body>', b'never read'])
+    assert read_html_head(response, 1024) == b'<head>' + b'x' * 100 + b'</head>'
+    assert list(response.iter_content.return_value) == [b'never read']
+
+
+def test_create_session_pools_connections():
+    """Test that sessions send the given headers and share one pooled adapter"""
+    session = create_session({'User-Agent': 'Test'}, pool_size=4, max_retries=1)
+    assert session.headers['User-Agent'] == 'Test'
+    adapter = session.get_adapter('https://example.com')
+    assert adapter is session.get_adapter('http://example.com')
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 1
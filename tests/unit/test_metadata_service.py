@@ -1,9 +1,11 @@
 import requests
 from unittest.mock import Mock, patch
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from app.services.metadata_service import (
+    MAX_HTML_BYTES,
     fetch_page_metadata,
-    extract_title
+    extract_title,
+    extract_title_fast
 )
 
 
@@ -13,22 +15,19 @@ class TestMetadataService:
     def test_extract_title_from_og_tag(self):
         """Test extracting title from Open Graph meta tag"""
         html = '<html><head><meta property="og:title" content="OG Title"></head></html>'
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title == "OG Title"
 
     def test_extract_title_from_twitter_tag(self):
         """Test extracting title from Twitter meta tag"""
         html = '<html><head><meta name="twitter:title" content="Twitter Title"></head></html>'
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title == "Twitter Title"
 
     def test_extract_title_from_title_tag(self):
         """Test extracting title from title tag"""
         html = '<html><head><title>Page Title</title></head></html>'
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title == "Page Title"
 
     def test_extract_title_prefers_og_over_twitter(self):
@@ -37,31 +36,50 @@ class TestMetadataService:
             <meta property="og:title" content="OG Title">
             <meta name="twitter:title" content="Twitter Title">
         </head></html>'''
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title == "OG Title"
 
+    def test_extract_title_prefers_og_in_any_position(self):
+        """Test that the preference order does not depend on the order in the document"""
+        html = '''<html><head>
+            <title>Page Title</title>
+            <meta name="twitter:title" content="Twitter Title">
+            <meta property="og:title" content="OG Title">
+        </head></html>'''
+        title = extract_title(lxml_html.fromstring(html))
+        assert title == "OG Title"
+
+    def test_extract_title_fast(self):
+        """Test the byte-level title extraction and its fallbacks to a full parse"""
+        assert extract_title_fast(b'<head><title> Fish &amp; Chips </title></head>') == 'Fish & Chips'
+        assert extract_title_fast(b'<title>Page</title><meta property="og:title" content="OG">') == 'OG'
+        assert extract_title_fast("<meta property='og:title' content='Caf\u00e9'>".encode()) == 'Caf\u00e9'
+        # Markup the patterns do not cover is left to extract_title()
+        assert extract_title_fast(b'<title>Page</title><meta name="twitter:title" content="Tw">') is None
+        assert extract_title_fast(b'<meta content="OG" property="og:title">') is None
+        assert extract_title_fast('<title>Caf\u00e9</title>'.encode('latin-1')) is None
+        assert extract_title_fast(b'<html><head></head></html>') is None
+
     def test_extract_title_strips_whitespace(self):
         """Test that title whitespace is stripped"""
         html = '<html><head><title>  Spaced Title  </title></head></html>'
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title == "Spaced Title"
 
     def test_extract_title_returns_none_when_missing(self):
         """Test that None is returned when no title found"""
         html = '<html><head></head></html>'
-        soup = BeautifulSoup(html, 'html.parser')
-        title = extract_title(soup)
+        title = extract_title(lxml_html.fromstring(html))
         assert title is None
 
-    @patch('app.services.metadata_service.requests.get')
+    @patch('app.services.metadata_service._session.get')
     def test_fetch_page_metadata_success(self, mock_get):
         """Test successful metadata fetch"""
         html = '<html><head><title>Test Page</title></head></html>'
         mock_response = Mock()
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
         mock_response.status_code = 200
-        mock_response.content = html.encode()
+        mock_response.iter_content.return_value = [html.encode()]
         mock_response.url = 'https://example.com'
         mock_get.return_value = mock_response
 
@@ -69,7 +87,58 @@ class TestMetadataService:
         assert result['success'] is True
         assert result['title'] == 'Test Page'
 
-    @patch('app.services.metadata_service.requests.get')
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_empty_page(self, mock_get):
+        """Test that an empty page succeeds without a title"""
+        mock_response = Mock()
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.iter_content.return_value = [b'  ']
+        mock_get.return_value = mock_response
+
+        result = fetch_page_metadata('https://example.com')
+        assert result == {'title': None, 'success': True}
+
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_without_elements(self, mock_get):
+        """Test that a page with only a doctype or a comment succeeds without a title"""
+        for body in (b'<!DOCTYPE html>', b'<!-- nothing here -->'):
+            mock_response = Mock()
+            mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+            mock_response.iter_content.return_value = [body]
+            mock_get.return_value = mock_response
+
+            result = fetch_page_metadata('https://example.com')
+            assert result == {'title': None, 'success': True}
+
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_uses_header_charset(self, mock_get):
+        """Test that UTF-8 bytes are decoded with the Content-Type charset when the page has no meta charset"""
+        pages = (
+            '<html><head><meta name="twitter:title" content="Café Zürich"></head></html>',
+            '<html><head><meta content="Café Zürich" property="og:title"></head></html>',
+        )
+        for html in pages:
+            mock_response = Mock()
+            mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+            mock_response.iter_content.return_value = [html.encode('utf-8')]
+            mock_get.return_value = mock_response
+
+            result = fetch_page_metadata('https://example.com')
+            assert result == {'title': 'Café Zürich', 'success': True}
+
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_skips_non_html(self, mock_get):
+        """Test that non-HTML responses are neither read nor parsed"""
+        mock_response = Mock()
+        mock_response.headers = {'Content-Type': 'application/pdf'}
+        mock_get.return_value = mock_response
+
+        result = fetch_page_metadata('https://example.com/file.pdf')
+        assert result == {'title': None, 'success': True}
+        mock_response.iter_content.assert_not_called()
+        mock_response.close.assert_called_once()
+
+    @patch('app.services.metadata_service._session.get')
     def test_fetch_page_metadata_failure(self, mock_get):
         """Test metadata fetch failure"""
         mock_get.side_effect = Exception("Connection error")
@@ -79,7 +148,7 @@ class TestMetadataService:
         assert 'error' in result
         assert result['title'] is None
 
-    @patch('app.services.metadata_service.requests.get')
+    @patch('app.services.metadata_service._session.get')
     def test_fetch_page_metadata_timeout(self, mock_get):
         """Test metadata fetch with timeout"""
         mock_get.side_effect = requests.exceptions.Timeout("Timeout")
@@ -87,3 +156,33 @@ class TestMetadataService:
         result = fetch_page_metadata('https://example.com')
         assert result['success'] is False
         assert 'Timeout' in result['error']
+
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_reads_at_most_max_bytes(self, mock_get):
+        """Test that large pages are only read up to MAX_HTML_BYTES"""
+        head = b'<html><head><title>Large Page</title>'
+        chunks = iter([head, b'x' * MAX_HTML_BYTES, b'never read'])
+        mock_response = Mock()
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.iter_content.return_value = chunks
+        mock_get.return_value = mock_response
+
+        result = fetch_page_metadata('https://example.com/large')
+        assert result['title'] == 'Large Page'
+        assert mock_get.call_args.kwargs['stream'] is True
+        assert list(chunks) == [b'never read']
+        mock_response.close.assert_called_once()
+
+    @patch('app.services.metadata_service._session.get')
+    def test_fetch_page_metadata_stops_at_head_end(self, mock_get):
+        """Test that the body is neither read nor parsed"""
+        chunks = iter([b'<html><head><meta name="twitter:title" content="Head Title"></he',
+                       b'ad><body><title>Body Title</title>', b'never read'])
+        mock_response = Mock()
+        mock_response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response.iter_content.return_value = chunks
+        mock_get.return_value = mock_response
+
+        result = fetch_page_metadata('https://example.com')
+        assert result['title'] == 'Head Title'
+        assert list(chunks) == [b'never read']
\ No newline at end of file
@@ -4,6 +4,8 @@ This module contains tests to verify that Flask-Limiter is properly configured
 and enforcing the default rate limit of 100 requests per minute.
 """
 
+import pytest
+
 
 def test_limiter_is_configured(app):
     """Test that Flask-Limiter is properly configured on the app.
@@ -55,39 +57,65 @@ def test_rate_limit_enforced_at_100_per_minute(client, auth_headers):
     assert response.status_code == 429, "Rate limit was not enforced at 101st request"
 
 
-def test_rate_limit_returns_429_when_exceeded(client, auth_headers):
+def _hit_rate_limit(app, auth_headers, count):
+    """Count requests against the test client's limit without sending them.
+
+    Args:
+        app: Flask application fixture
+        auth_headers: HTTP Basic Auth headers fixture
+        count (int): Number of requests to count; the first runs the
+            limiter's request check, which resolves the limit and key
+
+    Returns:
+        RequestLimit: Limit that applies to requests for the index
+    """
+    with app.test_request_context('/', headers=auth_headers):
+        app.preprocess_request()
+        current_limit = app.limiter.current_limit
+    if count > 1:
+        app.limiter.limiter.hit(current_limit.limit, *current_limit.request_args, cost=count - 1)
+    return current_limit
+
+
+def test_rate_limit_returns_429_when_exceeded(app, client, auth_headers):
     """Test that rate limit returns 429 status when exceeded.
 
     Args:
+        app: Flask application fixture
         client: Flask test client fixture
         auth_headers: HTTP Basic Auth headers fixture
 
     Verifies that Flask-Limiter properly returns HTTP 429 when
-    the rate limit is exceeded.
+    the rate limit is exceeded. The first 100 requests are counted
+    in the limiter storage; test_rate_limit_enforced_at_100_per_minute
+    sends all of them.
     """
     # Exhaust the rate limit with 100 requests
-    for i in range(100):
-        client.get('/', headers=auth_headers)
+    current_limit = _hit_rate_limit(app, auth_headers, 100)
+    assert current_limit.window.remaining == 0
 
     # Next request should return 429
     response = client.get('/', headers=auth_headers)
     assert response.status_code == 429
 
 
-def test_rate_limit_applies_to_single_endpoint(client, auth_headers):
+def test_rate_limit_applies_to_single_endpoint(app, client, auth_headers):
     """Test that rate limiting is enforced on a single endpoint.
 
     Args:
+        app: Flask application fixture
         client: Flask test client fixture
         auth_headers: HTTP Basic Auth headers fixture
 
-    Verifies that making 101 requests to the same endpoint triggers
-    the rate limit on the 101st request.
+    Verifies that after 99 counted requests to the same endpoint the
+    100th request still succeeds and the 101st triggers the rate limit.
     """
-    # Make 100 requests to the same endpoint
-    for i in range(100):
-        response = client.get('/', headers=auth_headers)
-        assert response.status_code == 200, f"Request {i + 1} failed unexpectedly"
+    # Count 99 requests to the same endpoint
+    _hit_rate_limit(app, auth_headers, 99)
+
+    # 100th request is still allowed
+    response = client.get('/', headers=auth_headers)
+    assert response.status_code == 200, "Request 100 failed unexpectedly"
 
     # 101st request should be rate limited
     response = client.get('/', headers=auth_headers)
@@ -104,3 +132,26 @@ def test_rate_limit_storage_configured(app):
     """
     assert 'RATELIMIT_STORAGE_URI' in app.config
     assert app.config['RATELIMIT_STORAGE_URI'] == 'memory://'
+
+
+def test_limiter_redis_storage_uses_shared_pool(tmp_path):
+    """Test that Redis rate limit storage is built on a bounded connection pool.
+
+    Args:
+        tmp_path: Pytest temporary directory fixture
+
+    No Redis server is needed since the pool only connects on first use.
+    """
+    pytest.importorskip('redis')
+
+    from app import create_app
+    from tests.conftest import TestConfig
+
+    class RedisConfig(TestConfig):
+        DATABASE_PATH = str(tmp_path / 'bookmarks.db')
+        RATELIMIT_STORAGE_URI = 'redis://localhost:6379'
+        RATELIMIT_STORAGE_MAX_CONNECTIONS = 4
+
+    app = create_app(RedisConfig)
+    pool = app.limiter.storage.storage.connection_pool
+    assert pool.max_connections == 4
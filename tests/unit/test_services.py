@@ -1,4 +1,7 @@
+import pytest
+import uuid
 from app.services import bookmark_service, folder_service, tag_service
+from app.utils.database import get_db
 
 
 def test_folder_service_create(app):
@@ -436,3 +439,360 @@ def test_database_teardown(app):
 
         # This should work without errors
         assert True
+
+
+def test_cached_hierarchy_and_tags_invalidated_on_write(app):
+    """Test that cached folder and tag lists are reloaded after writes"""
+    with app.app_context():
+        assert folder_service.get_folder_hierarchy() == []
+        assert tag_service.get_all_tags() == []
+
+        folder_id = folder_service.create_folder('Cached Folder')
+        tag_id = tag_service.create_tag('cached-tag')
+        assert [f['id'] for f in folder_service.get_folder_hierarchy()] == [folder_id]
+        assert [t['id'] for t in tag_service.get_all_tags()] == [tag_id]
+
+        bookmark_service.create_bookmark('https://example.com', 'Example', '', folder_id, [tag_id])
+        assert folder_service.get_folder_hierarchy()[0]['bookmark_count'] == 1
+        assert tag_service.get_all_tags()[0]['bookmark_count'] == 1
+
+
+def test_bookmark_service_duplicate_tag_ids(app):
+    """Test that duplicate tag IDs from a form are stored once"""
+    with app.app_context():
+        tag_id = tag_service.create_tag('dup')
+        bookmark_id = bookmark_service.create_bookmark('https://example.com', 'Example', '', None, [tag_id, tag_id])
+        assert [t['id'] for t in bookmark_service.get_bookmark(bookmark_id)['tags']] == [tag_id]
+
+        bookmark_service.update_bookmark(bookmark_id, 'https://example.com', 'Example', '', None, [tag_id, tag_id])
+        assert [t['id'] for t in bookmark_service.get_bookmark(bookmark_id)['tags']] == [tag_id]
+
+
+def test_find_folder_in_hierarchy(app):
+    """Test finding a folder with its parent chain in a loaded folder tree"""
+    with app.app_context():
+        root_id = folder_service.create_folder('Root')
+        child_id = folder_service.create_folder('Child', root_id)
+        grandchild_id = folder_service.create_folder('Grandchild', child_id)
+        folders = folder_service.get_folder_hierarchy()
+
+        found = folder_service.find_folder_in_hierarchy(folders, grandchild_id)
+        expected = folder_service.get_folder(grandchild_id)
+        assert found['name'] == expected['name'] == 'Grandchild'
+        assert [p['id'] for p in found['parent_chain']] == [p['id'] for p in expected['parent_chain']]
+        assert 'children' not in found
+
+        assert folder_service.find_folder_in_hierarchy(folders, root_id)['parent_chain'] == []
+        assert folder_service.find_folder_in_hierarchy(folders, 'missing') is None
+
+
+def test_bookmark_service_search_bookmarks(app):
+    """Test the narrow live search query"""
+    with app.app_context():
+        folder_id = folder_service.create_folder('Docs')
+        bookmark_service.create_bookmark('https://python.org', 'Python', 'Language docs', folder_id, [])
+        bookmark_service.create_bookmark('https://example.com', 'Example', '', None, [])
+
+        results = bookmark_service.search_bookmarks('docs')
+        assert len(results) == 1
+        assert set(results[0]) == {'id', 'title', 'url', 'folder_name', 'favicon'}
+        assert results[0]['folder_name'] == 'Docs'
+        assert len(bookmark_service.search_bookmarks('https', limit=1)) == 1
+
+
+def test_bookmark_service_get_all_tags_per_bookmark(app):
+    """Test that listed bookmarks carry their own tags, including names with commas"""
+    with app.app_context():
+        tag_a = tag_service.create_tag('a, b')
+        tag_c = tag_service.create_tag('c')
+        first_id = bookmark_service.create_bookmark('https://one.com', 'One', '', None, [tag_a, tag_c])
+        second_id = bookmark_service.create_bookmark('https://two.com', 'Two', '', None, [])
+
+        result = bookmark_service.get_all_bookmarks()
+        tags = {b['id']: b['tags'] for b in result['bookmarks']}
+        assert tags[first_id] == [{'id': tag_a, 'name': 'a, b'}, {'id': tag_c, 'name': 'c'}]
+        assert tags[second_id] == []
+        assert result['total'] == 2
+
+
+def test_bookmark_service_filter_by_folder_with_subfolders(app):
+    """Test filtering by folder includes nested subfolders only when requested"""
+    with app.app_context():
+        parent_id = folder_service.create_folder('Parent')
+        child_id = folder_service.create_folder('Child', parent_id)
+        grandchild_id = folder_service.create_folder('Grandchild', child_id)
+        other_id = folder_service.create_folder('Other')
+        bookmark_service.create_bookmark('https://a.com', 'A', '', parent_id, [])
+        bookmark_service.create_bookmark('https://b.com', 'B', '', grandchild_id, [])
+        bookmark_service.create_bookmark('https://c.com', 'C', '', other_id, [])
+
+        result = bookmark_service.get_all_bookmarks(folder_id=parent_id)
+        assert {b['title'] for b in result['bookmarks']} == {'A', 'B'}
+        assert result['total'] == 2
+
+        result = bookmark_service.get_all_bookmarks(folder_id=parent_id, include_subfolders=False)
+        assert [b['title'] for b in result['bookmarks']] == ['A']
+
+
+def test_update_bookmark_writes_only_changed_tags(app):
+    """Test that updating a bookmark leaves unchanged tag links untouched"""
+    with app.app_context():
+        tag1 = tag_service.create_tag('Keep')
+        tag2 = tag_service.create_tag('Drop')
+        tag3 = tag_service.create_tag('Add')
+        bookmark_id = bookmark_service.create_bookmark('https://test.com', 'Test', '', None, [tag1, tag2])
+
+        statements = []
+        db = get_db()
+        db.set_trace_callback(statements.append)
+        bookmark_service.update_bookmark(bookmark_id, 'https://test.com', 'Test', '', None, [tag1, tag2])
+        writes = [s for s in statements if 'bookmark_tags' in s and not s.lstrip().startswith('SELECT')]
+        assert writes == []
+
+        bookmark_service.update_bookmark(bookmark_id, 'https://test.com', 'Test', '', None, [tag1, tag3])
+        db.set_trace_callback(None)
+
+        bookmark = bookmark_service.get_bookmark(bookmark_id)
+        assert {t['id'] for t in bookmark['tags']} == {tag1, tag3}
+
+
+def test_bookmark_search_full_text_index(app):
+    """Test that search uses word prefixes and follows updates and deletes"""
+    with app.app_context():
+        bookmark_id = bookmark_service.create_bookmark(
+            'https://cafe.example.com', 'Café Guide', 'Coffee houses in Vienna', None, [])
+
+        assert bookmark_service.get_all_bookmarks(search='cafe guid')['total'] == 1
+        assert bookmark_service.get_all_bookmarks(search='vienna coffee')['total'] == 1
+        assert bookmark_service.get_all_bookmarks(search='vienna tea')['total'] == 0
+
+        bookmark_service.update_bookmark(bookmark_id, 'https://tea.example.com', 'Tea Guide', '', None, [])
+        assert bookmark_service.get_all_bookmarks(search='vienna')['total'] == 0
+        assert [b['id'] for b in bookmark_service.search_bookmarks('tea')] == [bookmark_id]
+
+        bookmark_service.delete_bookmark(bookmark_id)
+        assert bookmark_service.search_bookmarks('tea') == []
+
+
+def test_bookmark_search_terms_with_symbols(app):
+    """Test that symbols in a search term must appear, and words only match at their start"""
+    with app.app_context():
+        cpp_id = bookmark_service.create_bookmark('https://cppreference.com', 'C++ Reference', '', None, [])
+        csharp_id = bookmark_service.create_bookmark('https://learn.microsoft.com', 'C# Guide', '', None, [])
+        node_id = bookmark_service.create_bookmark('https://nodejs.org', 'Node.js', 'JavaScript runtime', None, [])
+        github_id = bookmark_service.create_bookmark('https://github.com', 'GitHub', 'Code hosting', None, [])
+
+        assert [b['id'] for b in bookmark_service.search_bookmarks('c++')] == [cpp_id]
+        assert [b['id'] for b in bookmark_service.search_bookmarks('C#')] == [csharp_id]
+        assert [b['id'] for b in bookmark_service.search_bookmarks('node.js')] == [node_id]
+        assert bookmark_service.get_all_bookmarks(search='c++')['total'] == 1
+        assert [b['id'] for b in bookmark_service.search_bookmarks('++')] == [cpp_id]
+        # Prefix matching: 'git' finds GitHub, the infix 'hub' does not
+        assert [b['id'] for b in bookmark_service.search_bookmarks('git')] == [github_id]
+        assert bookmark_service.search_bookmarks('hub') == []
+
+
+def test_bookmark_list_uses_order_index(app):
+    """Test that the default bookmark order is read from an index instead of sorted"""
+    with app.app_context():
+        plan = get_db().execute('''
+            EXPLAIN QUERY PLAN
+            SELECT b.* FROM bookmarks b ORDER BY b.pinned DESC, b.created_at DESC LIMIT 25
+        ''').fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        assert 'idx_bookmarks_pinned_created' in details
+        assert 'TEMP B-TREE' not in details
+
+
+def test_folder_listings_use_order_indexes(app):
+    """Test that bookmarks of a folder and the folder tree are read in index order"""
+    with app.app_context():
+        db = get_db()
+        plan = db.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT b.* FROM bookmarks b WHERE b.folder_id = ?
+            ORDER BY b.pinned DESC, b.created_at DESC LIMIT 25
+        ''', ('folder',)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        assert 'idx_bookmarks_folder_pinned_created' in details
+        assert 'TEMP B-TREE' not in details
+
+        plan = db.execute('EXPLAIN QUERY PLAN SELECT * FROM folders ORDER BY parent_id, name').fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        assert 'idx_folders_parent_name' in details
+        assert 'TEMP B-TREE' not in details
+
+
+def test_title_sort_and_tag_filter_use_indexes(app):
+    """Test that the title order is read from an index and tag filters only read the tag index"""
+    with app.app_context():
+        db = get_db()
+        plan = db.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT b.* FROM bookmarks b ORDER BY b.pinned DESC, b.title ASC LIMIT 25
+        ''').fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        assert 'idx_bookmarks_pinned_title' in details
+        assert 'TEMP B-TREE' not in details
+
+        plan = db.execute('EXPLAIN QUERY PLAN SELECT bookmark_id FROM bookmark_tags WHERE tag_id = ?',
+                          ('tag',)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        assert 'COVERING INDEX idx_bookmark_tags_tag_bookmark' in details
+
+
+def test_bookmark_pagination_total(app):
+    """Test that the total is reported on every page, including pages past the end"""
+    with app.app_context():
+        for i in range(5):
+            bookmark_service.create_bookmark(f'https://page{i}.com', f'Page {i}', '', None, [])
+
+        result = bookmark_service.get_all_bookmarks(page=2, per_page=2)
+        assert len(result['bookmarks']) == 2
+        assert result['total'] == 5
+        assert result['total_pages'] == 3
+        assert '_total' not in result['bookmarks'][0]
+
+        result = bookmark_service.get_all_bookmarks(page=4, per_page=2)
+        assert result['bookmarks'] == []
+        assert result['total'] == 5
+
+
+def test_folder_closure_follows_moves_and_deletes(app):
+    """Test that subfolder filtering stays correct when folders are moved or deleted"""
+    with app.app_context():
+        a_id = folder_service.create_folder('A')
+        b_id = folder_service.create_folder('B', a_id)
+        c_id = folder_service.create_folder('C', b_id)
+        d_id = folder_service.create_folder('D')
+        bookmark_service.create_bookmark('https://c.com', 'In C', '', c_id, [])
+
+        assert folder_service.get_folder_with_descendants(a_id) == [a_id, b_id, c_id]
+
+        folder_service.update_folder(b_id, 'B', d_id)
+        assert bookmark_service.get_all_bookmarks(folder_id=a_id)['total'] == 0
+        assert bookmark_service.get_all_bookmarks(folder_id=d_id)['total'] == 1
+        assert folder_service.get_folder_with_descendants(d_id) == [d_id, b_id, c_id]
+        assert [parent['id'] for parent in folder_service.get_folder(c_id)['parent_chain']] == [d_id, b_id]
+
+        folder_service.delete_folder(b_id)
+        assert bookmark_service.get_all_bookmarks(folder_id=d_id)['total'] == 0
+        assert folder_service.get_folder_with_descendants(d_id) == [d_id]
+
+
+def test_folder_closure_filled_for_existing_folders(app):
+    """Test that init_db builds the closure table for folders created before it existed"""
+    from app.utils.database import init_db
+    with app.app_context():
+        parent_id = folder_service.create_folder('Parent')
+        child_id = folder_service.create_folder('Child', parent_id)
+
+        db = get_db()
+        db.execute('DROP TABLE folder_closure')
+        db.commit()
+        db.execute('PRAGMA user_version = 0')
+        init_db()
+
+        assert folder_service.get_folder_with_descendants(parent_id) == [parent_id, child_id]
+        row = db.execute('SELECT depth FROM folder_closure WHERE ancestor = ? AND descendant = ?',
+                         (parent_id, child_id)).fetchone()
+        assert row['depth'] == 1
+
+
+def test_init_db_skips_current_schema(app):
+    """Test that init_db records the schema version and skips the schema script afterwards"""
+    from app.utils.database import SCHEMA_VERSION, init_db
+    with app.app_context():
+        db = get_db()
+        assert db.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+
+        statements = []
+        db.set_trace_callback(statements.append)
+        init_db()
+        db.set_trace_callback(None)
+        assert not any('CREATE' in statement for statement in statements)
+
+
+def test_update_folder_rejects_move_into_own_subtree(app):
+    """Test that a folder cannot be moved below itself or one of its descendants"""
+    with app.app_context():
+        parent_id = folder_service.create_folder('Parent')
+        child_id = folder_service.create_folder('Child', parent_id)
+        grandchild_id = folder_service.create_folder('Grandchild', child_id)
+
+        for target_id in (parent_id, child_id, grandchild_id):
+            with pytest.raises(ValueError):
+                folder_service.update_folder(parent_id, 'Parent', target_id)
+
+        other_id = folder_service.create_folder('Other')
+        folder_service.update_folder(child_id, 'Child', other_id)
+        assert folder_service.get_folder(child_id)['parent_id'] == other_id
+
+
+def test_folder_counts(app):
+    """Test bookmark and subfolder counts of folders with both kinds of children"""
+    with app.app_context():
+        parent_id = folder_service.create_folder('Parent')
+        folder_service.create_folder('Child 1', parent_id)
+        folder_service.create_folder('Child 2', parent_id)
+        for i in range(3):
+            bookmark_service.create_bookmark(f'https://count{i}.com', f'Count {i}', '', parent_id, [])
+
+        folders = {f['name']: f for f in folder_service.get_all_folders()}
+        assert folders['Parent']['bookmark_count'] == 3
+        assert folders['Parent']['subfolder_count'] == 2
+        assert folders['Child 1']['bookmark_count'] == 0
+        assert folders['Child 1']['subfolder_count'] == 0
+
+        parent = folder_service.get_folder_hierarchy()[0]
+        assert (parent['bookmark_count'], parent['subfolder_count']) == (3, 2)
+
+
+def test_create_tags_and_folders_bulk(app):
+    with app.app_context():
+        tag_ids = tag_service.create_tags_bulk(['alpha', 'beta', 'gamma'])
+        assert [tag_service.get_tag(tag_id)['name'] for tag_id in tag_ids] == ['alpha', 'beta', 'gamma']
+
+        root_id, = folder_service.create_folders_bulk([('Root', None)])
+        child_ids = folder_service.create_folders_bulk([('Child A', root_id), ('Child B', root_id)])
+        assert [folder_service.get_folder(folder_id)['parent_id'] for folder_id in child_ids] == [root_id, root_id]
+        assert set(folder_service.get_folder_with_descendants(root_id)) == {root_id, *child_ids}
+
+
+def test_create_bookmarks_bulk(app):
+    with app.app_context():
+        folder_id = str(uuid.uuid4())
+        assert folder_service.create_folders_bulk([('Preset', None)], [folder_id]) == [folder_id]
+        tag_ids = tag_service.create_tags_bulk(['one', 'two'])
+
+        bookmark_ids = bookmark_service.create_bookmarks_bulk([
+            ('https://a.example.com', 'A', 'First', folder_id, [tag_ids[0], tag_ids[0], tag_ids[1]]),
+            ('https://b.example.com', 'B', '', None, []),
+        ])
+        first = bookmark_service.get_bookmark(bookmark_ids[0])
+        assert first['folder_id'] == folder_id
+        assert sorted(tag['name'] for tag in first['tags']) == ['one', 'two']
+        assert bookmark_service.get_bookmark(bookmark_ids[1])['tags'] == []
+
+
+def test_transaction_commits_once_and_rolls_back(app):
+    from app.utils.database import transaction
+    with app.app_context():
+        db = get_db()
+        assert db.isolation_level is None
+
+        with transaction():
+            tag_service.create_tag('Outer', bump_version=False)
+            with transaction():
+                tag_service.create_tag('Inner', bump_version=False)
+            # The inner block joined the outer transaction instead of committing
+            assert db.in_transaction
+        assert not db.in_transaction
+
+        with pytest.raises(ValueError):
+            with transaction():
+                tag_service.create_tag('Discarded', bump_version=False)
+                raise ValueError('abort')
+        names = {tag['name'] for tag in tag_service.get_all_tags()}
+        assert {'Outer', 'Inner'} <= names
+        assert 'Discarded' not in names
@@ -1,67 +1,76 @@
-import time
+import pytest
 from app.services import bookmark_service, folder_service, tag_service
-
-
-def test_bookmark_timestamp_update(app):
+from app.utils.database import get_db, init_db
+
+
+# create(), then update() with the new ID, get(), and the field update() changes
+TIMESTAMP_ENTITIES = {
+    'bookmark': (
+        lambda: bookmark_service.create_bookmark('https://example.com', 'Original Title', 'Description', None, []),
+        lambda bookmark_id: bookmark_service.update_bookmark(
+            bookmark_id, 'https://example.com', 'Updated Title', 'Description', None, []),
+        bookmark_service.get_bookmark,
+        ('title', 'Updated Title'),
+    ),
+    'folder': (
+        lambda: folder_service.create_folder('Original Folder'),
+        lambda folder_id: folder_service.update_folder(folder_id, 'Updated Folder', None),
+        folder_service.get_folder,
+        ('name', 'Updated Folder'),
+    ),
+    'tag': (
+        lambda: tag_service.create_tag('Original Tag'),
+        lambda tag_id: tag_service.update_tag(tag_id, 'Updated Tag'),
+        tag_service.get_tag,
+        ('name', 'Updated Tag'),
+    ),
+}
+
+
+@pytest.mark.parametrize('entity', list(TIMESTAMP_ENTITIES))
+def test_timestamp_update(app, entity):
+    create, update, get, (field, value) = TIMESTAMP_ENTITIES[entity]
     with app.app_context():
-        # Create a bookmark
-        bookmark_id = bookmark_service.create_bookmark(
-            'https://example.com',
-            'Original Title',
-            'Description',
-            None,
-            []
-        )
-        bookmark = bookmark_service.get_bookmark(bookmark_id)
-        created_at_initial = bookmark['created_at']
-
-        # Wait a second to ensure timestamp will be different
-        time.sleep(1.1)
+        item_id = create()
+        item = get(item_id)
+        created_at_initial = item['created_at']
+        assert item['updated_at'] is None
 
-        # Update the bookmark
-        bookmark_service.update_bookmark(
-            bookmark_id,
-            'https://example.com',
-            'Updated Title',
-            'Description',
-            None,
-            []
-        )
+        update(item_id)
 
-        bookmark_updated = bookmark_service.get_bookmark(bookmark_id)
-        created_at_final = bookmark_updated['created_at']
+        item_updated = get(item_id)
 
-        assert created_at_final > created_at_initial
-        assert bookmark_updated['title'] == 'Updated Title'
+        assert item_updated['updated_at'] >= created_at_initial
+        assert item_updated['created_at'] == created_at_initial
+        assert item_updated[field] == value
 
 
-def test_folder_timestamp_update(app):
+def test_bookmark_timestamp_set_on_pin(app):
     with app.app_context():
-        folder_id = folder_service.create_folder('Original Folder')
-        folder = folder_service.get_folder(folder_id)
-        created_at_initial = folder['created_at']
-
-        time.sleep(1.1)
-
-        folder_service.update_folder(folder_id, 'Updated Folder', None)
+        bookmark_id = bookmark_service.create_bookmark('https://example.com', 'Title', None, None, [])
+        bookmark_service.toggle_pin(bookmark_id)
 
-        folder_updated = folder_service.get_folder(folder_id)
-        created_at_final = folder_updated['created_at']
+        assert bookmark_service.get_bookmark(bookmark_id)['updated_at'] is not None
 
-        assert created_at_final > created_at_initial
 
-
-def test_tag_timestamp_update(app):
+def test_updated_at_added_to_existing_database(app):
     with app.app_context():
-        tag_id = tag_service.create_tag('Original Tag')
-        tag = tag_service.get_tag(tag_id)
-        created_at_initial = tag['created_at']
-
-        time.sleep(1.1)
-
-        tag_service.update_tag(tag_id, 'Updated Tag')
-
-        tag_updated = tag_service.get_tag(tag_id)
-        created_at_final = tag_updated['created_at']
-
-        assert created_at_final > created_at_initial
+        db = get_db()
+        db.execute('DROP TABLE tags')
+        db.execute('CREATE TABLE tags (id TEXT PRIMARY KEY, name TEXT NOT NULL UNIQUE, '
+                   'created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+        db.execute('''
+            CREATE TRIGGER update_tags_timestamp AFTER UPDATE ON tags FOR EACH ROW
+            BEGIN UPDATE tags SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END
+        ''')
+        db.execute("INSERT INTO tags (id, name, created_at) VALUES ('t1', 'Old', '2020-01-01 00:00:00')")
+        db.commit()
+        # Databases created before schema versioning have the default user_version
+        db.execute('PRAGMA user_version = 0')
+
+        init_db()
+
+        tag_service.update_tag('t1', 'Renamed')
+        tag = tag_service.get_tag('t1')
+        assert tag['created_at'] == '2020-01-01 00:00:00'
+        assert tag['updated_at'] is not None